@@ -1,3 +1,41 @@
-from .popup_window import create_popup_window
-from .ui_components import request_market_data, confirm_and_place_order
-from .ibkr_client import IBKRClient
\ No newline at end of file
+import importlib
+
+# Names are imported on first access so that importing one module of the
+# package does not load pandas, ib_insync and lightweight_charts up front
+_EXPORTS = {
+    "request_market_data": ".ui_components",
+    "confirm_and_place_order": ".ui_components",
+    "create_popup_window": ".popup_window",
+    "create_watchlist_window": ".watchlist",
+    "create_scanner_window": ".scanner",
+    "create_order_blotter_window": ".order_blotter",
+    "create_basket_window": ".basket",
+    "create_alerts_window": ".alerts",
+    "IBKRClient": ".ibkr_client",
+    "ContractCache": ".contract_cache",
+    "IndicatorEngine": ".indicators",
+    "SubscriptionManager": ".subscriptions",
+    "LineBudgetError": ".subscriptions",
+    "TickBuffer": ".tick_buffer",
+    "Lifecycle": ".lifecycle",
+    "RequestScheduler": ".request_scheduler",
+    "FuturesChainCache": ".futures_chain",
+    "ConnectionPool": ".connection_pool",
+    "OrderTracker": ".orders",
+    "AlertEngine": ".alerts",
+    "AlertMonitor": ".alerts",
+    "parse_rule": ".alerts",
+    "TickRecorder": ".tick_log",
+    "ReplayIB": ".tick_log",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,808 @@
+import json
+import os
+import re
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from tkinter import messagebox
+
+import numpy as np
+import ttkbootstrap as ttk
+from ttkbootstrap.tooltip import ToolTip
+
+from src.bar_store import to_epoch
+from src.basket import TICKER_TYPES
+from src.ibkr_client import valid_price
+from src.indicators import IndicatorEngine
+from src.lifecycle import Lifecycle
+from src.live_bars import LiveBarBuilder, TradeFilter
+from src.request_scheduler import PRIORITY_BACKGROUND
+from src.subscriptions import LineBudgetError
+
+
+# Quote fields; indicators are named with their period, e.g. SMA14
+QUOTE_FIELDS = ("bid", "ask", "last")
+INDICATOR_PERIOD = 14
+
+# Level rules fire when their condition starts to hold, crossing rules when
+# the value moves through the threshold; 'crosses' fires in either direction
+OPS = (">", "<", "crosses", "crosses_above", "crosses_below")
+
+# Seconds a rule stays silent after firing
+ALERT_COOLDOWN = 60
+
+# Milliseconds between two evaluations of the symbols that ticked
+ALERT_FRAME_MS = 250
+
+# Fired alerts kept in memory for the alerts window
+ALERT_HISTORY = 500
+
+RULE_COLUMNS = ("rule", "status", "value", "fired")
+LOG_COLUMNS = ("time", "rule", "value")
+
+_INDICATOR = re.compile(r"^(SMA|EMA|RSI)(\d+)?$")
+
+
+def _field(token, period=None):
+    """Return the canonical name of a field token, or None if it is not one"""
+    if token.lower() in QUOTE_FIELDS:
+        return token.lower()
+    if token.upper() == "VWAP":
+        return "VWAP"
+    match = _INDICATOR.match(token.upper())
+    if match is None:
+        return None
+    if match.group(2) and period is not None:
+        return None
+    return f"{match.group(1)}{period or match.group(2) or INDICATOR_PERIOD}"
+
+
+def _operand(tokens):
+    """Parse a field, with an optional period token, from the start of tokens
+
+    Returns:
+        tuple: (field, tokens consumed), or (None, 0)
+    """
+    if not tokens:
+        return None, 0
+    if len(tokens) > 1 and tokens[1].isdigit() and _INDICATOR.match(tokens[0].upper()):
+        field = _field(tokens[0], int(tokens[1]))
+        if field is not None:
+            return field, 2
+    field = _field(tokens[0])
+    return (field, 1) if field is not None else (None, 0)
+
+
+def indicator_periods(fields):
+    """Return the indicator periods referenced by a set of field names"""
+    return sorted({int(name[3:]) for name in fields if _INDICATOR.match(name)})
+
+
+class AlertRule:
+
+    def __init__(self, symbol, field, op, threshold=0.0, other=None, ticker_type="Stock"):
+        """Initialize a condition on one symbol
+
+        A rule compares a field with a number or, when ``other`` is given,
+        with another field, in which case the engine evaluates their
+        difference against a threshold of 0.
+
+        Args:
+            symbol (str): Ticker symbol
+            field (str): 'bid', 'ask', 'last', 'VWAP' or an indicator with
+                its period such as 'SMA14'
+            op (str): One of OPS
+            threshold (float): Number the field is compared with
+            other (str, optional): Field the field is compared with instead
+            ticker_type (str): Type of ticker ('Stock' or 'Future')
+
+        Raises:
+            ValueError: If the field or operator is unknown
+        """
+        if op not in OPS:
+            raise ValueError(f"Unknown operator {op!r}.")
+        for name in (field, other):
+            if name is not None and _field(name) != name:
+                raise ValueError(f"Unknown field {name!r}.")
+        self.symbol = symbol.upper()
+        self.field = field
+        self.op = op
+        self.threshold = 0.0 if other is not None else float(threshold)
+        self.other = other
+        self.ticker_type = ticker_type
+
+    @property
+    def key(self):
+        return self.ticker_type, self.symbol
+
+    @property
+    def expression(self):
+        return self.field, self.other
+
+    def __str__(self):
+        right = self.other if self.other is not None else f"{self.threshold:g}"
+        text = f"{self.symbol} {self.field} {self.op.replace('_', ' ')} {right}"
+        return text if self.ticker_type == "Stock" else f"{text} {self.ticker_type}"
+
+    def __repr__(self):
+        return f"AlertRule({str(self)!r})"
+
+
+def parse_rule(text):
+    """Parse a rule such as 'AAPL last crosses above SMA 14' or 'ES RSI < 30 Future'
+
+    The rule reads symbol, field, operator and a number or a second field,
+    optionally followed by the ticker type (Stock or Future, default Stock).
+    Indicators take their period after the name ('SMA 20' or 'SMA20',
+    default 14).
+
+    Args:
+        text (str): Rule text
+
+    Returns:
+        AlertRule: The parsed rule
+
+    Raises:
+        ValueError: If the text is not a valid rule
+    """
+    tokens = text.replace("_", " ").split()
+    ticker_type = "Stock"
+    if tokens and tokens[-1].upper() in TICKER_TYPES:
+        ticker_type = TICKER_TYPES[tokens.pop().upper()]
+    if len(tokens) < 4:
+        raise ValueError("Expected symbol, field, operator and a value or field.")
+    symbol = tokens[0]
+    if not symbol.isalnum():
+        raise ValueError("Ticker symbol must be alphanumeric.")
+    field, used = _operand(tokens[1:])
+    if field is None:
+        raise ValueError(f"Unknown field {tokens[1]!r}.")
+    rest = tokens[1 + used:]
+    op = rest[0].lower() if rest else ""
+    if op == "crosses" and len(rest) > 1 and rest[1].lower() in ("above", "below"):
+        op, rest = f"crosses_{rest[1].lower()}", rest[2:]
+    else:
+        rest = rest[1:]
+    if op not in OPS:
+        raise ValueError(f"Unknown operator {op!r}; use >, <, crosses, crosses above or crosses below.")
+    other, used = _operand(rest)
+    if other is not None and used == len(rest):
+        return AlertRule(symbol, field, op, other=other, ticker_type=ticker_type)
+    if len(rest) != 1:
+        raise ValueError("Expected a single number or field after the operator.")
+    try:
+        threshold = float(rest[0])
+    except ValueError:
+        raise ValueError(f"Unknown field {rest[0]!r}.") from None
+    return AlertRule(symbol, field, op, threshold, ticker_type=ticker_type)
+
+
+class Alert:
+
+    def __init__(self, rule, value, fired_at):
+        """Initialize the record of a rule that fired
+
+        Args:
+            rule (AlertRule): The rule
+            value (float): Value of the rule's expression when it fired
+            fired_at (float): POSIX time of the evaluation
+        """
+        self.rule = rule
+        self.value = value
+        self.fired_at = fired_at
+
+    def message(self):
+        """Return a one-line description, e.g. for a notification"""
+        if self.rule.other is not None:
+            return f"{self.rule} ({self.rule.field} - {self.rule.other} = {self.value:.2f})"
+        return f"{self.rule} ({self.rule.field} = {self.value:.2f})"
+
+
+class _RuleGroup:
+
+    def __init__(self, expression, op, rows, thresholds, rule_ids):
+        """Index the rules sharing an expression and an operator
+
+        Rules are sorted by symbol row and threshold rank into one array of
+        integer keys, so the rules of any symbol whose threshold lies in a
+        value range are a contiguous slice found by binary search.
+        """
+        self.expression = expression
+        self.op = op
+        self.levels = np.unique(thresholds)
+        self.width = len(self.levels)
+        keys = rows.astype(np.int64) * self.width + np.searchsorted(self.levels, thresholds)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.rule_ids = rule_ids[order]
+
+    def match(self, rows, previous, current):
+        """Return the IDs of the rules fired by a batch of symbol updates
+
+        Args:
+            rows (numpy.ndarray): Symbol rows that were updated
+            previous (numpy.ndarray): Expression values at the last evaluation
+            current (numpy.ndarray): Expression values now
+
+        Returns:
+            numpy.ndarray: Rule IDs
+        """
+        first = np.isnan(previous)
+        # Levels and crossings fire for the thresholds the value moved through;
+        # level rules also fire for every threshold met when first evaluated
+        level = self.op in (">", "<")
+        up = ~np.isnan(current) & ((first & level) | (current > previous))
+        down = ~np.isnan(current) & ((first & level) | (current < previous))
+        if self.op in (">", "crosses", "crosses_above"):
+            # previous <= threshold < current
+            up_low = np.where(first, 0, np.searchsorted(self.levels, previous, "left"))
+            up_high = np.searchsorted(self.levels, current, "left")
+        if self.op in ("<", "crosses", "crosses_below"):
+            # current < threshold <= previous
+            down_low = np.searchsorted(self.levels, current, "right")
+            down_high = np.where(first, self.width, np.searchsorted(self.levels, previous, "right"))
+        if self.op in (">", "crosses_above"):
+            low, high = up_low, np.where(up, up_high, up_low)
+        elif self.op in ("<", "crosses_below"):
+            low, high = down_low, np.where(down, down_high, down_low)
+        else:
+            low = np.where(up, up_low, down_low)
+            high = np.where(up, up_high, np.where(down, down_high, down_low))
+
+        base = rows.astype(np.int64) * self.width
+        start = np.searchsorted(self.keys, base + low, "left")
+        end = np.searchsorted(self.keys, base + np.maximum(high, low), "left")
+        counts = end - start
+        total = int(counts.sum())
+        if not total:
+            return self.rule_ids[:0]
+        offsets = np.repeat(start - np.cumsum(counts) + counts, counts) + np.arange(total)
+        return self.rule_ids[offsets]
+
+
+class AlertEngine:
+
+    def __init__(self, rules=(), cooldown=ALERT_COOLDOWN):
+        """Initialize an evaluator of many alert rules over streaming values
+
+        Rules are compiled once into per-(expression, operator) groups
+        sorted by symbol and threshold. Updates only mark their symbol
+        dirty; ``evaluate`` then computes every expression of the dirty
+        symbols as one array operation and finds the fired rules with a
+        binary search per group, so its cost grows with the number of
+        groups, symbols updated and rules fired, and only logarithmically
+        with the number of rules.
+
+        Values are compared between evaluations, so a value that crosses a
+        threshold and comes back within one batch does not fire. Missing
+        values are compared as the last known one.
+
+        Args:
+            rules (iterable): AlertRule objects
+            cooldown (float): Seconds a rule stays silent after firing
+        """
+        self.cooldown = cooldown
+        self.evaluations = 0
+        self.fired = 0
+        self.suppressed = 0
+        self.compile(rules)
+
+    def compile(self, rules):
+        """Replace the rules
+
+        Values, and the cooldown of rules kept from the previous set, carry
+        over. New level rules whose condition already holds fire at the
+        next evaluation.
+        """
+        old_rules = getattr(self, "rules", [])
+        old_index = getattr(self, "_index", {})
+        old_fields = getattr(self, "fields", ())
+        old_expressions = getattr(self, "expressions", [])
+        old_raw = getattr(self, "_raw", None)
+        old_current = getattr(self, "_current", None)
+        old_last_fired = getattr(self, "_last_fired", None)
+
+        self.rules = list(rules)
+        self.keys = list(dict.fromkeys(rule.key for rule in self.rules))
+        self._index = {key: row for row, key in enumerate(self.keys)}
+        self.fields = tuple(sorted({name for rule in self.rules for name in rule.expression if name}))
+        self._field_index = {name: column for column, name in enumerate(self.fields)}
+        self.expressions = list(dict.fromkeys(rule.expression for rule in self.rules))
+        expression_index = {expression: column for column, expression in enumerate(self.expressions)}
+        self._left = np.array([self._field_index[left] for left, _ in self.expressions], dtype=np.intp)
+        self._right = np.array([self._field_index[right] if right else -1 for _, right in self.expressions],
+                               dtype=np.intp)
+        self._rule_rows = np.array([self._index[rule.key] for rule in self.rules], dtype=np.intp)
+        self._rule_columns = np.array([expression_index[rule.expression] for rule in self.rules],
+                                      dtype=np.intp)
+
+        self._raw = self._carry(old_raw, old_index, old_fields, self.fields, len(self.fields))
+        self._current = self._carry(old_current, old_index, old_expressions, self.expressions,
+                                    len(self.expressions))
+        self._last_fired = np.full(len(self.rules), -np.inf)
+        old_ids = {id(rule): rule_id for rule_id, rule in enumerate(old_rules)}
+        self._pending = []
+        for rule_id, rule in enumerate(self.rules):
+            if id(rule) in old_ids:
+                self._last_fired[rule_id] = old_last_fired[old_ids[id(rule)]]
+            elif rule.op in (">", "<"):
+                value = self._current[self._rule_rows[rule_id], self._rule_columns[rule_id]]
+                if value > rule.threshold if rule.op == ">" else value < rule.threshold:
+                    self._pending.append(rule_id)
+        self._dirty = set()
+
+        groups = {}
+        for rule_id, rule in enumerate(self.rules):
+            groups.setdefault((expression_index[rule.expression], rule.op), []).append(rule_id)
+        self._groups = []
+        for (column, op), rule_ids in groups.items():
+            rule_ids = np.array(rule_ids, dtype=np.intp)
+            thresholds = np.array([self.rules[i].threshold for i in rule_ids])
+            self._groups.append(_RuleGroup(column, op, self._rule_rows[rule_ids], thresholds, rule_ids))
+
+    def _carry(self, old, old_index, old_columns, columns, width):
+        """Return a (symbols, width) array holding the old values still referenced"""
+        values = np.full((len(self.keys), width), np.nan)
+        if old is None:
+            return values
+        old_column_index = {name: column for column, name in enumerate(old_columns)}
+        pairs = [(column, old_column_index[name]) for column, name in enumerate(columns)
+                 if name in old_column_index]
+        rows = [(row, old_index[key]) for key, row in self._index.items() if key in old_index]
+        if pairs and rows:
+            new_rows, old_rows = (np.array(side, dtype=np.intp) for side in zip(*rows))
+            new_columns, old_columns = (np.array(side, dtype=np.intp) for side in zip(*pairs))
+            values[np.ix_(new_rows, new_columns)] = old[np.ix_(old_rows, old_columns)]
+        return values
+
+    def update(self, key, values):
+        """Store the latest field values of a symbol and mark it for evaluation
+
+        Args:
+            key (tuple): (ticker_type, symbol) of the rules
+            values (dict): Field values such as those returned by
+                ``IBKRClient.calculate_indicators`` or ``IndicatorEngine.preview``
+                keyed by field name; None and missing prices are NaN
+        """
+        row = self._index.get(key)
+        if row is None:
+            return
+        raw = self._raw[row]
+        for name, value in values.items():
+            column = self._field_index.get(name)
+            if column is not None:
+                raw[column] = np.nan if value is None else value
+        self._dirty.add(row)
+
+    def evaluate(self, now=None):
+        """Evaluate the rules of every symbol updated since the last call
+
+        Args:
+            now (float, optional): POSIX time used for the cooldown
+
+        Returns:
+            list: Alert objects for the rules that fired and are not cooling down
+        """
+        if not (self._dirty or self._pending) or not self.rules:
+            self._dirty.clear()
+            return []
+        now = time.time() if now is None else now
+        rows = np.fromiter(self._dirty, dtype=np.intp, count=len(self._dirty))
+        self._dirty.clear()
+        raw = self._raw[rows]
+        right = np.where(self._right >= 0, raw[:, self._right], 0.0)
+        current = raw[:, self._left] - right
+        previous = self._current[rows]
+        # A value missing for a moment keeps the last known one, so it does not
+        # count as a first evaluation and refire the level rules that still hold
+        self._current[rows] = np.where(np.isnan(current), previous, current)
+        self.evaluations += 1
+
+        matched = [group.match(rows, previous[:, group.expression], current[:, group.expression])
+                   for group in self._groups]
+        matched.append(np.array(self._pending, dtype=np.intp))
+        self._pending = []
+        rule_ids = np.unique(np.concatenate(matched))
+        ready = now - self._last_fired[rule_ids] >= self.cooldown
+        self.suppressed += int(len(rule_ids) - ready.sum())
+        rule_ids = rule_ids[ready]
+        self._last_fired[rule_ids] = now
+        self.fired += len(rule_ids)
+        values = self._current[self._rule_rows[rule_ids], self._rule_columns[rule_ids]]
+        return [Alert(self.rules[i], float(value), now) for i, value in zip(rule_ids.tolist(), values.tolist())]
+
+    def value(self, rule_id):
+        """Return the current value of a rule's expression, or None if unknown"""
+        value = self._current[self._rule_rows[rule_id], self._rule_columns[rule_id]]
+        return None if np.isnan(value) else float(value)
+
+    def last_fired(self, rule_id):
+        """Return the POSIX time a rule last fired, or None"""
+        fired_at = self._last_fired[rule_id]
+        return None if np.isinf(fired_at) else float(fired_at)
+
+    def stats(self):
+        """Return rule, group and firing counters
+
+        Returns:
+            dict: Dictionary with 'rules', 'symbols', 'groups', 'evaluations',
+                  'fired' and 'suppressed' (fired within the cooldown)
+        """
+        return {
+            "rules": len(self.rules),
+            "symbols": len(self.keys),
+            "groups": len(self._groups),
+            "evaluations": self.evaluations,
+            "fired": self.fired,
+            "suppressed": self.suppressed
+        }
+
+
+class _SymbolFeed:
+
+    def __init__(self, key, periods):
+        self.key = key
+        self.contract = None
+        self.handle = None
+        self.status = "Qualifying"
+        self.engines = {period: IndicatorEngine(period, period, period) for period in periods}
+        self.bars = LiveBarBuilder(bar_seconds=60)
+        self.trades = TradeFilter()
+        self.seeded = False
+        self.quote = {}
+
+    def values(self):
+        """Return the quote and the indicators of the forming bar"""
+        values = dict(self.quote)
+        if self.seeded and self.bars.bar is not None:
+            close, volume = self.bars.bar[4], self.bars.bar[5]
+            for period, engine in self.engines.items():
+                indicators = engine.preview(close, volume)
+                values["VWAP"] = indicators["VWAP"]
+                for name in ("SMA", "EMA", "RSI"):
+                    values[f"{name}{period}"] = indicators[name]
+        return values
+
+
+class AlertMonitor:
+
+    def __init__(self, widget, ibkr_client, rules_path=None, log_path=None, cooldown=ALERT_COOLDOWN):
+        """Initialize alerts that follow the market data of their symbols
+
+        Every symbol with rules gets a market data stream and indicators
+        seeded from its 1-minute history, like a popup's. Ticks only update
+        the symbol's quote; the symbols that ticked are evaluated together
+        every ALERT_FRAME_MS milliseconds on the Tk thread.
+
+        Args:
+            widget (tk.Widget): Widget owning the evaluation timer,
+                typically the main window
+            ibkr_client (IBKRClient): Instance of IBKRClient for API interactions
+            rules_path (str, optional): JSON file the rules are persisted to
+            log_path (str, optional): File every fired alert is appended to
+            cooldown (float): Seconds a rule stays silent after firing
+        """
+        self.widget = widget
+        self.ibkr_client = ibkr_client
+        self.rules_path = rules_path
+        self.log_path = log_path
+        self.engine = AlertEngine(cooldown=cooldown)
+        self.history = deque(maxlen=ALERT_HISTORY)
+        self.feeds = {}
+        self._dirty = set()
+        self._listeners = ()
+        self.life = Lifecycle(widget, "alerts")
+        self.life.add(self._release_feeds, "subscription")
+
+    def start(self):
+        """Load the persisted rules and start evaluating"""
+        self.set_rules(self.load())
+        self.life.every(ALERT_FRAME_MS, self.evaluate)
+
+    def stop(self):
+        """Stop evaluating and release every stream"""
+        self.life.close()
+
+    def load(self):
+        """Return the persisted rules; unreadable ones are skipped"""
+        if not self.rules_path or not os.path.exists(self.rules_path):
+            return []
+        try:
+            with open(self.rules_path) as f:
+                texts = json.load(f)
+        except (OSError, ValueError):
+            return []
+        rules = []
+        for text in texts:
+            try:
+                rules.append(parse_rule(text))
+            except ValueError:
+                continue
+        return rules
+
+    def save(self):
+        """Persist the rules"""
+        if not self.rules_path:
+            return
+        with open(self.rules_path, "w") as f:
+            json.dump([str(rule) for rule in self.engine.rules], f)
+
+    @property
+    def rules(self):
+        return self.engine.rules
+
+    def set_rules(self, rules):
+        """Compile a new rule set and start or release the symbols' streams
+
+        Symbols kept from the previous set keep their stream; only the
+        indicator periods their own rules newly reference are seeded.
+        """
+        self.engine.compile(rules)
+        fields = {}
+        for rule in self.engine.rules:
+            fields.setdefault(rule.key, set()).update(name for name in rule.expression if name)
+        for key in list(self.feeds):
+            if key not in fields:
+                self._release(self.feeds.pop(key))
+        for key in self.engine.keys:
+            periods = indicator_periods(fields[key])
+            feed = self.feeds.get(key)
+            if feed is None:
+                self.feeds[key] = feed = _SymbolFeed(key, periods)
+                self._start(feed)
+            else:
+                self._set_periods(feed, periods)
+                self._dirty.add(key)
+        self.save()
+
+    def add_rule(self, rule):
+        self.set_rules(self.engine.rules + [rule])
+
+    def remove_rules(self, rule_ids):
+        removed = set(rule_ids)
+        self.set_rules([rule for i, rule in enumerate(self.engine.rules) if i not in removed])
+
+    def watch(self, listener):
+        """Call a listener with the list of alerts fired by each evaluation
+
+        Returns:
+            callable: Call it to stop receiving alerts
+        """
+        self._listeners = self._listeners + (listener,)
+
+        def unwatch():
+            self._listeners = tuple(existing for existing in self._listeners if existing is not listener)
+
+        return unwatch
+
+    def evaluate(self):
+        """Evaluate the symbols that ticked and notify the fired alerts
+
+        Returns:
+            list: Alert objects that fired
+        """
+        for key in self._dirty:
+            feed = self.feeds.get(key)
+            if feed is not None:
+                self.engine.update(key, feed.values())
+        self._dirty.clear()
+        alerts = self.engine.evaluate()
+        if not alerts:
+            return alerts
+        self.history.extendleft(alerts)
+        self._log(alerts)
+        for listener in self._listeners:
+            try:
+                listener(alerts)
+            except Exception:
+                traceback.print_exc()
+        return alerts
+
+    def stats(self):
+        """Return the engine counters and the number of streaming symbols"""
+        stats = self.engine.stats()
+        stats["streaming"] = sum(feed.handle is not None for feed in self.feeds.values())
+        return stats
+
+    def _start(self, feed):
+        ticker_type, symbol = feed.key
+        self.ibkr_client.when_done(
+            self.ibkr_client.get_contract_async(ticker_type, symbol),
+            self.life.guard(lambda contract: self._on_contract(feed, contract)),
+            self.life.guard(lambda e: self._set_status(feed, "Not found"))
+        )
+
+    def _on_contract(self, feed, contract):
+        if self.feeds.get(feed.key) is not feed:
+            return
+        feed.contract = contract
+        try:
+            feed.handle = self.ibkr_client.stream_market_data(
+                contract, self.life.guard(lambda ticker: self._on_tick(feed, ticker)))
+        except LineBudgetError:
+            feed.status = "No free market data line"
+            return
+        feed.status = "Seeding" if feed.engines else "Streaming"
+        if feed.engines:
+            self.ibkr_client.when_done(
+                self.ibkr_client.get_historical_data_async(contract, priority=PRIORITY_BACKGROUND),
+                self.life.guard(lambda df: self._seed(feed, df)),
+                self.life.guard(lambda e: self._set_status(feed, "No history"))
+            )
+
+    def _set_periods(self, feed, periods):
+        for period in list(feed.engines):
+            if period not in periods:
+                del feed.engines[period]
+        added = [period for period in periods if period not in feed.engines]
+        for period in added:
+            feed.engines[period] = IndicatorEngine(period, period, period)
+        # A feed still qualifying or seeding seeds the new engines with the others
+        if added and feed.handle is not None and feed.status != "Seeding":
+            if not feed.seeded:
+                feed.status = "Seeding"
+            self.ibkr_client.when_done(
+                self.ibkr_client.get_historical_data_async(feed.contract, priority=PRIORITY_BACKGROUND),
+                self.life.guard(lambda df: self._seed(feed, df, added if feed.seeded else None)),
+                self.life.guard(lambda e: self._set_status(feed, "No history"))
+            )
+
+    def _seed(self, feed, df, periods=None):
+        if self.feeds.get(feed.key) is not feed or df is None or df.empty:
+            return
+        if periods is not None:
+            # Only engines added to a streaming feed; its live bar is kept
+            for period in periods:
+                if period in feed.engines:
+                    feed.engines[period].seed(df.iloc[:-1])
+            self._dirty.add(feed.key)
+            return
+        # The last bar may still be forming, as in the popup
+        for engine in feed.engines.values():
+            engine.seed(df.iloc[:-1])
+        last_bar = df.iloc[-1]
+        feed.bars.seed(to_epoch(last_bar["date"]), last_bar["open"], last_bar["high"],
+                       last_bar["low"], last_bar["close"], last_bar["volume"])
+        feed.seeded = True
+        feed.status = "Streaming"
+        self._dirty.add(feed.key)
+
+    def _set_status(self, feed, status):
+        feed.status = status
+
+    def _on_tick(self, feed, ticker):
+        if feed.handle is None:
+            return
+        last = valid_price(ticker.last)
+        feed.quote = {"bid": valid_price(ticker.bid), "ask": valid_price(ticker.ask), "last": last}
+        # Quote updates repeat the last trade; only new trades go into the bars
+        trade = feed.trades.new_trade(ticker)
+        if trade is not None and feed.seeded:
+            completed = feed.bars.add_tick(*trade)
+            if completed is not None:
+                for engine in feed.engines.values():
+                    engine.update(completed[4], completed[5])
+        self._dirty.add(feed.key)
+
+    def _log(self, alerts):
+        if not self.log_path:
+            return
+        try:
+            with open(self.log_path, "a") as f:
+                for alert in alerts:
+                    stamp = datetime.fromtimestamp(alert.fired_at).isoformat(timespec="seconds")
+                    f.write(f"{stamp}\t{alert.message()}\n")
+        except OSError:
+            traceback.print_exc()
+
+    def _release(self, feed):
+        if feed.handle is not None:
+            feed.handle.release()
+            feed.handle = None
+
+    def _release_feeds(self):
+        for feed in self.feeds.values():
+            self._release(feed)
+        self.feeds.clear()
+
+
+def _format_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%H:%M:%S") if timestamp is not None else ""
+
+
+def create_alerts_window(parent, monitor):
+    """Create a window for editing alert rules and browsing fired alerts
+
+    Args:
+        parent (tk.Widget): Parent widget (typically the main application window).
+        monitor (AlertMonitor): The application's alert monitor.
+
+    Returns:
+        ttk.Toplevel: The alerts window.
+    """
+    window = ttk.Toplevel(parent)
+    window.title("Alerts")
+    window.geometry("900x600")
+
+    entry_frame = ttk.Frame(window, padding=10)
+    entry_frame.pack(fill="x")
+    rule_entry = ttk.Entry(entry_frame, width=40, font=("Helvetica", 12))
+    rule_entry.pack(side="left", padx=(0, 10))
+    ToolTip(rule_entry, text="e.g. AAPL last crosses above SMA 14, MSFT RSI < 30, ES last > 6000 Future")
+
+    trees = {}
+    for name, columns, height in (("rules", RULE_COLUMNS, 10), ("log", LOG_COLUMNS, 12)):
+        frame = ttk.Frame(window, padding=(10, 0, 10, 10))
+        frame.pack(fill="both", expand=True)
+        tree = ttk.Treeview(frame, columns=columns, show="headings", bootstyle="table", height=height)
+        for col in columns:
+            tree.heading(col, text=col.title())
+            tree.column(col, anchor="w" if col == "rule" else "center", width=360 if col == "rule" else 120)
+        scrollbar = ttk.Scrollbar(frame, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side="right", fill="y")
+        tree.pack(side="left", fill="both", expand=True)
+        trees[name] = tree
+
+    summary_label = ttk.Label(window, font=("Helvetica", 10), bootstyle="secondary")
+    summary_label.pack(fill="x", padx=10, pady=(0, 10))
+
+    def show_rules():
+        tree = trees["rules"]
+        tree.delete(*tree.get_children())
+        for rule_id, rule in enumerate(monitor.rules):
+            tree.insert("", "end", iid=str(rule_id), values=(str(rule), "", "", ""))
+        refresh()
+
+    def refresh():
+        tree = trees["rules"]
+        for rule_id, rule in enumerate(monitor.rules):
+            feed = monitor.feeds.get(rule.key)
+            value = monitor.engine.value(rule_id)
+            tree.item(str(rule_id), values=(
+                str(rule),
+                feed.status if feed is not None else "",
+                f"{value:.2f}" if value is not None else "N/A",
+                _format_time(monitor.engine.last_fired(rule_id))
+            ))
+        stats = monitor.stats()
+        summary_label.config(text=f"{stats['rules']} rules on {stats['symbols']} symbols "
+                                  f"({stats['streaming']} streaming) · {stats['fired']} fired · "
+                                  f"{stats['suppressed']} suppressed by the {monitor.engine.cooldown:g} s cooldown")
+
+    def show_alerts(alerts):
+        for alert in alerts:
+            trees["log"].insert("", 0, values=(_format_time(alert.fired_at), alert.message(), f"{alert.value:.2f}"))
+
+    def add_rule(event=None):
+        try:
+            rule = parse_rule(rule_entry.get())
+        except ValueError as e:
+            messagebox.showerror("Invalid Rule", str(e), parent=window)
+            return
+        monitor.add_rule(rule)
+        rule_entry.delete(0, "end")
+        show_rules()
+
+    def remove_selected():
+        monitor.remove_rules(int(iid) for iid in trees["rules"].selection())
+        show_rules()
+
+    rule_entry.bind("<Return>", add_rule)
+    ttk.Button(entry_frame, text="Add Rule", command=add_rule, bootstyle="primary").pack(side="left")
+    ttk.Button(entry_frame, text="Remove Selected", command=remove_selected, bootstyle="danger").pack(
+        side="left", padx=5)
+
+    show_rules()
+    show_alerts(reversed(monitor.history))
+    life = Lifecycle(window, "alerts window")
+    life.add(monitor.watch(show_alerts), "listener")
+    life.every(1000, refresh)
+
+    def on_close():
+        life.close()
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    return window
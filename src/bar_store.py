@@ -0,0 +1,264 @@
+import calendar
+import json
+import math
+import os
+import re
+import time
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+
+BAR_DTYPE = np.dtype([
+    ('time', 'i8'),
+    ('open', 'f8'),
+    ('high', 'f8'),
+    ('low', 'f8'),
+    ('close', 'f8'),
+    ('volume', 'f8'),
+    ('average', 'f8'),
+    ('barCount', 'i8'),
+])
+
+DURATION_SECONDS = {"S": 1, "D": 86400, "W": 7 * 86400, "M": 31 * 86400, "Y": 366 * 86400}
+
+# IB counts 'D' and 'W' durations in trading sessions rather than calendar time
+SESSIONS_PER_UNIT = {"D": 1, "W": 5}
+
+
+def parse_duration(duration):
+    """Split an IB duration string such as '5 D' into its count and unit
+
+    Args:
+        duration (str): IB duration string
+
+    Returns:
+        tuple: (count, unit)
+
+    Raises:
+        ValueError: If the duration is not in IB format
+    """
+    match = re.fullmatch(r"\s*(\d+)\s*([SDWMY])\s*", duration)
+    if not match:
+        raise ValueError(f"Invalid duration: {duration}")
+    return int(match.group(1)), match.group(2)
+
+
+def duration_seconds(duration):
+    """Return the approximate calendar span of an IB duration string in seconds"""
+    count, unit = parse_duration(duration)
+    return count * DURATION_SECONDS[unit]
+
+
+class BarStore:
+
+    def __init__(self, directory):
+        """Initialize an on-disk store of historical bars
+
+        Bars are kept as one NumPy file per (contract, bar size, whatToShow)
+        and read back memory-mapped, with a small JSON sidecar recording how
+        far back the stored history is complete.
+
+        Args:
+            directory (str): Directory holding the bar files
+        """
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(contract, bar_size, what_to_show):
+        """Build the store key for a contract's bars
+
+        Args:
+            contract (Contract): Qualified IB contract object
+            bar_size (str): IB bar size setting, e.g. '1 min'
+            what_to_show (str): IB whatToShow setting, e.g. 'MIDPOINT'
+
+        Returns:
+            tuple: (conId, bar_size, what_to_show)
+        """
+        return (contract.conId, bar_size, what_to_show)
+
+    def _path(self, key, suffix):
+        con_id, bar_size, what_to_show = key
+        name = f"{con_id}_{bar_size.replace(' ', '')}_{what_to_show}"
+        return os.path.join(self.directory, name + suffix)
+
+    def load(self, key):
+        """Load stored bars for a key
+
+        Returns:
+            tuple: (bars, meta) where bars is a memory-mapped structured array
+                   and meta a dict, or (None, None) if nothing is stored
+        """
+        try:
+            bars = np.load(self._path(key, ".npy"), mmap_mode='r')
+            with open(self._path(key, ".json")) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None, None
+        return bars, meta
+
+    def save(self, key, bars, meta):
+        """Replace the stored bars and metadata for a key"""
+        for suffix, write in (
+            (".npy", lambda f: np.save(f, bars)),
+            (".json", lambda f: f.write(json.dumps(meta).encode())),
+        ):
+            path = self._path(key, suffix)
+            with open(path + ".tmp", "wb") as f:
+                write(f)
+            os.replace(path + ".tmp", path)
+
+    def append(self, key, bars, meta):
+        """Merge newer bars into the store
+
+        Stored bars at or after the first new bar are replaced, so a bar that
+        was still forming when it was stored gets overwritten.
+
+        Args:
+            key (tuple): Store key
+            bars (numpy.ndarray): New bars as a BAR_DTYPE array
+            meta (dict): Metadata to store alongside the merged bars
+
+        Returns:
+            numpy.ndarray: All stored bars after the merge
+        """
+        stored, _ = self.load(key)
+        if stored is not None:
+            # Copy out of the memory map so the file can be replaced
+            cutoff = bars['time'][0] if len(bars) else np.iinfo('i8').max
+            bars = np.concatenate([np.array(stored[stored['time'] < cutoff]), bars])
+            del stored
+        self.save(key, bars, meta)
+        return bars
+
+    @staticmethod
+    def covers(bars, meta, duration, now=None):
+        """Return True if stored bars can serve a duration with a delta fetch
+
+        The store is complete from ``meta['covered_from']`` onwards. It covers
+        a duration when that start is early enough and the gap to now is
+        shorter than the duration itself.
+
+        Args:
+            bars (numpy.ndarray): Stored BAR_DTYPE array
+            meta (dict): Stored metadata
+            duration (str): IB duration string
+            now (float, optional): Reference time as a POSIX timestamp
+
+        Returns:
+            bool: Whether the store covers the duration
+        """
+        if bars is None or not len(bars):
+            return False
+        now = time.time() if now is None else now
+        count, unit = parse_duration(duration)
+        if now - bars['time'][-1] > count * DURATION_SECONDS[unit]:
+            return False
+        if unit in SESSIONS_PER_UNIT:
+            covered = bars['time'][bars['time'] >= meta["covered_from"]] // 86400
+            return len(np.unique(covered)) >= count * SESSIONS_PER_UNIT[unit]
+        return meta["covered_from"] <= now - count * DURATION_SECONDS[unit]
+
+    @staticmethod
+    def to_array(df):
+        """Convert a DataFrame of IB bars to a BAR_DTYPE array"""
+        bars = np.zeros(len(df), dtype=BAR_DTYPE)
+        if not len(df):
+            return bars
+        bars['time'] = [to_epoch(value) for value in df['date']]
+        for name in BAR_DTYPE.names[1:]:
+            if name in df.columns:
+                bars[name] = df[name].to_numpy()
+        return bars
+
+    @staticmethod
+    def to_frame(bars, meta):
+        """Convert stored bars back to a DataFrame shaped like IB's bars
+
+        Args:
+            bars (numpy.ndarray): BAR_DTYPE array
+            meta (dict): Stored metadata with the original date format
+
+        Returns:
+            pandas.DataFrame: DataFrame with a 'date' column and OHLCV columns
+        """
+        df = pd.DataFrame(np.asarray(bars))
+        times = pd.to_datetime(df.pop('time'), unit='s', utc=True)
+        if meta.get("daily"):
+            dates = times.dt.date
+        elif meta.get("tz"):
+            dates = times.dt.tz_convert(meta["tz"])
+        else:
+            dates = times.dt.tz_convert(datetime.now().astimezone().tzinfo).dt.tz_localize(None)
+        df.insert(0, 'date', dates)
+        return df
+
+    @staticmethod
+    def select(bars, duration, now=None):
+        """Return the stored bars that fall inside an IB duration window
+
+        Args:
+            bars (numpy.ndarray): BAR_DTYPE array sorted by time
+            duration (str): IB duration string
+            now (float, optional): Reference time as a POSIX timestamp
+
+        Returns:
+            numpy.ndarray: The bars inside the window
+        """
+        if not len(bars):
+            return bars
+        count, unit = parse_duration(duration)
+        if unit in SESSIONS_PER_UNIT:
+            sessions = np.unique(bars['time'] // 86400)
+            first_session = sessions[-min(len(sessions), count * SESSIONS_PER_UNIT[unit])]
+            return bars[bars['time'] // 86400 >= first_session]
+        now = time.time() if now is None else now
+        return bars[bars['time'] >= now - count * DURATION_SECONDS[unit]]
+
+    @staticmethod
+    def delta_duration(since, now=None):
+        """Return the smallest IB duration string covering the time since ``since``"""
+        now = time.time() if now is None else now
+        elapsed = max(now - since, 60)
+        if elapsed <= 86400:
+            return f"{int(math.ceil(elapsed))} S"
+        return f"{int(math.ceil(elapsed / 86400))} D"
+
+
+def to_epoch(value):
+    """Convert an IB bar date (date, datetime or string) to a POSIX timestamp"""
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    if isinstance(value, date):
+        return calendar.timegm(value.timetuple())
+    return int(pd.Timestamp(value).timestamp())
+
+
+def bar_meta(df, duration, now=None):
+    """Build the metadata stored with a full fetch of bars
+
+    Args:
+        df (pandas.DataFrame): Bars as returned by IB for ``duration``
+        duration (str): IB duration string that was fetched
+        now (float, optional): Time of the fetch as a POSIX timestamp
+
+    Returns:
+        dict: Metadata with the coverage start and original date format
+    """
+    now = time.time() if now is None else now
+    count, unit = parse_duration(duration)
+    first = df['date'].iloc[0] if len(df) else None
+    tz = getattr(first, 'tzinfo', None)
+    if unit in SESSIONS_PER_UNIT and first is not None:
+        # Session based durations are complete from the first returned bar
+        covered_from = to_epoch(first)
+    else:
+        covered_from = now - count * DURATION_SECONDS[unit]
+    return {
+        "covered_from": covered_from,
+        "daily": isinstance(first, date) and not isinstance(first, datetime),
+        "tz": str(tz) if tz is not None else None,
+    }
@@ -0,0 +1,278 @@
+import csv
+import io
+import time
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
+import ttkbootstrap as ttk
+
+from src.lifecycle import Lifecycle
+from src.order_blotter import format_ms
+from src.orders import throughput
+
+
+COLUMNS = ("line", "contract", "side", "quantity", "status", "filled", "avg_price", "ack_ms", "fill_ms")
+
+SIDES = {"BUY": "BUY", "B": "BUY", "SELL": "SELL", "S": "SELL"}
+
+TICKER_TYPES = {"STOCK": "Stock", "STK": "Stock", "FUTURE": "Future", "FUT": "Future"}
+
+# Column names recognised in a header row, for the symbol, side and quantity columns
+HEADERS = ({"SYMBOL", "TICKER", "CONTRACT"}, {"SIDE", "ACTION"}, {"QUANTITY", "QTY", "SHARES", "SIZE"})
+
+
+def parse_basket(text):
+    """Parse basket lines from CSV or pasted spreadsheet text
+
+    Each row holds symbol, side and quantity, optionally followed by the
+    ticker type (Stock or Future, default Stock). Commas, tabs and
+    semicolons are accepted as separators. A first row naming the columns,
+    such as ``Symbol,Side,Quantity``, is skipped as a header.
+
+    Args:
+        text (str): Basket text
+
+    Returns:
+        list: (ticker_type, symbol, action, quantity) tuples
+
+    Raises:
+        ValueError: If a row is malformed; the message names the row
+    """
+    rows = [line for line in text.splitlines() if line.strip()]
+    if not rows:
+        raise ValueError("The basket is empty.")
+    try:
+        dialect = csv.Sniffer().sniff(rows[0], delimiters=",\t;")
+    except csv.Error:
+        dialect = csv.excel
+    lines = []
+    for number, row in enumerate(csv.reader(io.StringIO("\n".join(rows)), dialect), start=1):
+        fields = [field.strip() for field in row]
+        if number == 1 and len(fields) >= 3 and all(field.upper() in names for field, names in zip(fields, HEADERS)):
+            continue
+        if len(fields) < 3:
+            raise ValueError(f"Row {number}: expected symbol, side and quantity.")
+        symbol, side, quantity = fields[0].upper(), fields[1].upper(), fields[2]
+        ticker_type = TICKER_TYPES.get(fields[3].upper()) if len(fields) > 3 and fields[3] else "Stock"
+        if not symbol.isalnum():
+            raise ValueError(f"Row {number}: ticker symbol must be alphanumeric.")
+        if side not in SIDES:
+            raise ValueError(f"Row {number}: side must be BUY or SELL.")
+        if not quantity.isdigit() or int(quantity) <= 0:
+            raise ValueError(f"Row {number}: quantity must be a positive integer.")
+        if ticker_type is None:
+            raise ValueError(f"Row {number}: type must be Stock or Future.")
+        lines.append((ticker_type, symbol, SIDES[side], int(quantity)))
+    if not lines:
+        raise ValueError("The basket is empty.")
+    return lines
+
+
+def confirmation_text(lines, contracts):
+    """Return the aggregate confirmation message for a qualified basket"""
+    legs = [line for line, contract in zip(lines, contracts) if contract is not None]
+    buys = [quantity for _, _, action, quantity in legs if action == "BUY"]
+    sells = [quantity for _, _, action, quantity in legs if action == "SELL"]
+    text = (f"Place {len(legs)} market orders?\n"
+            f"BUY: {len(buys)} orders, {sum(buys)} shares/contracts\n"
+            f"SELL: {len(sells)} orders, {sum(sells)} shares/contracts")
+    skipped = [symbol for (_, symbol, _, _), contract in zip(lines, contracts) if contract is None]
+    if skipped:
+        text += f"\n\nSkipped, failed to qualify: {', '.join(skipped)}"
+    return text
+
+
+class Basket:
+
+    def __init__(self, tree, summary_label, ibkr_client):
+        """Initialize a progress table for a basket of orders
+
+        Lines are qualified in one batch, submitted together with
+        ``IBKRClient.place_basket_async`` and followed through their status
+        events, with the basket's throughput in the summary. Results that
+        arrive after the Treeview is destroyed are ignored.
+
+        Args:
+            tree (ttk.Treeview): Treeview with the COLUMNS columns
+            summary_label (ttk.Label): Label showing progress and throughput
+            ibkr_client (IBKRClient): Instance of IBKRClient for API interactions
+        """
+        self.tree = tree
+        self.summary_label = summary_label
+        self.ibkr_client = ibkr_client
+        self.lines = []
+        self.contracts = []
+        self.records = {}
+        self.life = Lifecycle(tree, "basket")
+        self.life.add(ibkr_client.watch_orders(self.life.guard(self._on_order)), "listener")
+
+    def load(self, lines, on_qualified):
+        """Show the lines and qualify their contracts
+
+        Args:
+            lines (list): Tuples from ``parse_basket``
+            on_qualified (callable): Called on the Tk thread with the
+                contracts, None where qualification failed
+        """
+        self.lines, self.contracts, self.records = lines, [], {}
+        self.tree.delete(*self.tree.get_children())
+        for index, (ticker_type, symbol, action, quantity) in enumerate(lines):
+            self.tree.insert("", "end", iid=str(index),
+                             values=(index + 1, symbol, action, quantity, "Qualifying", "", "", "", ""))
+        self.summary_label.config(text=f"Qualifying {len(lines)} contracts...")
+
+        def qualified(contracts):
+            self.contracts = contracts
+            for index, contract in enumerate(contracts):
+                label = (contract.localSymbol or contract.symbol) if contract else self.lines[index][1]
+                self.tree.set(str(index), "contract", label)
+                self.tree.set(str(index), "status", "Ready" if contract else "Not found")
+            ready = sum(contract is not None for contract in contracts)
+            self.summary_label.config(text=f"{ready} of {len(contracts)} lines ready")
+            on_qualified(contracts)
+
+        def failed(error):
+            self.contracts = [None] * len(lines)
+            for index in range(len(lines)):
+                self.tree.set(str(index), "status", "Failed")
+            self.summary_label.config(text=f"Qualification failed: {error}")
+            on_qualified(self.contracts)
+
+        self.ibkr_client.when_done(
+            self.ibkr_client.get_contracts_async([line[0] for line in lines], [line[1] for line in lines]),
+            self.life.guard(qualified), self.life.guard(failed))
+
+    def submit(self, on_failed):
+        """Send every qualified line at once
+
+        Args:
+            on_failed (callable): Called on the Tk thread with the exception
+                if the basket could not be sent
+        """
+        indexes = [i for i, contract in enumerate(self.contracts) if contract is not None]
+        legs = [(self.contracts[i], self.lines[i][2], self.lines[i][3]) for i in indexes]
+
+        def placed(records):
+            for index, record in zip(indexes, records):
+                self.records[record.order_id] = (index, record)
+                self._show(index, record)
+            self._update_summary()
+
+        def failed(error):
+            for index in indexes:
+                self.tree.set(str(index), "status", "Failed")
+            on_failed(error)
+
+        for index in indexes:
+            self.tree.set(str(index), "status", "Sending")
+        self.ibkr_client.when_done(self.ibkr_client.place_basket_async(legs, time.perf_counter()),
+                                   self.life.guard(placed), self.life.guard(failed))
+
+    def stop(self):
+        """Stop following the orders and ignore results still in flight"""
+        self.life.close()
+
+    def _on_order(self, record):
+        entry = self.records.get(record.order_id)
+        if entry is not None and entry[1] is record:
+            self._show(entry[0], record)
+            self._update_summary()
+
+    def _show(self, index, record):
+        status = record.trade.orderStatus
+        values = dict(
+            status=record.status,
+            filled=f"{status.filled:g}",
+            avg_price=f"${status.avgFillPrice:.2f}" if status.filled else "",
+            ack_ms=format_ms(record.ack_latency),
+            fill_ms=format_ms(record.fill_latency)
+        )
+        for column, value in values.items():
+            self.tree.set(str(index), column, value)
+
+    def _update_summary(self):
+        stats = throughput([record for _, record in self.records.values()])
+        text = f"{stats['acked']}/{stats['orders']} acknowledged · {stats['filled']} filled"
+        for key, label in (("sent_per_second", "sent"), ("acked_per_second", "acked"),
+                           ("filled_per_second", "filled")):
+            if stats[key] is not None:
+                text += f" · {stats[key]:.0f} orders/s {label}"
+        self.summary_label.config(text=text)
+
+
+def create_basket_window(parent, ibkr_client):
+    """Create a window for loading and submitting a basket of orders
+
+    Args:
+        parent (tk.Widget): Parent widget (typically the main application window).
+        ibkr_client (IBKRClient): Instance of IBKRClient for API interactions.
+
+    Returns:
+        ttk.Toplevel: The basket window.
+    """
+    window = ttk.Toplevel(parent)
+    window.title("Basket Orders")
+    window.geometry("900x600")
+
+    button_frame = ttk.Frame(window, padding=10)
+    button_frame.pack(fill="x")
+
+    tree_frame = ttk.Frame(window, padding=(10, 0))
+    tree_frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(tree_frame, columns=COLUMNS, show="headings", bootstyle="table")
+    for col in COLUMNS:
+        tree.heading(col, text=col.replace("_", " ").title().replace("Ms", "(ms)"))
+        tree.column(col, anchor="center", width=95)
+    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(side="left", fill="both", expand=True)
+
+    summary_label = ttk.Label(window, text="Load a CSV file or paste symbol, side, quantity rows.",
+                              font=("Helvetica", 10), bootstyle="secondary")
+    summary_label.pack(fill="x", padx=10, pady=10)
+
+    basket = Basket(tree, summary_label, ibkr_client)
+
+    def load(text):
+        try:
+            lines = parse_basket(text)
+        except ValueError as e:
+            messagebox.showerror("Invalid Basket", str(e), parent=window)
+            return
+        submit_btn.config(state="disabled")
+        basket.load(lines, lambda contracts: submit_btn.config(
+            state="normal" if any(contracts) else "disabled"))
+
+    def load_csv():
+        path = filedialog.askopenfilename(parent=window, filetypes=[("CSV files", "*.csv"), ("All files", "*.*")])
+        if path:
+            with open(path, newline="") as f:
+                load(f.read())
+
+    def paste():
+        try:
+            load(window.clipboard_get())
+        except tk.TclError:
+            messagebox.showerror("Invalid Basket", "The clipboard is empty.", parent=window)
+
+    def submit():
+        if not messagebox.askyesno("Confirm Basket", confirmation_text(basket.lines, basket.contracts),
+                                   parent=window):
+            return
+        submit_btn.config(state="disabled")
+        basket.submit(lambda error: messagebox.showerror("Order Error", f"Failed to place basket: {error}",
+                                                         parent=window))
+
+    ttk.Button(button_frame, text="Load CSV...", command=load_csv).pack(side="left")
+    ttk.Button(button_frame, text="Paste", command=paste).pack(side="left", padx=5)
+    submit_btn = ttk.Button(button_frame, text="Submit Basket", command=submit, bootstyle="success",
+                            state="disabled")
+    submit_btn.pack(side="right")
+
+    def on_close():
+        basket.stop()
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    return window
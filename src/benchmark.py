@@ -0,0 +1,648 @@
+"""Headless benchmarks of the client and UI hot paths against a fake gateway
+
+Run with ``python -m src.benchmark`` from the repository root. Results are
+written as JSON so runs can be compared to catch regressions. Without a
+display, or with ``--no-ui``, the window benchmarks run on ``FakeTk``; only
+time to first paint needs a display and is reported as skipped without one.
+"""
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tkinter as tk
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from eventkit import Event
+
+from src.alerts import AlertEngine, AlertRule
+from src.fake_gateway import FakeIB
+from src.fake_tk import FakeTk
+from src.indicators import IndicatorEngine
+from src.ibkr_client import IBKRClient
+from src.scanner import align_bars, scan_indicators
+from src.tick_buffer import TickBuffer
+from src.lifecycle import open_lifecycles
+
+
+POSITION_COUNTS = (10, 100, 1000)
+
+HISTORY_DURATIONS = ("1 D", "5 D", "1 M")
+
+SCANNER_SHAPES = ((100, 390), (1000, 390))
+
+# Popups opened and closed by the stress test, after some warm-up ones
+STRESS_POPUPS = 500
+STRESS_WARMUP = 50
+
+# Resident memory the stress test may gain over its popups, in MB
+STRESS_RSS_LIMIT = 20
+
+# Ticks appended per sample, and rows of sparklines and stats rendered per sample
+TICK_APPENDS = 10000
+TICK_ROWS = 100
+
+# Seconds the tick latency benchmark waits for its last ticks to be rendered
+TICK_TIMEOUT = 5.0
+
+# Indicator periods and bars checked against the pandas formulas
+INDICATOR_CHECK_PERIODS = (2, 14, 50)
+INDICATOR_CHECK_BARS = 500
+
+# Alert rules spread over ALERT_SYMBOLS symbols, of which ALERT_BATCH tick between evaluations
+ALERT_RULE_COUNTS = (1000, 10000, 100000)
+ALERT_SYMBOLS = 500
+ALERT_BATCH = 100
+
+# Modules that must not be loaded before the main window is drawn
+DEFERRED_MODULES = ("pandas", "numpy", "ib_insync", "lightweight_charts")
+
+# Run in a fresh interpreter so every import is cold
+STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import src.main
+result = {"import": time.perf_counter() - start,
+          "loaded": [m for m in %r if m in sys.modules]}
+try:
+    app = src.main.create_app(connect=False) if sys.argv[1:] == ["ui"] else None
+except Exception as e:
+    app = None
+    result["error"] = str(e)
+if app is not None:
+    deadline = time.perf_counter() + 10
+    while app.first_paint is None and time.perf_counter() < deadline:
+        app.update()
+    if app.first_paint is not None:
+        result["first_paint"] = app.first_paint + src.main.PROCESS_START - start
+    app.destroy()
+print(json.dumps(result))
+""" % (DEFERRED_MODULES,)
+
+
+def summarize(name, samples, **params):
+    """Reduce timing samples in seconds to a result record in milliseconds
+
+    Args:
+        name (str): Benchmark name
+        samples (list): Measured durations in seconds
+        **params: Parameters the benchmark ran with
+
+    Returns:
+        dict: Result with 'name', 'params', 'unit', 'samples' and summary statistics
+    """
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "name": name,
+        "params": params,
+        "unit": "ms",
+        "samples": len(ms),
+        "min": ms[0],
+        "median": statistics.median(ms),
+        "mean": statistics.fmean(ms),
+        "p95": ms[min(len(ms) - 1, int(round(0.95 * (len(ms) - 1))))],
+        "max": ms[-1]
+    }
+
+
+def skipped(name, reason, **params):
+    """Return the record of a benchmark that could not run"""
+    return {"name": name, "params": params, "skipped": reason}
+
+
+def timed(fn, repeat, warmup=1):
+    """Call ``fn`` and return the durations of the measured calls in seconds"""
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def pandas_indicators(df, sma_period=14, ema_period=14, rsi_period=14):
+    """Return SMA, EMA, VWAP and RSI for every bar with the original pandas formulas
+
+    This is the implementation ``IndicatorEngine`` replaced and must keep
+    matching, with the simple RSI smoothing.
+    """
+    delta = df['close'].diff()
+    gain = delta.where(delta > 0, 0).rolling(window=rsi_period, min_periods=1).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period, min_periods=1).mean()
+    return pd.DataFrame({
+        'SMA': df['close'].rolling(window=sma_period, min_periods=1).mean(),
+        'EMA': df['close'].ewm(span=ema_period, adjust=False).mean(),
+        'VWAP': (df['close'] * df['volume']).cumsum() / df['volume'].cumsum(),
+        'RSI': 100 - (100 / (1 + gain / loss))
+    })
+
+
+def check_indicators(periods=INDICATOR_CHECK_PERIODS, bars=INDICATOR_CHECK_BARS):
+    """Compare ``IndicatorEngine`` bar by bar with the pandas formulas
+
+    The series starts with zero volume and has flat stretches, so undefined
+    VWAP and RSI values are compared too. A mismatch fails the run.
+    """
+    rng = np.random.default_rng(1)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, bars))
+    closes[100:120] = closes[99]
+    volumes = rng.integers(0, 100, bars) * 100.0
+    volumes[:3] = 0
+    df = pd.DataFrame({'close': closes, 'volume': volumes})
+    worst = 0.0
+    for period in periods:
+        expected = pandas_indicators(df, period, period, period)
+        engine = IndicatorEngine(period, period, period)
+        rows = [engine.update(close, volume) for close, volume in zip(closes.tolist(), volumes.tolist())]
+        actual = pd.DataFrame(rows)[expected.columns]
+        for name in expected.columns:
+            want, got = expected[name].to_numpy(), actual[name].to_numpy()
+            if not np.array_equal(np.isnan(want), np.isnan(got)):
+                worst = math.inf
+                continue
+            defined = ~np.isnan(want)
+            worst = max(worst, float(np.max(np.abs(want[defined] - got[defined]), initial=0.0)))
+    return {
+        "name": "indicator_parity",
+        "params": {"periods": list(periods), "bars": bars},
+        "max_error": worst,
+        "passed": worst <= 1e-9
+    }
+
+
+def bench_positions(repeat, latency, counts=POSITION_COUNTS):
+    """Time ``get_positions`` for increasing numbers of held positions"""
+    results = []
+    for count in counts:
+        client = IBKRClient(ib=FakeIB(positions=count, latency=latency))
+        results.append(summarize(
+            "get_positions", timed(client.get_positions, repeat), positions=count, latency=latency))
+        client.disconnect()
+    return results
+
+
+def bench_history(repeat, latency, durations=HISTORY_DURATIONS):
+    """Time ``get_historical_data`` followed by ``calculate_indicators``
+
+    Each duration is measured straight from the gateway and again with the
+    local bar store, where only the delta since the last request is fetched.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for store in (None, directory):
+            client = IBKRClient(ib=FakeIB(latency=latency), bar_store_dir=store)
+            contract = client.get_contract("Stock", "AAPL")
+            for duration in durations:
+                def run():
+                    client.calculate_indicators(client.get_historical_data(contract, duration=duration))
+                results.append(summarize(
+                    "historical_data_and_indicators", timed(run, repeat),
+                    duration=duration, bar_store=store is not None, latency=latency))
+            client.disconnect()
+    return results
+
+
+def bench_scanner(repeat, shapes=SCANNER_SHAPES):
+    """Time aligning and scanning the bars of many symbols at once"""
+    results = []
+    rng = np.random.default_rng(1)
+    for symbols, bars in shapes:
+        dates = pd.date_range("2024-01-02 14:30", periods=bars, freq="min", tz="UTC")
+        closes = 100 + np.cumsum(rng.normal(0, 0.05, (symbols, bars)), axis=1)
+        volumes = rng.integers(1, 100, (symbols, bars)) * 100.0
+        frames = {
+            f"S{i:04d}": pd.DataFrame({'date': dates, 'close': closes[i], 'volume': volumes[i]})
+            for i in range(symbols)
+        }
+
+        def run():
+            scan_indicators(*align_bars(frames)[2:])
+
+        results.append(summarize("scanner", timed(run, repeat), symbols=symbols, bars=bars))
+    return results
+
+
+def bench_tick_buffer(repeat, appends=TICK_APPENDS, rows=TICK_ROWS):
+    """Time appending ticks to a ring buffer and rendering rows from full buffers"""
+    rng = np.random.default_rng(1)
+    prices = (100 + np.cumsum(rng.normal(0, 0.01, appends))).tolist()
+    buffers = [TickBuffer() for _ in range(rows)]
+    now = time.time()
+    for buffer in buffers:
+        for i in range(buffer.capacity):
+            buffer.append(now - buffer.capacity + i, prices[i] - 0.01, prices[i] + 0.01, prices[i], 100)
+
+    def append():
+        buffer = TickBuffer()
+        for price in prices:
+            buffer.append(now, price - 0.01, price + 0.01, price, 100)
+
+    def render():
+        for buffer in buffers:
+            buffer.sparkline()
+            buffer.stats(now=now)
+
+    return [
+        summarize("tick_append", timed(append, repeat), ticks=appends),
+        summarize("tick_render", timed(render, repeat), rows=rows, capacity=buffers[0].capacity)
+    ]
+
+
+def bench_alerts(repeat, rule_counts=ALERT_RULE_COUNTS, symbols=ALERT_SYMBOLS, batch=ALERT_BATCH):
+    """Time evaluating a batch of symbol updates against growing rule sets
+
+    Rules mix price levels, price crossings and price/SMA crossings, so the
+    evaluation cost should stay nearly flat as rules are added.
+    """
+    results = []
+    rng = np.random.default_rng(1)
+    keys = [("Stock", f"S{i:04d}") for i in range(symbols)]
+    ops = (">", "<", "crosses", "crosses_above", "crosses_below")
+    for count in rule_counts:
+        rules = []
+        for i in range(count):
+            ticker_type, symbol = keys[rng.integers(symbols)]
+            op = ops[i % len(ops)]
+            if i % 4 == 3:
+                rules.append(AlertRule(symbol, "last", op, other="SMA14"))
+            else:
+                rules.append(AlertRule(symbol, "last", op, float(rng.uniform(50, 150))))
+        engine = AlertEngine(rules, cooldown=0)
+        prices = np.full(symbols, 100.0)
+        for key, price in zip(keys, prices):
+            engine.update(key, {"last": price, "SMA14": price - 5})
+        engine.evaluate()
+        fired = []
+
+        def run():
+            rows = rng.choice(symbols, batch, replace=False)
+            prices[rows] += rng.normal(0, 0.05, batch)
+            for row in rows.tolist():
+                engine.update(keys[row], {"last": prices[row], "SMA14": 95.0})
+            fired.append(len(engine.evaluate()))
+
+        result = summarize("alert_evaluate", timed(run, repeat * 20), rules=count, symbols=symbols, batch=batch)
+        result["fired_per_batch"] = statistics.fmean(fired)
+        results.append(result)
+    return results
+
+
+def bench_startup(repeat, ui=True):
+    """Time a cold import of the main module and the first paint of its window
+
+    Each sample starts a new interpreter. The first paint is measured against
+    ``FIRST_PAINT_TARGET`` and needs a display.
+    """
+    from src.main import FIRST_PAINT_TARGET
+
+    probes = []
+    for _ in range(repeat):
+        args = [sys.executable, "-c", STARTUP_PROBE] + (["ui"] if ui else [])
+        output = subprocess.run(args, capture_output=True, text=True, check=True)
+        probes.append(json.loads(output.stdout))
+    result = summarize("startup_import", [p["import"] for p in probes])
+    result["deferred_modules_loaded"] = sorted({m for p in probes for m in p["loaded"]})
+    paints = [p["first_paint"] for p in probes if "first_paint" in p]
+    if len(paints) < len(probes):
+        reason = "no display" if ui else "disabled"
+        return [result, skipped("first_paint", reason, target_ms=FIRST_PAINT_TARGET * 1000)]
+    paint = summarize("first_paint", paints, target_ms=FIRST_PAINT_TARGET * 1000)
+    paint["within_target"] = paint["p95"] <= FIRST_PAINT_TARGET * 1000
+    return [result, paint]
+
+
+def create_root():
+    """Return a hidden Tk root window, or None when no display is available"""
+    try:
+        import ttkbootstrap as ttk
+        root = ttk.Window()
+    except tk.TclError:
+        return None
+    root.withdraw()
+    return root
+
+
+def check_popup(timeout=2.0):
+    """Open a popup on a headless root, chart it and stream ticks into it
+
+    Fails when opening, charting, ticking or closing raises, when an error
+    dialog is shown, when live bars never reach the chart, or when the
+    popup's lifecycle stays open after it is closed.
+
+    Returns:
+        dict: Result record with 'chart_updates', 'errors' and 'passed'
+    """
+    import traceback
+    from src.popup_window import create_popup_window
+
+    root = FakeTk()
+    fake = FakeIB()
+    client = IBKRClient(ib=fake)
+    errors = []
+    with root.installed():
+        try:
+            popup = create_popup_window(root, client, "Stock", "AAPL")
+            popup.find(text="View Chart").invoke()
+            deadline = time.monotonic() + timeout
+            while not root.chart.updates and time.monotonic() < deadline:
+                fake.tick()
+                root.update()
+                time.sleep(0.02)
+            close_window(popup)
+            if popup.lifecycle in open_lifecycles():
+                errors.append("popup lifecycle still open after close")
+        except Exception:
+            errors.append(traceback.format_exc())
+    client.disconnect()
+    errors += [f"{kind} dialog: {title}: {message}" for kind, title, message in root.messages]
+    if not root.chart.updates:
+        errors.append("no live bar reached the chart")
+    return {
+        "name": "popup_check",
+        "params": {"toolkit": "fake"},
+        "chart_updates": root.chart.updates,
+        "errors": errors,
+        "passed": not errors
+    }
+
+
+def close_window(window):
+    """Close a window through its WM_DELETE_WINDOW handler"""
+    handler = window.protocol("WM_DELETE_WINDOW")
+    if handler:
+        window.tk.call(handler)
+    elif window.winfo_exists():
+        window.destroy()
+
+
+class HandlerErrors(logging.Handler):
+
+    def __init__(self):
+        """Initialize a log handler collecting the exceptions raised by event handlers
+
+        Event handlers run inside ``Event.emit``, which logs their exceptions
+        instead of raising them; collecting them lets a broken tick handler
+        fail the benchmark that triggered it.
+        """
+        super().__init__(logging.ERROR)
+        self.errors = []
+
+    def emit(self, record):
+        self.errors.append(repr(record.exc_info[1]) if record.exc_info else record.getMessage())
+
+    def __enter__(self):
+        Event.logger.addHandler(self)
+        return self
+
+    def __exit__(self, *exc):
+        Event.logger.removeHandler(self)
+
+
+def checked(name, bench, root, *args):
+    """Run a window benchmark and fail it on exceptions or error dialogs
+
+    Returns:
+        dict: The benchmark's result record with 'errors' and 'passed' added
+    """
+    import traceback
+
+    shown = len(getattr(root, "messages", ()))
+    with HandlerErrors() as handler:
+        try:
+            result = bench(root, *args)
+        except Exception:
+            result = {"name": name, "params": {}, "passed": False}
+            handler.errors.append(traceback.format_exc())
+    errors = handler.errors + [f"{kind} dialog: {title}: {message}"
+                               for kind, title, message in getattr(root, "messages", ())[shown:]]
+    result["errors"] = errors
+    result["passed"] = result.get("passed", True) and not errors
+    return result
+
+
+def bench_popup_open(root, repeat, latency):
+    """Time ``create_popup_window`` until the window is laid out"""
+    from src.popup_window import create_popup_window
+
+    client = IBKRClient(ib=FakeIB(latency=latency))
+    client.get_contract("Stock", "AAPL")
+    samples = []
+    for _ in range(repeat + 1):
+        start = time.perf_counter()
+        popup = create_popup_window(root, client, "Stock", "AAPL")
+        popup.update_idletasks()
+        samples.append(time.perf_counter() - start)
+        close_window(popup)
+        root.update()
+    client.disconnect()
+    return summarize("popup_open", samples[1:], latency=latency)
+
+
+def rss_bytes():
+    """Return the resident memory of this process, or None if unknown"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def bench_popup_stress(root, count=STRESS_POPUPS, warmup=STRESS_WARMUP, rss_limit=STRESS_RSS_LIMIT):
+    """Open and close many popups and check that nothing they held survives
+
+    Each popup is drawn, receives a few ticks and is closed through its
+    window manager handler. Afterwards no subscription may be active, no
+    listener, window lifecycle or Tk timer may remain, and resident memory
+    may not have grown by more than ``rss_limit`` MB over the warm-up.
+
+    Returns:
+        dict: Result record with the leak counters and 'passed'
+    """
+    from src.popup_window import create_popup_window
+
+    fake = FakeIB()
+    client = IBKRClient(ib=fake)
+    client.get_contract("Stock", "AAPL")
+
+    def handlers():
+        return len(fake.positionEvent) + len(fake.updatePortfolioEvent) + client.orders.stats()["listeners"]
+
+    def cycle():
+        popup = create_popup_window(root, client, "Stock", "AAPL")
+        popup.update_idletasks()
+        for _ in range(3):
+            fake.tick()
+        root.update()
+        close_window(popup)
+        root.update()
+
+    for _ in range(warmup):
+        cycle()
+    gc.collect()
+    baseline_rss = rss_bytes()
+    baseline_timers = len(root.tk.splitlist(root.tk.call("after", "info")))
+    baseline_handlers = handlers()
+    samples = []
+    for _ in range(count):
+        start = time.perf_counter()
+        cycle()
+        samples.append(time.perf_counter() - start)
+    gc.collect()
+    rss_growth = (rss_bytes() - baseline_rss) / 2 ** 20 if baseline_rss is not None else None
+    subscriptions = client.subscriptions.stats()
+    leaks = {
+        "subscriptions": subscriptions["active"],
+        "stream_listeners": subscriptions["listeners"],
+        "handlers": handlers() - baseline_handlers,
+        "lifecycles": len(open_lifecycles()),
+        "timers": len(root.tk.splitlist(root.tk.call("after", "info"))) - baseline_timers
+    }
+    client.disconnect()
+    result = summarize("popup_stress", samples, popups=count, rss_limit_mb=rss_limit)
+    result["rss_growth_mb"] = rss_growth
+    result["leaks"] = leaks
+    result["passed"] = not any(leaks.values()) and (rss_growth is None or rss_growth <= rss_limit)
+    return result
+
+
+def bench_tick_latency(root, ticks, rate, timeout=TICK_TIMEOUT):
+    """Time from a gateway tick to the repainted quote labels of a popup
+
+    Ticks arrive at ``rate`` per second while the Tk loop runs; each sample is
+    the delay until the frame that rendered the tick's last price. Fails when
+    ticks are still unrendered ``timeout`` seconds after the last one was sent.
+    """
+    from src.popup_window import create_popup_window
+
+    fake = FakeIB()
+    client = IBKRClient(ib=fake)
+    popup = create_popup_window(root, client, "Stock", "AAPL")
+    render = popup.render_scheduler
+    pending = []
+    samples = []
+
+    def on_frame(changed):
+        if "last" in changed and pending:
+            now = time.perf_counter()
+            samples.extend(now - sent for sent in pending)
+            pending.clear()
+
+    render.on_render(on_frame)
+    root.update()
+    interval = 1.0 / rate
+    next_tick = time.perf_counter()
+    sent = 0
+    deadline = None
+    while sent < ticks or pending:
+        now = time.perf_counter()
+        if sent < ticks and now >= next_tick:
+            pending.append(now)
+            fake.tick()
+            sent += 1
+            next_tick += interval
+        elif sent == ticks:
+            deadline = deadline or now + timeout
+            if now > deadline:
+                break
+        root.update()
+    stats = render.stats()
+    close_window(popup)
+    root.update()
+    client.disconnect()
+    result = summarize("tick_to_label", samples, rate=rate, ticks=ticks)
+    result["frames_rendered"] = stats["frames_rendered"]
+    result["ticks_per_frame"] = stats["ticks_per_frame"]
+    result["unrendered"] = len(pending)
+    result["passed"] = not pending
+    return result
+
+
+def run_benchmarks(repeat=5, latency=0.0, ticks=200, tick_rate=100, ui=True, stress=STRESS_POPUPS):
+    """Run every benchmark and return the results
+
+    Args:
+        repeat (int): Measured runs per benchmark
+        latency (float): Simulated gateway round trip in seconds
+        ticks (int): Ticks sent for the tick-to-label benchmark
+        tick_rate (float): Ticks per second for the tick-to-label benchmark
+        ui (bool): Use a real Tk display when one is available; without one
+            the window benchmarks run on a headless FakeTk
+        stress (int): Popups opened and closed by the leak stress test; 0
+            skips it
+
+    Returns:
+        dict: Run metadata and a list of result records
+    """
+    results = [check_indicators(), check_popup()]
+    results += bench_positions(repeat, latency) + bench_history(repeat, latency) + bench_scanner(repeat)
+    results += bench_tick_buffer(repeat) + bench_alerts(repeat)
+    results += bench_startup(repeat, ui)
+    root = create_root() if ui else None
+    toolkit = "tk" if root is not None else "fake"
+    if root is None:
+        root = FakeTk()
+    window_results = []
+    try:
+        with root.installed() if toolkit == "fake" else contextlib.nullcontext():
+            window_results.append(checked("popup_open", bench_popup_open, root, repeat, latency))
+            window_results.append(checked("tick_to_label", bench_tick_latency, root, ticks, tick_rate))
+            if stress:
+                window_results.append(checked("popup_stress", bench_popup_stress, root, stress))
+            else:
+                window_results.append(skipped("popup_stress", "disabled", popups=stress))
+    finally:
+        root.destroy()
+    for result in window_results:
+        result["params"]["toolkit"] = toolkit
+    results += window_results
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark IBKR-UI against a fake gateway")
+    parser.add_argument("--repeat", type=int, default=5, help="measured runs per benchmark")
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated round trip in seconds")
+    parser.add_argument("--ticks", type=int, default=200, help="ticks sent for the latency benchmark")
+    parser.add_argument("--tick-rate", type=float, default=100, help="ticks per second")
+    parser.add_argument("--no-ui", action="store_true", help="run the window benchmarks on a headless FakeTk even with a display")
+    parser.add_argument("--stress", type=int, default=STRESS_POPUPS,
+                        help="popups opened and closed by the leak stress test, 0 to skip")
+    parser.add_argument("--output", help="write the JSON results to a file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.repeat, args.latency, args.ticks, args.tick_rate, not args.no_ui, args.stress)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+    # A failed leak, indicator parity or popup check fails the run
+    if any(result.get("passed") is False for result in report["results"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
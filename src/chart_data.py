@@ -0,0 +1,188 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.bar_store import DURATION_SECONDS, SESSIONS_PER_UNIT, parse_duration
+from src.live_bars import BAR_SIZE_SECONDS
+
+
+# Maximum number of points sent to the chart in one ``set``
+CHART_POINT_BUDGET = 2000
+
+# Share of the budget kept at full resolution for the most recent bars
+FULL_RESOLUTION_SHARE = 0.6
+
+# Bar sizes the chart can pick from, finest first
+CHART_BAR_SIZES = ("1 min", "5 mins", "15 mins", "30 mins", "1 hour", "1 day")
+
+# Regular trading seconds per calendar second for 'M' and 'Y' durations
+TRADING_FRACTION = (5 / 7) * (6.5 / 24)
+
+
+def estimate_bars(duration, bar_size):
+    """Estimate how many regular-hours bars IB returns for a request
+
+    Args:
+        duration (str): IB duration string, e.g. '3 M'
+        bar_size (str): IB bar size setting, e.g. '5 mins'
+
+    Returns:
+        int: Approximate number of bars
+    """
+    count, unit = parse_duration(duration)
+    bar_seconds = BAR_SIZE_SECONDS[bar_size]
+    if bar_seconds >= 86400:
+        sessions = count * SESSIONS_PER_UNIT[unit] if unit in SESSIONS_PER_UNIT \
+            else count * DURATION_SECONDS[unit] * 5 / 7 / 86400
+        return math.ceil(sessions)
+    if unit in SESSIONS_PER_UNIT:
+        seconds = count * SESSIONS_PER_UNIT[unit] * 6.5 * 3600
+    else:
+        seconds = count * DURATION_SECONDS[unit] * TRADING_FRACTION
+    return math.ceil(seconds / bar_seconds)
+
+
+def bar_size_for(duration, budget=CHART_POINT_BUDGET):
+    """Return the finest bar size that keeps a duration within the point budget"""
+    for bar_size in CHART_BAR_SIZES:
+        if estimate_bars(duration, bar_size) <= budget:
+            return bar_size
+    return CHART_BAR_SIZES[-1]
+
+
+def chart_times(dates):
+    """Convert IB bar dates to the naive datetimes the chart expects
+
+    Timezone-aware dates are converted to UTC; naive dates are kept as they
+    are, like the string times sent for live updates.
+
+    Args:
+        dates (pandas.Series): 'date' column of IB bars
+
+    Returns:
+        numpy.ndarray: datetime64[ns] values
+    """
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates, utc=getattr(dates.iloc[0], "tzinfo", None) is not None)
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_convert("UTC").dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[ns]")
+
+
+def downsample_candles(times, opens, highs, lows, closes, volumes, points):
+    """Merge consecutive candles so at most ``points`` remain
+
+    Each merged candle keeps the first open, the highest high, the lowest
+    low, the last close and the total volume, so no price extreme is lost.
+
+    Returns:
+        tuple: (times, opens, highs, lows, closes, volumes) arrays
+    """
+    n = len(times)
+    if n <= points or points < 1:
+        return times, opens, highs, lows, closes, volumes
+    size = math.ceil(n / points)
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+    return (times[starts], opens[starts],
+            np.maximum.reduceat(highs, starts), np.minimum.reduceat(lows, starts),
+            closes[ends], np.add.reduceat(volumes, starts))
+
+
+def lttb(times, values, points):
+    """Downsample a line with the Largest-Triangle-Three-Buckets algorithm
+
+    The first and last points are kept; from each bucket in between the
+    point forming the largest triangle with its neighbours is chosen, which
+    preserves the visual shape of the line.
+
+    Args:
+        times (numpy.ndarray): X values, e.g. datetime64 times
+        values (numpy.ndarray): Y values
+        points (int): Number of points to keep
+
+    Returns:
+        tuple: (times, values) arrays
+    """
+    n = len(values)
+    if n <= points or points < 3:
+        return times, values
+    x = times.astype("i8").astype(float) if np.issubdtype(times.dtype, np.datetime64) else times.astype(float)
+    y = np.asarray(values, dtype=float)
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    keep = np.empty(points, dtype=int)
+    keep[0] = 0
+    keep[-1] = n - 1
+    previous = 0
+    for i in range(points - 2):
+        start, end = edges[i], edges[i + 1]
+        # The next bucket is represented by its average point
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        next_x = x[end:next_end].mean()
+        next_y = y[end:next_end].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:end] - y[previous])
+                      - (x[previous] - x[start:end]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        keep[i + 1] = previous
+    return times[keep], values[keep]
+
+
+def split_budget(n, budget=CHART_POINT_BUDGET):
+    """Split ``n`` bars into an older part to downsample and a recent one to keep
+
+    Returns:
+        tuple: (split, head_points) where bars before ``split`` are reduced to
+               ``head_points`` points and the rest are kept as they are
+    """
+    if n <= budget:
+        return 0, 0
+    tail = int(budget * FULL_RESOLUTION_SHARE)
+    return n - tail, budget - tail
+
+
+def candle_frame(df, budget=CHART_POINT_BUDGET):
+    """Build the chart frame for IB bars within a point budget
+
+    The most recent bars stay at full resolution so live updates continue
+    them seamlessly; older bars are merged as needed.
+
+    Args:
+        df (pandas.DataFrame): IB bars with 'date' and OHLCV columns
+        budget (int): Maximum number of candles
+
+    Returns:
+        pandas.DataFrame: Frame with 'time', 'open', 'high', 'low', 'close'
+                          and 'volume' columns
+    """
+    columns = [chart_times(df['date'])] + [
+        df[name].to_numpy(dtype=float) for name in ('open', 'high', 'low', 'close', 'volume')
+    ]
+    split, head_points = split_budget(len(df), budget)
+    if split:
+        head = downsample_candles(*(c[:split] for c in columns), head_points)
+        columns = [np.concatenate([h, c[split:]]) for h, c in zip(head, columns)]
+    return pd.DataFrame(dict(zip(('time', 'open', 'high', 'low', 'close', 'volume'), columns)))
+
+
+def line_frame(times, values, name, budget=CHART_POINT_BUDGET):
+    """Build the chart frame for a line within a point budget
+
+    Args:
+        times (numpy.ndarray): datetime64 times
+        values (numpy.ndarray): Line values; NaN values are dropped
+        name (str): Name of the line
+        budget (int): Maximum number of points
+
+    Returns:
+        pandas.DataFrame: Frame with 'time' and ``name`` columns
+    """
+    values = np.asarray(values, dtype=float)
+    valid = ~np.isnan(values)
+    times, values = times[valid], values[valid]
+    split, head_points = split_budget(len(values), budget)
+    if split:
+        head_times, head_values = lttb(times[:split], values[:split], head_points)
+        times = np.concatenate([head_times, times[split:]])
+        values = np.concatenate([head_values, values[split:]])
+    return pd.DataFrame({'time': times, name: values})
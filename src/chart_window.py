@@ -0,0 +1,206 @@
+import threading
+import tkinter as tk
+from queue import Empty
+
+
+# Milliseconds between two checks for chart startup and chart events
+CHART_POLL_MS = 100
+
+_shared = None
+
+
+def get_chart_window(widget):
+    """Return the application's chart window, creating it on first use
+
+    Args:
+        widget (tk.Widget): Long-lived widget, typically the main window,
+            whose ``after()`` services the chart
+
+    Returns:
+        ChartWindow: The shared chart window
+    """
+    global _shared
+    if _shared is None:
+        _shared = ChartWindow(widget)
+    return _shared
+
+
+class ChartWindow:
+
+    def __init__(self, widget, width=800, height=600):
+        """Initialize a long-lived chart that owners swap their data into
+
+        The webview process is started once, in the background, and the
+        window is hidden rather than destroyed when its owner lets go, so
+        later charts only send data. Only the current owner's updates and
+        range handler are used.
+
+        Args:
+            widget (tk.Widget): Widget whose ``after()`` finishes startup and
+                dispatches chart events on the Tk thread
+            width (int): Window width in pixels
+            height (int): Window height in pixels
+        """
+        self.widget = widget
+        self.width = width
+        self.height = height
+        self.owner = None
+        self._range_handler = None
+        self._chart = None
+        self._sma_line = None
+        self._state = "closed"
+        self._visible = False
+        self._pending = []
+        self._started = threading.Event()
+        self._after_id = None
+
+    @property
+    def ready(self):
+        """True once the webview has loaded and data is drawn immediately"""
+        return self._state == "ready"
+
+    def prewarm(self):
+        """Start the webview in the background without showing the chart"""
+        if self._state == "closed":
+            self._start(visible=False)
+
+    def show(self, owner, on_range_change=None):
+        """Show the chart on behalf of an owner
+
+        Args:
+            owner (object): Token identifying the caller, e.g. its popup
+            on_range_change (callable, optional): Called with
+                ``(bars_before, bars_after)`` when the visible range moves
+        """
+        self.owner = owner
+        self._range_handler = on_range_change
+        self._visible = True
+        if self._state == "closed":
+            self._start(visible=True)
+        elif self._state == "ready":
+            self._chart.show(block=False)
+
+    def release(self, owner):
+        """Hide the chart if it still belongs to ``owner``"""
+        if self.owner is not owner:
+            return
+        self.owner = None
+        self._range_handler = None
+        self._visible = False
+        if self._state == "ready":
+            self._chart.hide()
+
+    def set(self, owner, candles, sma, watermark):
+        """Replace the chart data in place
+
+        Args:
+            owner (object): Token passed to ``show``
+            candles (pandas.DataFrame): Candle frame for ``Chart.set``
+            sma (pandas.DataFrame): Frame for the 'SMA 14' line
+            watermark (str): Text shown behind the candles
+        """
+        if self.owner is owner:
+            self._run(lambda: self._set(candles, sma, watermark))
+
+    def update(self, owner, bar):
+        """Update or append the last candle
+
+        Args:
+            owner (object): Token passed to ``show``
+            bar (pandas.Series): Bar for ``Chart.update``
+        """
+        if self.owner is owner:
+            self._run(lambda: self._chart.update(bar))
+
+    def close(self):
+        """Stop the webview process"""
+        if self._after_id is not None:
+            try:
+                self.widget.after_cancel(self._after_id)
+            except tk.TclError:
+                pass  # The widget was already destroyed
+            self._after_id = None
+        if self._chart is not None:
+            self._chart.exit()
+        self._reset()
+
+    def _set(self, candles, sma, watermark):
+        self._chart.set(candles)
+        self._sma_line.set(sma)
+        self._chart.watermark(watermark, color='rgba(0, 0, 0, 0.3)')
+
+    def _run(self, fn):
+        # Scripts sent while the page loads could run before the chart exists
+        if self._state == "ready":
+            fn()
+        else:
+            self._pending.append(fn)
+
+    def _start(self, visible):
+        # Imported on first use; lightweight_charts pulls in IPython and pandas
+        from lightweight_charts import Chart
+        chart = Chart(title="Chart", width=self.width, height=self.height)
+        chart.layout(background_color='#000008', text_color='#000000', font_size=12, font_family='Helvetica')
+        chart.candle_style(up_color='#00ff55', down_color='#ed4807')
+        chart.volume_config(up_color='#00ff55', down_color='#ed4807')
+        chart.crosshair(mode='normal', vert_color='#000000', horz_color='#000000')
+        chart.legend(visible=True)
+        self._sma_line = chart.create_line('SMA 14')
+        chart.events.range_change += self._on_range_change
+        self._chart = chart
+        self._state = "starting"
+        self._visible = visible
+        self._started.clear()
+        threading.Thread(target=self._show_in_background, name="chart-start", daemon=True).start()
+        if self._after_id is None:
+            self._poll()
+
+    def _show_in_background(self):
+        try:
+            self._chart.show(block=False)
+        finally:
+            self._started.set()
+
+    def _poll(self):
+        if self._state == "starting" and self._started.is_set():
+            self._state = "ready"
+            if not self._visible:
+                self._chart.hide()
+            pending, self._pending = self._pending, []
+            for fn in pending:
+                fn()
+        if self._state == "ready":
+            self._dispatch_events()
+        self._after_id = self.widget.after(CHART_POLL_MS, self._poll)
+
+    def _dispatch_events(self):
+        from lightweight_charts.util import parse_event_message
+        # Charts shown with block=False leave their events on the queue
+        while self._chart is not None:
+            try:
+                message = type(self._chart).WV.emit_queue.get_nowait()
+            except Empty:
+                return
+            if message == 'exit':
+                # The user closed the window, which ends the webview process
+                self._chart.exit()
+                self._reset()
+                return
+            try:
+                handler, args = parse_event_message(self._chart.win, message)
+            except (KeyError, ValueError):
+                continue
+            handler(*args)
+
+    def _on_range_change(self, chart, bars_before, bars_after):
+        if chart is self._chart and self._range_handler is not None:
+            self._range_handler(bars_before, bars_after)
+
+    def _reset(self):
+        self._chart = None
+        self._sma_line = None
+        self._state = "closed"
+        self._visible = False
+        self._pending = []
+        self.owner = None
+        self._range_handler = None
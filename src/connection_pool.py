@@ -0,0 +1,255 @@
+import asyncio
+import time
+
+from ib_insync import IB
+
+
+# Workloads given their own connection, in client ID order from the base ID
+ROLES = ("orders", "data", "history")
+
+# Seconds between two health checks, and the time a check may take
+HEALTH_INTERVAL = 10
+HEALTH_TIMEOUT = 5
+
+# Seconds to wait before each reconnect attempt; the last delay repeats
+RECONNECT_DELAYS = (1, 2, 5, 10, 30)
+
+
+class ManagedConnection:
+
+    def __init__(self, ib, roles, host, port, client_id,
+                 health_interval=HEALTH_INTERVAL, health_timeout=HEALTH_TIMEOUT,
+                 reconnect_delays=RECONNECT_DELAYS):
+        """Initialize a gateway connection that heals itself
+
+        A dropped connection, or one that stops answering the periodic
+        health check, is reconnected with backoff. Hooks registered with
+        ``on_connect`` run after every successful connect, so requests can be
+        configured and state restored.
+
+        Args:
+            ib (IB): ib_insync connection object
+            roles (tuple): Workloads served by this connection
+            host (str): Host addr. for IB connection
+            port (int): Port number for IB connection
+            client_id (int): Client ID of this connection
+            health_interval (float, optional): Seconds between two health
+                checks; None disables them, e.g. when the event loop only
+                runs during requests
+            health_timeout (float): Seconds a health check may take
+            reconnect_delays (tuple): Seconds to wait before each attempt
+        """
+        self.ib = ib
+        self.roles = roles
+        self.host = host
+        self.port = port
+        self.client_id = client_id
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.reconnect_delays = reconnect_delays
+        self.state = "disconnected"
+        self.reconnects = 0
+        self.last_error = None
+        self.last_change = time.time()
+        self._hooks = []
+        self._listeners = []
+        self._closing = False
+        self._health_task = None
+        self._reconnect_task = None
+        ib.disconnectedEvent += self._on_disconnected
+
+    def on_connect(self, hook, reconnect_only=False):
+        """Run a hook after every connect
+
+        Args:
+            hook (callable): Called without arguments on the loop thread; it
+                may return an awaitable
+            reconnect_only (bool): Skip the first connect
+        """
+        self._hooks.append((hook, reconnect_only))
+
+    def watch(self, listener):
+        """Call ``listener(connection)`` whenever the state changes
+
+        Returns:
+            callable: Call it to stop receiving changes
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    async def connect(self):
+        """Connect, run the hooks and start the health checks
+
+        Raises:
+            Exception: Whatever ``connectAsync`` raised
+        """
+        self._closing = False
+        self._set_state("connecting")
+        try:
+            await self.ib.connectAsync(self.host, self.port, self.client_id)
+        except Exception as e:
+            self.last_error = e
+            self._set_state("disconnected")
+            raise
+        await self._connected(reconnect=False)
+
+    def disconnect(self):
+        """Disconnect for good, stopping health checks and reconnects"""
+        self._closing = True
+        for task in (self._health_task, self._reconnect_task):
+            if task is not None:
+                task.cancel()
+        self._health_task = self._reconnect_task = None
+        self.ib.disconnect()
+        self._set_state("disconnected")
+
+    async def _connected(self, reconnect):
+        for hook, reconnect_only in self._hooks:
+            if reconnect or not reconnect_only:
+                result = hook()
+                if asyncio.iscoroutine(result) or isinstance(result, asyncio.Future):
+                    await result
+        self._set_state("connected")
+        if self._health_task is None and self.health_interval:
+            self._health_task = asyncio.ensure_future(self._check_health())
+
+    def _set_state(self, state):
+        if state != self.state:
+            self.state = state
+            self.last_change = time.time()
+            for listener in list(self._listeners):
+                listener(self)
+
+    def _on_disconnected(self):
+        if self._closing or self._reconnect_task is not None:
+            return
+        self._set_state("reconnecting")
+        self._reconnect_task = asyncio.ensure_future(self._reconnect())
+
+    async def _reconnect(self):
+        attempt = 0
+        try:
+            while not self._closing:
+                await asyncio.sleep(self.reconnect_delays[min(attempt, len(self.reconnect_delays) - 1)])
+                attempt += 1
+                try:
+                    if self.ib.isConnected():
+                        self.ib.disconnect()
+                    await self.ib.connectAsync(self.host, self.port, self.client_id)
+                except Exception as e:
+                    self.last_error = e
+                    continue
+                self.reconnects += 1
+                self.last_error = None
+                self._reconnect_task = None
+                await self._connected(reconnect=True)
+                return
+        finally:
+            if self._reconnect_task is asyncio.current_task():
+                self._reconnect_task = None
+
+    async def _check_health(self):
+        try:
+            while not self._closing:
+                await asyncio.sleep(self.health_interval)
+                if self._reconnect_task is not None:
+                    continue
+                if not self.ib.isConnected():
+                    self._on_disconnected()
+                    continue
+                try:
+                    await asyncio.wait_for(self.ib.reqCurrentTimeAsync(), self.health_timeout)
+                except asyncio.TimeoutError:
+                    # The socket is open but the gateway stopped answering
+                    self.last_error = TimeoutError("health check timed out")
+                    self._on_disconnected()
+        finally:
+            self._health_task = None
+
+
+class ConnectionPool:
+
+    def __init__(self, host='127.0.0.1', port=7497, client_id=1, ib=None, ib_factory=IB, split=True,
+                 **connection_options):
+        """Initialize one gateway connection per workload
+
+        With ``split`` the roles in ROLES get their own connection with
+        client IDs ``client_id``, ``client_id + 1`` and so on, so a long
+        history download cannot delay an order. Without it, or when a single
+        ``ib`` object is given, every role shares one connection.
+
+        Args:
+            host (str): Host addr. for IB connection
+            port (int): Port number for IB connection
+            client_id (int): Client ID of the first role
+            ib (IB, optional): Single connection object shared by every role
+            ib_factory (callable): Returns a new connection object
+            split (bool): Give each role its own connection
+            **connection_options: Passed to ``ManagedConnection``
+        """
+        self._by_role = {}
+        if ib is not None or not split:
+            shared = ManagedConnection(ib if ib is not None else ib_factory(), ROLES, host, port, client_id,
+                                       **connection_options)
+            self._by_role = {role: shared for role in ROLES}
+        else:
+            for offset, role in enumerate(ROLES):
+                self._by_role[role] = ManagedConnection(
+                    ib_factory(), (role,), host, port, client_id + offset, **connection_options)
+
+    def __getitem__(self, role):
+        """Return the ib_insync connection object serving a role"""
+        return self._by_role[role].ib
+
+    def connection(self, role):
+        """Return the ManagedConnection serving a role"""
+        return self._by_role[role]
+
+    def connections(self):
+        """Return the distinct connections, in role order"""
+        unique = []
+        for connection in self._by_role.values():
+            if connection not in unique:
+                unique.append(connection)
+        return unique
+
+    async def connect(self):
+        """Connect every connection concurrently
+
+        Raises:
+            Exception: The first error raised by a connection; the others
+                are disconnected again
+        """
+        results = await asyncio.gather(*(c.connect() for c in self.connections()), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            for connection in self.connections():
+                if connection.ib.isConnected():
+                    connection.disconnect()
+            raise errors[0]
+
+    def disconnect(self):
+        for connection in self.connections():
+            connection.disconnect()
+
+    def is_connected(self):
+        return all(c.state == "connected" for c in self.connections())
+
+    def stats(self):
+        """Return the state of every connection
+
+        Returns:
+            list: Dictionaries with 'roles', 'client_id', 'state',
+                  'reconnects', 'last_error' and 'since'
+        """
+        return [
+            {
+                "roles": c.roles,
+                "client_id": c.client_id,
+                "state": c.state,
+                "reconnects": c.reconnects,
+                "last_error": str(c.last_error) if c.last_error else None,
+                "since": c.last_change
+            }
+            for c in self.connections()
+        ]
@@ -0,0 +1,116 @@
+import json
+import os
+import time
+
+from ib_insync import Contract, util
+
+
+class ContractCache:
+
+    def __init__(self, ttl=86400, path=None, save_interval=5):
+        """Initialize a cache of qualified contracts
+
+        Args:
+            ttl (float): Seconds a qualified contract stays valid
+            path (str, optional): JSON file used to persist the cache between
+                sessions; loaded immediately if it exists
+            save_interval (float): Minimum seconds between two writes of the
+                persistent store; call ``save`` to flush pending changes
+        """
+        self.ttl = ttl
+        self.path = path
+        self.save_interval = save_interval
+        self._saved_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        if path:
+            self.load()
+
+    @staticmethod
+    def make_key(ticker_type, symbol, expiry=None):
+        """Build the cache key for a contract lookup
+
+        Args:
+            ticker_type (str): Type of ticker (stock or future)
+            symbol (str): Ticker symbol
+            expiry (str, optional): YYYYMM expiration for futures
+
+        Returns:
+            tuple: (ticker_type, symbol, expiry)
+        """
+        return (ticker_type, symbol.upper(), expiry or "")
+
+    def get(self, key):
+        """Return the cached contract for a key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            contract, stored_at = entry
+            if time.time() - stored_at < self.ttl:
+                self.hits += 1
+                return contract
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, contract):
+        """Store a qualified contract and persist the cache if configured"""
+        now = time.time()
+        self._entries[key] = (contract, now)
+        if self.path and now - self._saved_at >= self.save_interval:
+            self.save()
+
+    def invalidate(self, key=None):
+        """Drop one entry, or the whole cache when no key is given"""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+        if self.path:
+            self.save()
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached contracts
+
+        Returns:
+            dict: Dictionary with 'hits', 'misses', 'size' and 'hit_rate'
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def load(self):
+        """Load unexpired contracts from the persistent store"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for record in records:
+            if now - record["stored_at"] >= self.ttl:
+                continue
+            key = tuple(record["key"])
+            self._entries[key] = (Contract.create(**record["contract"]), record["stored_at"])
+
+    def save(self):
+        """Write the cache to the persistent store"""
+        self._saved_at = time.time()
+        records = [
+            {
+                "key": list(key),
+                "contract": util.dataclassNonDefaults(contract),
+                "stored_at": stored_at
+            }
+            for key, (contract, stored_at) in self._entries.items()
+        ]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self.path)
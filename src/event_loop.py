@@ -0,0 +1,119 @@
+import asyncio
+import concurrent.futures
+import queue
+import threading
+import traceback
+
+
+class IBLoopThread:
+
+    def __init__(self, name="ib-loop"):
+        """Initialize an asyncio event loop that runs on its own daemon thread
+
+        Args:
+            name (str): Name of the thread
+        """
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def start(self):
+        """Start running the event loop"""
+        self._thread.start()
+
+    def stop(self):
+        """Stop the event loop and wait for the thread to exit"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if not self.in_loop_thread():
+            self._thread.join(timeout=5)
+
+    def in_loop_thread(self):
+        """Return True when called from the event loop thread"""
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        """Schedule a coroutine on the loop
+
+        Args:
+            coro (coroutine): Coroutine to run
+
+        Returns:
+            concurrent.futures.Future: Future for the coroutine's result
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def call(self, fn, *args):
+        """Run a plain function on the loop thread
+
+        Args:
+            fn (callable): Function to run
+            *args: Positional arguments for ``fn``
+
+        Returns:
+            concurrent.futures.Future: Future for the function's result
+        """
+        future = concurrent.futures.Future()
+
+        def run():
+            if not future.set_running_or_notify_cancel():
+                return
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+
+        if self.in_loop_thread():
+            run()
+        else:
+            self.loop.call_soon_threadsafe(run)
+        return future
+
+
+class UIDispatcher:
+
+    def __init__(self, widget, interval=15, budget=500):
+        """Initialize a queue of callbacks to run on the Tk thread
+
+        Callbacks can be posted from any thread; they are drained from the Tk
+        event loop with ``after()``.
+
+        Args:
+            widget (tk.Widget): Widget whose ``after()`` drives the queue
+            interval (int): Milliseconds between queue drains
+            budget (int): Maximum number of callbacks run per drain
+        """
+        self.widget = widget
+        self.interval = interval
+        self.budget = budget
+        self._queue = queue.SimpleQueue()
+        self._after_id = None
+
+    def post(self, callback, *args):
+        """Queue ``callback(*args)`` to run on the Tk thread"""
+        self._queue.put((callback, args))
+
+    def start(self):
+        """Start draining the queue"""
+        if self._after_id is None:
+            self._after_id = self.widget.after(self.interval, self._drain)
+
+    def stop(self):
+        """Stop draining the queue"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _drain(self):
+        for _ in range(self.budget):
+            try:
+                callback, args = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception:
+                traceback.print_exc()
+        self._after_id = self.widget.after(self.interval, self._drain)
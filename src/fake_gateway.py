@@ -0,0 +1,374 @@
+import asyncio
+import copy
+import random
+import time
+import zlib
+from datetime import date, datetime, timedelta, timezone
+
+from eventkit import Event
+from ib_insync import (BarData, CommissionReport, Contract, ContractDetails, Execution, Fill,
+                       OrderStatus, PortfolioItem, Position, Ticker, Trade)
+
+from src.bar_store import DURATION_SECONDS, SESSIONS_PER_UNIT, parse_duration
+from src.live_bars import BAR_SIZE_SECONDS
+
+
+# Month codes used in futures local symbols
+MONTH_CODES = "FGHJKMNQUVXZ"
+
+# Seconds in one regular trading session, used to size 'D' and 'W' requests
+SESSION_SECONDS = 390 * 60
+
+
+def fake_con_id(contract):
+    """Return a stable conId for a contract's symbol, type and expiry"""
+    key = f"{contract.secType}:{contract.symbol.upper()}:{contract.lastTradeDateOrContractMonth[:6]}"
+    return zlib.crc32(key.encode()) & 0x7FFFFFFF
+
+
+class FakeIB:
+
+    def __init__(self, positions=0, latency=0.0, seed=1, unknown_symbols=()):
+        """Initialize a stand-in for ``ib_insync.IB`` that plays the gateway
+
+        It serves qualification responses, synthetic positions, streaming and
+        snapshot tickers and historical bars without a running TWS, so the
+        client and the UI can be exercised and timed headless.
+
+        Args:
+            positions (int): Number of synthetic positions to hold
+            latency (float): Seconds added to every simulated round trip
+            seed (int): Seed for the synthetic prices
+            unknown_symbols (iterable): Symbols that fail qualification
+        """
+        self.latency = latency
+        self.unknown_symbols = {s.upper() for s in unknown_symbols}
+        self.requests = 0
+        self.connected = False
+        self.positionEvent = Event("positionEvent")
+        self.updatePortfolioEvent = Event("updatePortfolioEvent")
+        self.pendingTickersEvent = Event("pendingTickersEvent")
+        self.orderStatusEvent = Event("orderStatusEvent")
+        self.connectedEvent = Event("connectedEvent")
+        self.disconnectedEvent = Event("disconnectedEvent")
+        self.client_id = None
+        self._random = random.Random(seed)
+        self._loop = None
+        self._tickers = {}
+        self._prices = {}
+        self._positions = {}
+        self._portfolio = {}
+        self._trades = []
+        self._next_order_id = 1
+        self._tick_task = None
+        self.set_positions(positions)
+
+    # Connection
+
+    def connect(self, host='127.0.0.1', port=7497, clientId=1, **kwargs):
+        self.connected = True
+        self.client_id = clientId
+        self.connectedEvent.emit()
+        return self
+
+    async def connectAsync(self, host='127.0.0.1', port=7497, clientId=1, **kwargs):
+        await self._round_trip()
+        return self.connect(host, port, clientId)
+
+    def disconnect(self):
+        self.stop_ticks()
+        if self.connected:
+            self.connected = False
+            self.disconnectedEvent.emit()
+
+    def drop(self):
+        """Simulate a lost connection: streams are forgotten, as by ib_insync"""
+        self._tickers.clear()
+        self.disconnect()
+
+    async def reqCurrentTimeAsync(self):
+        await self._round_trip()
+        return datetime.now(timezone.utc)
+
+    def isConnected(self):
+        return self.connected
+
+    def run(self, *awaitables):
+        """Run awaitables to completion on the fake's own event loop"""
+        if self._loop is None:
+            self._loop = asyncio.new_event_loop()
+        if len(awaitables) == 1:
+            return self._loop.run_until_complete(awaitables[0])
+        return self._loop.run_until_complete(asyncio.gather(*awaitables))
+
+    def sleep(self, secs=0.02):
+        self.run(asyncio.sleep(secs))
+        return True
+
+    def reqMarketDataType(self, marketDataType):
+        pass
+
+    async def _round_trip(self):
+        self.requests += 1
+        await asyncio.sleep(self.latency)
+
+    # Contracts
+
+    def qualifyContracts(self, *contracts):
+        return self.run(self.qualifyContractsAsync(*contracts))
+
+    async def qualifyContractsAsync(self, *contracts):
+        await self._round_trip()
+        qualified = []
+        for contract in contracts:
+            if contract.symbol.upper() in self.unknown_symbols:
+                continue
+            contract.conId = fake_con_id(contract)
+            if not contract.exchange:
+                contract.exchange = "SMART" if contract.secType == "STK" else "CME"
+            if not contract.localSymbol:
+                contract.localSymbol = contract.symbol.upper()
+            qualified.append(contract)
+        return qualified
+
+    def reqContractDetails(self, contract):
+        return self.run(self.reqContractDetailsAsync(contract))
+
+    async def reqContractDetailsAsync(self, contract):
+        """Return quarterly futures from two years back to two years ahead
+
+        Each contract's last trade date is the third Friday of its month.
+        Stocks get a single detail for their qualified contract.
+        """
+        await self._round_trip()
+        symbol = contract.symbol.upper()
+        if symbol in self.unknown_symbols:
+            return []
+        if contract.secType != "FUT":
+            qualified = await self.qualifyContractsAsync(copy.copy(contract))
+            return [ContractDetails(contract=c) for c in qualified]
+        today = date.today()
+        details = []
+        for months in range(-24, 25):
+            year, month = divmod(today.year * 12 + today.month - 1 + months, 12)
+            month += 1
+            if month % 3 or (months < 0 and not contract.includeExpired):
+                continue
+            first = date(year, month, 1)
+            expiry = first + timedelta(days=(4 - first.weekday()) % 7 + 14)
+            future = Contract(secType="FUT", symbol=symbol, exchange="CME", currency="USD",
+                              lastTradeDateOrContractMonth=expiry.strftime("%Y%m%d"), multiplier="50",
+                              localSymbol=f"{symbol}{MONTH_CODES[month - 1]}{year % 10}")
+            future.conId = fake_con_id(future)
+            details.append(ContractDetails(contract=future, contractMonth=f"{year}{month:02d}",
+                                           realExpirationDate=future.lastTradeDateOrContractMonth))
+        return details
+
+    # Positions
+
+    def set_positions(self, count):
+        """Replace the held positions with ``count`` synthetic ones
+
+        Every tenth position is a future, so the client's qualification path
+        is exercised alongside the stock routing.
+        """
+        self._positions.clear()
+        self._portfolio.clear()
+        for i in range(count):
+            if i % 10 == 9:
+                contract = Contract(secType="FUT", symbol=f"F{i:04d}", currency="USD",
+                                    lastTradeDateOrContractMonth="20300320")
+            else:
+                contract = Contract(secType="STK", symbol=f"S{i:04d}", currency="USD")
+            contract.conId = fake_con_id(contract)
+            contract.localSymbol = contract.symbol
+            quantity = self._random.choice((-1, 1)) * self._random.randint(1, 500)
+            self._positions[contract.conId] = Position(
+                "DU000000", contract, quantity, round(self._price(contract), 2))
+
+    def positions(self, account=''):
+        return list(self._positions.values())
+
+    def portfolio(self, account=''):
+        return list(self._portfolio.values())
+
+    def update_position(self, contract, position, avg_cost):
+        """Change a position and emit the position and portfolio events
+
+        Args:
+            contract (Contract): Contract with a conId
+            position (float): New quantity; 0 closes the position
+            avg_cost (float): Average cost of the position
+        """
+        pos = Position("DU000000", contract, position, avg_cost)
+        if position:
+            self._positions[contract.conId] = pos
+        else:
+            self._positions.pop(contract.conId, None)
+        price = self._price(contract)
+        item = PortfolioItem(contract, position, price, price * position, avg_cost,
+                             (price - avg_cost) * position, 0.0, "DU000000")
+        self._portfolio[contract.conId] = item
+        self.positionEvent.emit(pos)
+        self.updatePortfolioEvent.emit(item)
+
+    # Market data
+
+    def _price(self, contract):
+        price = self._prices.get(contract.conId)
+        if price is None:
+            price = 20 + (contract.conId % 480) + self._random.random()
+            self._prices[contract.conId] = price
+        return price
+
+    def _quote(self, ticker, price):
+        ticker.prevBid, ticker.prevAsk, ticker.prevLast = ticker.bid, ticker.ask, ticker.last
+        ticker.bid = round(price - 0.01, 2)
+        ticker.ask = round(price + 0.01, 2)
+        ticker.last = round(price, 2)
+        ticker.lastSize = float(self._random.randint(1, 10) * 100)
+        ticker.volume = (ticker.volume if ticker.volume == ticker.volume else 0) + ticker.lastSize
+        if ticker.close != ticker.close:
+            ticker.close = ticker.last
+        ticker.time = datetime.now(timezone.utc)
+
+    def reqMktData(self, contract, genericTickList='', snapshot=False,
+                   regulatorySnapshot=False, mktDataOptions=None):
+        ticker = Ticker(contract=contract)
+        self._quote(ticker, self._price(contract))
+        if not snapshot:
+            self._tickers[contract.conId] = ticker
+        return ticker
+
+    def cancelMktData(self, contract):
+        self._tickers.pop(contract.conId, None)
+
+    def tickers(self):
+        return list(self._tickers.values())
+
+    def tick(self):
+        """Move every streamed price one step and emit the ticker updates
+
+        Every step changes the last price, so each tick is visible downstream.
+        """
+        tickers = list(self._tickers.values())
+        for ticker in tickers:
+            price = self._prices[ticker.contract.conId]
+            price = max(0.05, price + self._random.choice((-1, 1)) * self._random.randint(1, 5) / 100)
+            self._prices[ticker.contract.conId] = price
+            self._quote(ticker, price)
+            ticker.updateEvent.emit(ticker)
+        if tickers:
+            self.pendingTickersEvent.emit(set(tickers))
+        return len(tickers)
+
+    def start_ticks(self, rate):
+        """Tick every streamed contract ``rate`` times per second
+
+        Must be called from the thread running the event loop.
+        """
+        self.stop_ticks()
+        self._tick_task = asyncio.ensure_future(self._tick_forever(1.0 / rate))
+
+    def stop_ticks(self):
+        if self._tick_task is not None:
+            self._tick_task.cancel()
+            self._tick_task = None
+
+    async def _tick_forever(self, interval):
+        next_at = time.monotonic()
+        while True:
+            self.tick()
+            next_at += interval
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+    # Historical data
+
+    def reqHistoricalData(self, contract, endDateTime, durationStr, barSizeSetting,
+                          whatToShow, useRTH, formatDate=1, keepUpToDate=False,
+                          chartOptions=None, timeout=60):
+        return self.run(self.reqHistoricalDataAsync(
+            contract, endDateTime, durationStr, barSizeSetting, whatToShow, useRTH))
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime, durationStr, barSizeSetting,
+                                     whatToShow, useRTH, formatDate=1, keepUpToDate=False,
+                                     chartOptions=None, timeout=60):
+        await self._round_trip()
+        bar_seconds = BAR_SIZE_SECONDS[barSizeSetting]
+        count, unit = parse_duration(durationStr)
+        if unit in SESSIONS_PER_UNIT and bar_seconds < 86400:
+            span = count * SESSIONS_PER_UNIT[unit] * SESSION_SECONDS
+        else:
+            span = count * DURATION_SECONDS[unit]
+        n = max(1, span // bar_seconds)
+        end = endDateTime.timestamp() if endDateTime else time.time()
+        # A bar starting exactly at the end time is not part of the request
+        end = (int(end) - (1 if endDateTime else 0)) // bar_seconds * bar_seconds
+        rng = random.Random(contract.conId)
+        price = self._price(contract)
+        bars = []
+        for i in range(n):
+            start = end - (n - 1 - i) * bar_seconds
+            open_ = price
+            close = max(0.05, price + rng.gauss(0, 0.05))
+            high = max(open_, close) + abs(rng.gauss(0, 0.02))
+            low = max(0.01, min(open_, close) - abs(rng.gauss(0, 0.02)))
+            when = datetime.fromtimestamp(start, timezone.utc)
+            bars.append(BarData(
+                date=when.date() if bar_seconds >= 86400 else when,
+                open=round(open_, 2), high=round(high, 2), low=round(low, 2),
+                close=round(close, 2), volume=float(rng.randint(1, 100) * 100),
+                average=round((high + low + close) / 3, 2), barCount=rng.randint(1, 50)
+            ))
+            price = close
+        return bars
+
+    # Orders
+
+    def placeOrder(self, contract, order):
+        """Accept an order and walk it through acknowledgement and fill
+
+        Market orders are acknowledged after ``latency`` and filled at the
+        current synthetic price after another ``latency``. Without a running
+        event loop both happen before returning.
+        """
+        order = copy.copy(order)
+        order.orderId = self._next_order_id
+        self._next_order_id += 1
+        trade = Trade(contract, order, OrderStatus(orderId=order.orderId, status="PendingSubmit",
+                                                   remaining=order.totalQuantity))
+        self._trades.append(trade)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._set_status(trade, "Submitted")
+            self._fill(trade)
+            return trade
+        loop.call_later(self.latency, self._set_status, trade, "Submitted")
+        loop.call_later(2 * self.latency, self._fill, trade)
+        return trade
+
+    def _set_status(self, trade, status):
+        trade.orderStatus.status = status
+        trade.statusEvent.emit(trade)
+        self.orderStatusEvent.emit(trade)
+
+    def _fill(self, trade):
+        if trade.orderStatus.status != "Submitted" or trade.order.orderType != "MKT":
+            return
+        contract, order = trade.contract, trade.order
+        price = round(self._price(contract), 2)
+        execution = Execution(execId=f"{order.orderId:08d}.01", time=datetime.now(timezone.utc),
+                              side="BOT" if order.action == "BUY" else "SLD", shares=order.totalQuantity,
+                              price=price, orderId=order.orderId, cumQty=order.totalQuantity, avgPrice=price)
+        fill = Fill(contract, execution, CommissionReport(), execution.time)
+        trade.fills.append(fill)
+        trade.orderStatus.filled = order.totalQuantity
+        trade.orderStatus.remaining = 0
+        trade.orderStatus.avgFillPrice = price
+        trade.orderStatus.lastFillPrice = price
+        trade.fillEvent.emit(trade, fill)
+        self._set_status(trade, "Filled")
+
+    def trades(self):
+        return list(self._trades)
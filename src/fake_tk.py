@@ -0,0 +1,262 @@
+"""Headless stand-ins for the Tk widgets, dialogs and chart window used by the popups
+
+``FakeTk`` lets the benchmarks open real popup windows against ``FakeIB``
+without a display, so a failure in window code breaks the run instead of
+being reported as skipped. Widgets keep their options and children, timers
+run on ``update()`` once due, and destroying a widget sends ``<Destroy>``
+like Tk does.
+"""
+import importlib
+import time
+import tkinter
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+
+# Modules whose Tk names are replaced while a FakeTk is installed
+UI_MODULES = ("src.popup_window", "src.ui_components")
+
+WIDGETS = ("Toplevel", "Frame", "Labelframe", "Label", "Button", "Entry", "Combobox", "Radiobutton",
+           "Checkbutton", "Spinbox", "Scrollbar", "Treeview")
+
+
+class FakeVariable:
+
+    def __init__(self, master=None, value=None, name=None):
+        self._value = value
+
+    def get(self):
+        return self._value
+
+    def set(self, value):
+        self._value = value
+
+
+def _variable(default):
+    return lambda master=None, value=default, name=None: FakeVariable(master, value, name)
+
+
+class FakeEvent:
+
+    def __init__(self, widget):
+        self.widget = widget
+
+
+class FakeWidget:
+
+    def __init__(self, master=None, **options):
+        """Initialize a widget that records its options and children
+
+        Args:
+            master (FakeWidget, optional): Parent widget
+            **options: Widget options such as text, command or textvariable
+        """
+        self.master = master
+        self.root = master.root if master is not None else self
+        self.tk = self.root.tk
+        self.options = options
+        self.children = []
+        self.exists = True
+        self._text = ""
+        self._bindings = {}
+        self._protocols = {}
+        if master is not None:
+            master.children.append(self)
+
+    def _ignore(self, *args, **kwargs):
+        return None
+
+    # Geometry and window manager calls have no effect without a display
+    grid = pack = place = pack_forget = grid_forget = grid_remove = _ignore
+    columnconfigure = rowconfigure = title = geometry = resizable = _ignore
+    withdraw = deiconify = lift = focus_set = update_idletasks = _ignore
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def cget(self, key):
+        return self.options.get(key)
+
+    __getitem__ = cget
+
+    def __setitem__(self, key, value):
+        self.options[key] = value
+
+    def get(self):
+        variable = self.options.get("textvariable")
+        return variable.get() if variable is not None else self._text
+
+    def insert(self, index, text):
+        self._text += str(text)
+
+    def delete(self, first, last=None):
+        self._text = ""
+
+    def invoke(self):
+        """Run the widget's command, as a click would"""
+        command = self.options.get("command")
+        return command() if command is not None else None
+
+    def bind(self, sequence, handler, add=None):
+        handlers = self._bindings.setdefault(sequence, [])
+        if not add:
+            handlers.clear()
+        handlers.append(handler)
+
+    def event_generate(self, sequence):
+        for handler in list(self._bindings.get(sequence, ())):
+            handler(FakeEvent(self))
+
+    def protocol(self, name, handler=None):
+        if handler is None:
+            return self._protocols.get(name, "")
+        self._protocols[name] = handler
+
+    def after(self, ms, callback, *args):
+        return self.root.schedule(ms, callback, args)
+
+    def after_cancel(self, timer_id):
+        self.root.cancel(timer_id)
+
+    def winfo_exists(self):
+        return self.exists
+
+    def destroy(self):
+        """Destroy the children, then the widget, sending <Destroy> to each"""
+        if not self.exists:
+            return
+        for child in list(self.children):
+            child.destroy()
+        self.exists = False
+        if self.master is not None and self in self.master.children:
+            self.master.children.remove(self)
+        self.event_generate("<Destroy>")
+        self._bindings.clear()
+        self._protocols.clear()
+
+    def find(self, **options):
+        """Return the first descendant whose options match, or None"""
+        for child in self.children:
+            if all(child.options.get(key) == value for key, value in options.items()):
+                return child
+            found = child.find(**options)
+            if found is not None:
+                return found
+        return None
+
+
+class FakeInterpreter:
+
+    def __init__(self, root):
+        self.root = root
+
+    def call(self, *args):
+        """Answer ``after info`` and run the handlers returned by ``protocol``"""
+        if args[:2] == ("after", "info"):
+            return tuple(self.root.timers)
+        if len(args) == 1 and callable(args[0]):
+            return args[0]()
+        raise tkinter.TclError(f"unsupported command {args!r}")
+
+    def splitlist(self, value):
+        return tuple(value)
+
+
+class FakeChartWindow:
+
+    def __init__(self):
+        """Initialize a stand-in for ``ChartWindow`` recording what owners send"""
+        self.owner = None
+        self.ready = True
+        self.sets = 0
+        self.updates = 0
+
+    def prewarm(self):
+        pass
+
+    def show(self, owner, on_range_change=None):
+        self.owner = owner
+
+    def release(self, owner):
+        if self.owner is owner:
+            self.owner = None
+
+    def set(self, owner, candles, sma, watermark):
+        if self.owner is owner:
+            self.sets += 1
+
+    def update(self, owner, bar):
+        if self.owner is owner:
+            self.updates += 1
+
+    def close(self):
+        self.owner = None
+
+
+class FakeTk(FakeWidget):
+
+    def __init__(self):
+        """Initialize a headless root window
+
+        Error and question dialogs shown while installed are recorded in
+        ``messages``; questions are answered yes.
+        """
+        self.tk = FakeInterpreter(self)
+        self.timers = {}
+        self.messages = []
+        self.chart = FakeChartWindow()
+        self._next_timer = 0
+        super().__init__(None)
+
+    def schedule(self, ms, callback, args=()):
+        self._next_timer += 1
+        timer_id = f"after#{self._next_timer}"
+        self.timers[timer_id] = (time.monotonic() + ms / 1000, callback, args)
+        return timer_id
+
+    def cancel(self, timer_id):
+        self.timers.pop(timer_id, None)
+
+    def update(self):
+        """Run every timer that is due; timers they schedule wait for the next call"""
+        now = time.monotonic()
+        due = sorted((item for item in self.timers.items() if item[1][0] <= now), key=lambda item: item[1][0])
+        for timer_id, (_, callback, args) in due:
+            if self.timers.pop(timer_id, None) is not None:
+                callback(*args)
+
+    def _record(self, kind, answer=None):
+        def show(title, message=None, **kwargs):
+            self.messages.append((kind, title, message))
+            return answer
+        return show
+
+    def toolkit(self):
+        """Return the replacements for the ttk, tk, messagebox and ToolTip names"""
+        ttk = SimpleNamespace(**{name: FakeWidget for name in WIDGETS})
+        tk = SimpleNamespace(StringVar=_variable(""), IntVar=_variable(0), DoubleVar=_variable(0.0),
+                             BooleanVar=_variable(False), Widget=FakeWidget, TclError=tkinter.TclError,
+                             END="end")
+        messagebox = SimpleNamespace(showerror=self._record("error"), showwarning=self._record("warning"),
+                                     showinfo=self._record("info"), askyesno=self._record("question", True))
+        tooltip = lambda widget, text="", **kwargs: SimpleNamespace(widget=widget, text=text)
+        return {"ttk": ttk, "tk": tk, "messagebox": messagebox, "ToolTip": tooltip,
+                "get_chart_window": lambda widget: self.chart}
+
+    @contextmanager
+    def installed(self, modules=UI_MODULES):
+        """Make the window modules build their widgets on this root"""
+        replaced = []
+        try:
+            for name in modules:
+                module = importlib.import_module(name)
+                for attr, value in self.toolkit().items():
+                    if hasattr(module, attr):
+                        replaced.append((module, attr, getattr(module, attr)))
+                        setattr(module, attr, value)
+            yield self
+        finally:
+            for module, attr, value in reversed(replaced):
+                setattr(module, attr, value)
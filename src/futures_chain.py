@@ -0,0 +1,227 @@
+import calendar
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from ib_insync import Contract, util
+
+from src.bar_store import to_epoch
+
+
+# Calendar days before the last trade date at which a contract is rolled
+ROLL_DAYS = 7
+
+# Seconds a chain is kept even when no contract expired, to pick up listings
+CHAIN_TTL = 7 * 86400
+
+
+def last_trade_date(contract):
+    """Return the last trade date of a futures contract
+
+    Contracts carrying only a YYYYMM month are taken to expire at the end
+    of that month.
+    """
+    value = contract.lastTradeDateOrContractMonth
+    if len(value) >= 8:
+        return datetime.strptime(value[:8], "%Y%m%d").date()
+    month = datetime.strptime(value[:6], "%Y%m").date()
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+
+def roll_time(contract, roll_days=ROLL_DAYS):
+    """Return the POSIX time at which a contract is rolled to the next one"""
+    roll = last_trade_date(contract) - timedelta(days=roll_days)
+    return calendar.timegm(roll.timetuple())
+
+
+def active_contract(chain, offset=0, now=None, roll_days=ROLL_DAYS):
+    """Return the contract to trade from a chain sorted by expiry
+
+    Args:
+        chain (list): Contracts sorted by last trade date
+        offset (int): Number of listed contracts to skip after the front one
+        now (float, optional): Reference time as a POSIX timestamp
+        roll_days (int): Calendar days before expiry a contract is rolled
+
+    Returns:
+        Contract: The contract, or None if the chain is too short
+    """
+    now = time.time() if now is None else now
+    live = [contract for contract in chain if roll_time(contract, roll_days) > now]
+    return live[offset] if offset < len(live) else None
+
+
+def continuous_series(segments, adjust="difference"):
+    """Splice per-expiry bars into one roll-adjusted continuous series
+
+    Each contract contributes its bars from the previous contract's roll
+    time up to its own. Older prices are shifted (``difference``) or scaled
+    (``ratio``) by the gap between the two contracts at the last bar before
+    each roll, so the series has no jumps at the rolls and the latest
+    segment keeps its traded prices.
+
+    Args:
+        segments (list): (contract, DataFrame, start, end) tuples, oldest
+            first, where start and end bound the segment as POSIX times
+        adjust (str, optional): 'difference', 'ratio' or None for a raw splice
+
+    Returns:
+        pandas.DataFrame: Bars with 'date', OHLC, 'volume' and the
+        'contract' each bar was taken from
+    """
+    pieces = []
+    newer = None
+    for contract, df, start, end in reversed(segments):
+        if df is None or df.empty:
+            continue
+        times = np.array([to_epoch(value) for value in df['date']])
+        piece = df.loc[(times >= start) & (times < end), ['date', 'open', 'high', 'low', 'close', 'volume']].copy()
+        if newer is not None and adjust:
+            ref_df, ref_times = newer
+            before = times < end
+            if before.any():
+                ref_time = times[before][-1]
+                old_close = df['close'].to_numpy()[before][-1]
+                matched = ref_times <= ref_time
+                if matched.any():
+                    new_close = ref_df['close'].to_numpy()[matched][-1]
+                    columns = ['open', 'high', 'low', 'close']
+                    if adjust == "ratio":
+                        piece[columns] *= new_close / old_close
+                        df = df.copy()
+                        df[columns] *= new_close / old_close
+                    else:
+                        piece[columns] += new_close - old_close
+                        df = df.copy()
+                        df[columns] += new_close - old_close
+        piece['contract'] = contract.localSymbol or contract.lastTradeDateOrContractMonth
+        pieces.append(piece)
+        # The next older contract is adjusted against this one's adjusted prices
+        newer = (df, times)
+    if not pieces:
+        return pd.DataFrame(columns=['date', 'open', 'high', 'low', 'close', 'volume', 'contract'])
+    return pd.concat(reversed(pieces), ignore_index=True)
+
+
+class FuturesChainCache:
+
+    def __init__(self, ttl=CHAIN_TTL, path=None):
+        """Initialize a cache of futures chains keyed by symbol
+
+        A chain stays valid until the first contract that was live when it
+        was stored expires, since the listed contracts change then, or at
+        most ``ttl`` seconds.
+
+        Args:
+            ttl (float): Maximum seconds a chain stays valid
+            path (str, optional): JSON file used to persist the chains between
+                sessions; loaded immediately if it exists
+        """
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = {}
+        self._months = {}
+        if path:
+            self.load()
+
+    def get(self, symbol):
+        """Return the cached chain for a symbol, or None if missing or stale"""
+        entry = self._entries.get(symbol.upper())
+        if entry is not None:
+            chain, stored_at, expires_at = entry
+            now = time.time()
+            if now < expires_at and now - stored_at < self.ttl:
+                self.hits += 1
+                return chain
+            del self._entries[symbol.upper()]
+        self.misses += 1
+        return None
+
+    def put(self, symbol, chain, months=None):
+        """Store a chain, sorted by last trade date, and persist the cache
+
+        Args:
+            symbol (str): Futures symbol
+            chain (list): Qualified contracts
+            months (dict, optional): Contract month (YYYYMM) by conId, from
+                the contract details; it can differ from the expiry month
+        """
+        now = time.time()
+        chain = sorted(chain, key=last_trade_date)
+        self._months.update(months or {})
+        self._entries[symbol.upper()] = (chain, now, self._expires_at(chain, now))
+        if self.path:
+            self.save()
+        return chain
+
+    def contract_month(self, contract):
+        """Return the contract month (YYYYMM) of a chained contract
+
+        Falls back to the month of the last trade date for contracts stored
+        without one.
+        """
+        return self._months.get(contract.conId) or contract.lastTradeDateOrContractMonth[:6]
+
+    def invalidate(self, symbol=None):
+        """Drop one chain, or every chain when no symbol is given"""
+        if symbol is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(symbol.upper(), None)
+        if self.path:
+            self.save()
+
+    def stats(self):
+        """Return hit/miss counters and the number of cached chains
+
+        Returns:
+            dict: Dictionary with 'hits', 'misses' and 'size'
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    @staticmethod
+    def _expires_at(chain, now):
+        today = datetime.fromtimestamp(now, timezone.utc).date()
+        live = [last_trade_date(contract) for contract in chain if last_trade_date(contract) >= today]
+        if not live:
+            return now
+        return calendar.timegm((live[0] + timedelta(days=1)).timetuple())
+
+    def load(self):
+        """Load unexpired chains from the persistent store"""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                records = json.load(f)
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        for record in records:
+            if now >= record["expires_at"] or now - record["stored_at"] >= self.ttl:
+                continue
+            chain = [Contract.create(**fields) for fields in record["chain"]]
+            self._entries[record["symbol"]] = (chain, record["stored_at"], record["expires_at"])
+            self._months.update((int(con_id), month) for con_id, month in record.get("months", {}).items())
+
+    def save(self):
+        """Write the cache to the persistent store"""
+        records = [
+            {
+                "symbol": symbol,
+                "chain": [util.dataclassNonDefaults(contract) for contract in chain],
+                "months": {str(c.conId): self._months[c.conId] for c in chain if c.conId in self._months},
+                "stored_at": stored_at,
+                "expires_at": expires_at
+            }
+            for symbol, (chain, stored_at, expires_at) in self._entries.items()
+        ]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(records, f)
+        os.replace(tmp_path, self.path)
@@ -2,24 +2,239 @@ from ib_insync import IB, Stock, Contract, MarketOrder
 from tkinter import messagebox
 from datetime import date
 import pandas as pd
+import asyncio
+import concurrent.futures
 import time
-from datetime import datetime
+import copy
+from datetime import datetime, timezone
+from src.contract_cache import ContractCache
+from src.event_loop import IBLoopThread, UIDispatcher
+from src.indicators import IndicatorEngine
+from src.bar_store import BarStore, bar_meta, duration_seconds
+from src.subscriptions import SubscriptionManager
+from src.request_scheduler import (RequestScheduler, TokenBucket, PRIORITY_USER, PRIORITY_BACKGROUND,
+                                   PACED_BAR_SECONDS, MESSAGE_RATE)
+from src.live_bars import BAR_SIZE_SECONDS
+from src.metrics import instrument_client
+from src.connection_pool import ConnectionPool, HEALTH_INTERVAL
+from src.orders import OrderTracker
+from src.futures_chain import FuturesChainCache, active_contract, continuous_series, last_trade_date, roll_time
 
 
+# Requests per second ib_insync sends before it queues the rest
+SEND_RATE = 45
+
+
+
+def valid_price(value):
+    """Return a price, or None for the missing/NaN/-1 values IB reports"""
+    if value is None or value != value or value <= 0:
+        return None
+    return value
+
 
 class IBKRClient:
 
-    def __init__(self, host='127.0.0.1', port=7497, clientId=1):
+    def __init__(self, host='127.0.0.1', port=7497, clientId=1, cache_ttl=86400, cache_path=None,
+                 threaded=False, bar_store_dir=None, market_data_lines=100, ib=None, connect=True,
+                 metrics=None, split_connections=True, ib_factory=IB, chain_cache_path=None):
         """Initialize IBKRClient with connection to IBKR
         
         Args:
             host (str): Host addr. for IB connection
             port (int): Port number for IB connection
-            clientId (int): Client ID for IB connection
+            clientId (int): Client ID of the order connection; market data
+                and history connections use the next two IDs
+            cache_ttl (float): Seconds a qualified contract is reused before
+                it is qualified again
+            cache_path (str, optional): File used to persist qualified contracts
+            threaded (bool): Run the IB event loop on a dedicated thread so
+                gateway calls never block the Tk main loop. Call ``attach_ui``
+                before streaming data to the UI in this mode.
+            bar_store_dir (str, optional): Directory for the local historical
+                bar store; when set only bars newer than the stored ones are
+                requested from the gateway
+            market_data_lines (int): Maximum number of simultaneous streaming
+                market data subscriptions
+            ib (IB, optional): Single connection object to use for every
+                workload, e.g. a ``FakeIB`` standing in for the gateway
+            connect (bool): Connect before returning; when False call
+                ``connect_async`` to connect in the background
+            metrics (Metrics, optional): Registry receiving method latencies,
+                gateway call latencies, tick counts and queue sizes
+            split_connections (bool): Use separate connections for orders and
+                account updates, market data, and historical data, so slow
+                history requests cannot delay orders
+            ib_factory (callable): Creates the connection objects
+            chain_cache_path (str, optional): File used to persist futures
+                chains
+        """
+        self.host = host
+        self.port = port
+        self.clientId = clientId
+        self.contract_cache = ContractCache(ttl=cache_ttl, path=cache_path)
+        self.futures_chains = FuturesChainCache(path=chain_cache_path)
+        self.bar_store = BarStore(bar_store_dir) if bar_store_dir else None
+        # Health checks need the event loop to run between requests
+        self.pool = ConnectionPool(host, port, clientId, ib=ib, ib_factory=ib_factory, split=split_connections,
+                                   health_interval=HEALTH_INTERVAL if threaded else None)
+        self.ib = self.pool["orders"]
+        self.data_ib = self.pool["data"]
+        self.history_ib = self.pool["history"]
+        self.loop_thread = None
+        self.dispatcher = None
+        if threaded:
+            self.loop_thread = IBLoopThread()
+            self.loop_thread.start()
+        self.subscriptions = SubscriptionManager(self.data_ib, market_data_lines, call=self._call)
+        self.scheduler = RequestScheduler()
+        data = self.pool.connection("data")
+        data.on_connect(lambda: self.data_ib.reqMarketDataType(3))
+        # Streams held by open windows resume after a dropped connection
+        data.on_connect(self.subscriptions.restore, reconnect_only=True)
+        self.metrics = metrics
+        self.orders = OrderTracker(metrics)
+        # Orders have their own connection, and so their own message budget
+        self.order_messages = TokenBucket(MESSAGE_RATE, MESSAGE_RATE)
+        if metrics is not None:
+            instrument_client(self, metrics)
+        if connect:
+            self._run(self._connect())
+
+    def connect_async(self):
+        """Connect to IBKR without blocking
+
+        Returns:
+            concurrent.futures.Future: Future resolving once the connection
+            is ready for requests
+        """
+        return self._submit(self._connect())
+
+    def is_connected(self):
+        """Return True while every connection is up"""
+        return self.pool.is_connected()
+
+    def watch_connections(self, callback):
+        """Receive connection state changes on the Tk thread
+
+        Args:
+            callback (callable): Called with the roles of the connection and
+                its new state: 'connecting', 'connected', 'reconnecting' or
+                'disconnected'
+
+        Returns:
+            callable: Call it to stop receiving changes
+        """
+        unwatches = [
+            connection.watch(lambda c: self.to_ui(callback, c.roles, c.state))
+            for connection in self.pool.connections()
+        ]
+
+        def unwatch():
+            for unwatch_one in unwatches:
+                unwatch_one()
+
+        return unwatch
+
+    def connection_stats(self):
+        """Return the state, client ID and reconnect count of every connection
+
+        Returns:
+            list: See ``ConnectionPool.stats``
+        """
+        return self._call(self.pool.stats)
+
+    async def _connect(self):
+        await self.pool.connect()
+
+    def attach_ui(self, widget, interval=15):
+        """Deliver results and streaming updates to the Tk thread
+
+        Args:
+            widget (tk.Widget): Widget whose ``after()`` drains the update queue
+            interval (int): Milliseconds between queue drains
+        """
+        self.dispatcher = UIDispatcher(widget, interval)
+        self.dispatcher.start()
+
+    def to_ui(self, callback, *args):
+        """Run ``callback(*args)`` on the Tk thread
+
+        Args:
+            callback (callable): Function to run
+            *args: Positional arguments for ``callback``
         """
-        self.ib = IB()
-        self.ib.connect(host, port, clientId)
-        self.ib.reqMarketDataType(3)
+        if self.dispatcher is None:
+            callback(*args)
+        else:
+            self.dispatcher.post(callback, *args)
+
+    def when_done(self, future, callback, errback=None):
+        """Run a callback on the Tk thread once a future completes
+
+        Args:
+            future (concurrent.futures.Future): Future from an ``*_async`` method
+            callback (callable): Called with the future's result
+            errback (callable, optional): Called with the exception if the
+                future fails; by default an error dialog is shown
+        """
+        def done(f):
+            error = f.exception()
+            if error is None:
+                self.to_ui(callback, f.result())
+            elif errback is not None:
+                self.to_ui(errback, error)
+            else:
+                self.to_ui(messagebox.showerror, "Request Error", str(error))
+
+        future.add_done_callback(done)
+
+    def scheduler_stats(self):
+        """Return the request scheduler's queue depth, counters and wait times
+
+        Returns:
+            dict: See ``RequestScheduler.stats``
+        """
+        return self._call(self.scheduler.stats)
+
+    def disconnect(self):
+        """Disconnect from IBKR and stop the event loop thread"""
+        if self.contract_cache.path:
+            self.contract_cache.save()
+        if self.futures_chains.path:
+            self.futures_chains.save()
+        if self.dispatcher is not None:
+            self.dispatcher.stop()
+        self._call(self.pool.disconnect)
+        if self.loop_thread is not None:
+            self.loop_thread.stop()
+
+    def _run(self, coro):
+        """Run a coroutine on the IB event loop and wait for its result"""
+        if self.loop_thread is None:
+            return self.ib.run(coro)
+        return self.loop_thread.submit(coro).result()
+
+    def _submit(self, coro):
+        """Run a coroutine on the IB event loop without waiting for it
+
+        Without a loop thread the coroutine runs to completion immediately and
+        an already finished future is returned.
+        """
+        if self.loop_thread is not None:
+            return self.loop_thread.submit(coro)
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(self.ib.run(coro))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _call(self, fn, *args):
+        """Call a non-blocking ib_insync method on the thread owning the connection"""
+        if self.loop_thread is None:
+            return fn(*args)
+        return self.loop_thread.call(fn, *args).result()
     
     def _create_contract(self, ticker_type, symbol, year_month=None, quarter_offset=0):
         """Create a contract object for a stock or future
@@ -96,14 +311,24 @@ class IBKRClient:
             tuple: (is_valid, message) where is_valid is a boolean indicating if the symbol
                    is valid, and message is an error message 
         """
+        return self._run(self._validate_symbol(ticker_type, symbol))
+
+    def validate_symbol_async(self, ticker_type, symbol):
+        """Non-blocking variant of validate_symbol
+
+        Returns:
+            concurrent.futures.Future: Future resolving to (is_valid, message)
+        """
+        return self._submit(self._validate_symbol(ticker_type, symbol))
+
+    async def _validate_symbol(self, ticker_type, symbol):
         if not symbol or not symbol.strip():
             return False, "Ticker symbol cannot be empty."
         if not symbol.isalnum():
             return False, "Ticker symbol must be alphanumeric."
 
         try:
-            contract = self._create_contract(ticker_type, symbol)
-            if not self.ib.qualifyContracts(contract):
+            if await self._qualify_contract(ticker_type, symbol) is None:
                 return False, f"No valid contract found for {symbol} as a {ticker_type.lower()}."
             return True, ""
         except ValueError as e:
@@ -111,6 +336,45 @@ class IBKRClient:
         except Exception as e:
             return False, f"Failed to validate {symbol}: {str(e)}"
     
+    async def _qualify_contract(self, ticker_type, symbol, year_month=None, quarter_offset=0):
+        """Return a qualified contract, using the contract cache when possible
+
+        Futures are looked up in the symbol's cached chain. Without an
+        expiration the contract that has not reached its roll date is used.
+        The quarterly guess is the fallback when the gateway returns no chain.
+
+        Args:
+            ticker_type (str): Type of ticker (stock or future)
+            symbol (str): Ticker symbol
+            year_month (str, optional): YYYYMM format for futures expiration
+            quarter_offset (int): Number of listed contracts to skip after the
+                front one for futures
+
+        Returns:
+            Contract: Qualified contract, or None if qualification fails
+
+        Raises:
+            ValueError: If ticker_type is invalid
+        """
+        if ticker_type == "Future":
+            chain = await self._futures_chain(symbol)
+            if chain:
+                if year_month is None:
+                    return active_contract(chain, quarter_offset)
+                months = [c for c in chain if self.futures_chains.contract_month(c) == year_month[:6]]
+                return months[0] if months else None
+        expiry = None
+        if ticker_type == "Future":
+            expiry = year_month or self._get_next_quarterly_expiration(offset=quarter_offset)
+        key = ContractCache.make_key(ticker_type, symbol, expiry)
+        contract = self.contract_cache.get(key)
+        if contract is None:
+            contract = self._create_contract(ticker_type, symbol, expiry)
+            if not await self.data_ib.qualifyContractsAsync(contract):
+                return None
+            self.contract_cache.put(key, contract)
+        return contract
+
     def get_contract(self, ticker_type, symbol, year_month=None, quarter_offset=0):
         """Retrieve contract for a stock or future
 
@@ -128,14 +392,148 @@ class IBKRClient:
             Exception: If contract qualification fails
         """
         try:
-            contract = self._create_contract(ticker_type, symbol, year_month, quarter_offset)
-            if not self.ib.qualifyContracts(contract):
+            contract = self._run(self._qualify_contract(ticker_type, symbol, year_month, quarter_offset))
+            if contract is None:
                 raise Exception(f"Failed to qualify contract for {symbol}")
             return contract
         except Exception as e:
             messagebox.showerror("Contract Error", f"An error occurred: {str(e)}")
             return None
 
+    def get_contract_async(self, ticker_type, symbol, year_month=None, quarter_offset=0):
+        """Non-blocking variant of get_contract
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the qualified
+            contract, or None if qualification fails
+        """
+        return self._submit(self._qualify_contract(ticker_type, symbol, year_month, quarter_offset))
+
+    def get_contracts_async(self, ticker_type, symbols):
+        """Qualify many contracts concurrently without blocking
+
+        Args:
+            ticker_type (str or list): Type of ticker (stock or future), or
+                one type per symbol
+            symbols (list): Ticker symbols
+
+        Returns:
+            concurrent.futures.Future: Future resolving to a list of qualified
+            contracts in the order of ``symbols``, with None where
+            qualification fails
+        """
+        return self._submit(self._qualify_contracts(ticker_type, symbols))
+
+    async def _qualify_contracts(self, ticker_type, symbols):
+        ticker_types = [ticker_type] * len(symbols) if isinstance(ticker_type, str) else ticker_type
+        results = await asyncio.gather(
+            *(self._qualify_contract(t, symbol) for t, symbol in zip(ticker_types, symbols)),
+            return_exceptions=True
+        )
+        return [result if isinstance(result, Contract) else None for result in results]
+
+
+    def get_futures_chain_async(self, symbol):
+        """Fetch every listed and recently expired contract of a future
+
+        The chain is requested once through contract details and cached
+        until its front contract expires.
+
+        Args:
+            symbol (str): Futures symbol
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the qualified
+            contracts sorted by last trade date, empty if the symbol is unknown
+        """
+        return self._submit(self._futures_chain(symbol))
+
+    async def _futures_chain(self, symbol):
+        chain = self.futures_chains.get(symbol)
+        if chain is None:
+            chain = await self.scheduler.submit(("chain", symbol.upper()), lambda: self._load_futures_chain(symbol))
+        return chain
+
+    async def _load_futures_chain(self, symbol):
+        details = await self.data_ib.reqContractDetailsAsync(
+            Contract(secType="FUT", symbol=symbol.upper(), exchange="CME", currency="USD", includeExpired=True))
+        contracts = {}
+        for detail in details:
+            month = detail.contractMonth or detail.contract.lastTradeDateOrContractMonth[:6]
+            contracts.setdefault(month, detail.contract)
+        if not contracts:
+            return []
+        months = {contract.conId: month for month, contract in contracts.items()}
+        return self.futures_chains.put(symbol, list(contracts.values()), months)
+
+    def get_continuous_history_async(self, symbol, duration="1 Y", barSize="1 day", adjust="difference",
+                                     priority=PRIORITY_USER):
+        """Build a roll-adjusted continuous history for a future without blocking
+
+        Each contract in the window contributes its bars until its roll
+        date. Expired contracts are read from the bar store once they have
+        been fetched, so only the live contract is refreshed from the gateway.
+
+        Args:
+            symbol (str): Futures symbol
+            duration (str): Duration of historical data
+            barSize (str): Bar size
+            adjust (str, optional): 'difference' or 'ratio' back-adjustment,
+                or None to splice raw prices
+            priority (int): Scheduler priority of the history requests
+
+        Returns:
+            concurrent.futures.Future: Future resolving to a DataFrame with the
+            bars and the 'contract' each was taken from; it raises ValueError
+            if the symbol has no chain
+        """
+        return self._submit(self._continuous_history(symbol, duration, barSize, adjust, priority))
+
+    async def _continuous_history(self, symbol, duration, barSize, adjust, priority):
+        chain = await self._futures_chain(symbol)
+        if not chain:
+            raise ValueError(f"No futures chain for {symbol}")
+        now = time.time()
+        start = now - duration_seconds(duration)
+        segments = []
+        previous_roll = float("-inf")
+        for contract in chain:
+            roll = roll_time(contract)
+            if roll > start:
+                segments.append((contract, previous_roll, roll))
+            previous_roll = roll
+            if roll > now:
+                break
+        if not segments:
+            raise ValueError(f"No contract of {symbol} covers {duration}")
+        # The live contract runs until now, past its roll date if nothing follows
+        contract, segment_start, _ = segments[-1]
+        segments[-1] = (contract, segment_start, float("inf"))
+        frames = await asyncio.gather(*(
+            self._contract_history(contract, duration, barSize, priority) for contract, _, _ in segments))
+        return continuous_series(
+            [(contract, df, max(seg_start, start), end) for (contract, seg_start, end), df in zip(segments, frames)],
+            adjust)
+
+    async def _contract_history(self, contract, duration, barSize, priority):
+        expiry = last_trade_date(contract)
+        if expiry >= date.today():
+            return await self._historical_data(contract, duration, barSize, 'TRADES', priority)
+        # Bars of an expired contract never change, so one fetch is kept for good
+        key = BarStore.make_key(contract, barSize, 'TRADES')
+        if self.bar_store is not None:
+            stored, meta = self.bar_store.load(key)
+            if stored is not None and meta.get("final"):
+                return BarStore.to_frame(stored, meta)
+        end = datetime.combine(expiry, datetime.max.time(), tzinfo=timezone.utc)
+        df = await self.scheduler.submit(
+            ("history", contract.conId, duration, barSize, 'TRADES', end.timestamp()),
+            lambda: self._fetch_bars(contract, duration, barSize, 'TRADES', allow_empty=True, end=end),
+            priority, paced=self._paced(barSize))
+        if self.bar_store is not None and not df.empty:
+            meta = dict(bar_meta(df, duration, end.timestamp()), final=True)
+            self.bar_store.save(key, BarStore.to_array(df), meta)
+        return df
 
     def get_market_data(self, contract, retries=3, delay=1):
         """Retrieve market data for a contract
@@ -151,22 +549,59 @@ class IBKRClient:
         Raises:
             ValueError: If market data is incomplete
         """
-        for attempt in range(retries):
-            try:
-                ticker = self.ib.reqMktData(contract, genericTickList='')
-                self.ib.sleep(1)
-                if not ticker.bid or not ticker.ask or not ticker.last:
-                    raise ValueError("Incomplete market data")
-                return {
-                    "bid": ticker.bid,
-                    "ask": ticker.ask,
-                    "last": ticker.last
-                }
-            except Exception as e:
+        try:
+            return self._run(self._market_data(contract, retries, delay))
+        except Exception as e:
+            messagebox.showerror("Market Data Error", f"Failed to fetch market data: {str(e)}")
+            return None
+
+    def get_market_data_async(self, contract, retries=3, delay=1):
+        """Non-blocking variant of get_market_data
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the quote dict; it
+            raises ValueError if market data stays incomplete
+        """
+        return self._submit(self._market_data(contract, retries, delay))
+
+    async def _market_data(self, contract, retries, delay):
+        # Borrow the shared stream; it stays warm as an idle line afterwards
+        handle = self.subscriptions.acquire(contract)
+        try:
+            for attempt in range(retries):
+                await asyncio.sleep(1)
+                ticker = handle.ticker
+                if ticker.bid and ticker.ask and ticker.last:
+                    return {
+                        "bid": ticker.bid,
+                        "ask": ticker.ask,
+                        "last": ticker.last
+                    }
                 if attempt == retries - 1:
-                    messagebox.showerror("Market Data Error", f"Failed to fetch market data: {str(e)}")
-                    return None
-                time.sleep(delay * (2 ** attempt))
+                    raise ValueError("Incomplete market data")
+                await asyncio.sleep(delay * (2 ** attempt))
+        finally:
+            handle.release()
+
+    def stream_market_data(self, contract, callback):
+        """Subscribe to streaming market data for a contract
+
+        Subscriptions are shared: every caller for the same contract gets its
+        own handle on a single gateway stream.
+
+        Args:
+            contract (Contract): IB contract object
+            callback (callable): Called with the ticker on every update; it
+                runs on the Tk thread when a UI is attached
+
+        Returns:
+            SubscriptionHandle: Handle exposing the ticker; call ``release()``
+            when the data is no longer needed
+
+        Raises:
+            LineBudgetError: If every market data line is in use
+        """
+        return self.subscriptions.acquire(contract, lambda t: self.to_ui(callback, t))
 
     def place_order(self, contract, action, quantity):
         """Place a market order for a contract
@@ -188,12 +623,97 @@ class IBKRClient:
                 raise ValueError("Invalid action")
 
             order = MarketOrder(action, quantity)
-            trade = self.ib.placeOrder(contract, order)
+            trade = self._call(self.ib.placeOrder, contract, order)
             return trade
         except Exception as e:
             messagebox.showerror("Order Error", f"Failed to place order: {str(e)}")
             return None
     
+    def place_order_async(self, contract, action, quantity, clicked_at=None):
+        """Place a market order without blocking and track it to its fills
+
+        The contract is used as it is, so pass one that is already
+        qualified. Follow the order with ``watch_orders``.
+
+        Args:
+            contract (Contract): Qualified IB contract object
+            action (str): Order action - 'BUY' or 'SELL'
+            quantity (int): Number of contracts or shares
+            clicked_at (float, optional): ``time.perf_counter()`` when the
+                user committed the order; defaults to now
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the OrderRecord
+
+        Raises:
+            ValueError: If quantity is invalid or action is not 'BUY' or 'SELL'.
+        """
+        self._check_order(action, quantity)
+        if clicked_at is None:
+            clicked_at = time.perf_counter()
+        return self._submit(self._place_order(contract, MarketOrder(action, quantity), clicked_at))
+
+    def place_basket_async(self, legs, clicked_at=None):
+        """Place many market orders at once without blocking
+
+        Every order is sent without waiting for the previous one to be
+        acknowledged, within IB's message rate. Nothing is sent if any leg is
+        invalid.
+
+        Args:
+            legs (list): (contract, action, quantity) tuples with qualified
+                contracts
+            clicked_at (float, optional): ``time.perf_counter()`` when the
+                user committed the basket; defaults to now
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the OrderRecords
+            in the order of ``legs``
+
+        Raises:
+            ValueError: If a quantity is invalid or an action is not 'BUY' or
+                'SELL'.
+        """
+        for _, action, quantity in legs:
+            self._check_order(action, quantity)
+        if clicked_at is None:
+            clicked_at = time.perf_counter()
+        return self._submit(self._place_basket(legs, clicked_at))
+
+    async def _place_basket(self, legs, clicked_at):
+        records = []
+        for contract, action, quantity in legs:
+            records.append(await self._place_order(contract, MarketOrder(action, quantity), clicked_at))
+        return records
+
+    async def _place_order(self, contract, order, clicked_at):
+        # Orders placed concurrently may have taken the token this one waited for
+        while (delay := self.order_messages.delay()) > 0:
+            await asyncio.sleep(delay)
+        self.order_messages.take()
+        return self.orders.track(self.ib.placeOrder(contract, order), clicked_at)
+
+    def _check_order(self, action, quantity):
+        if not isinstance(quantity, int) or quantity <= 0:
+            raise ValueError("Invalid quantity")
+        if action not in ("BUY", "SELL"):
+            raise ValueError("Invalid action")
+
+    def watch_orders(self, callback):
+        """Receive every change of the orders placed with ``place_order_async``
+
+        Args:
+            callback (callable): Called on the Tk thread with the OrderRecord
+
+        Returns:
+            callable: Call it to stop receiving changes
+        """
+        return self._call(self.orders.watch, lambda record: self.to_ui(callback, record))
+
+    def order_records(self):
+        """Return the orders placed with ``place_order_async``, oldest first"""
+        return self._call(self.orders.records)
+
     def get_historical_data(self, contract, duration="1 D", barSize="1 min"):
         """Retrieve historical market data for a contract
 
@@ -209,91 +729,309 @@ class IBKRClient:
             ValueError: If historical data is incomplete or invalid
         """
         try:
-            bars = self.ib.reqHistoricalData(
-                contract,
-                endDateTime='',
-                durationStr=duration,
-                barSizeSetting=barSize,
-                whatToShow='MIDPOINT',
-                useRTH=True
-            )
-            self.ib.sleep(1)
-            df = pd.DataFrame(bars)
-            if df.empty or 'close' not in df.columns or 'volume' not in df.columns:
-                raise ValueError("Historical data is incomplete or invalid")
-            return df
+            return self._run(self._historical_data(contract, duration, barSize))
         except Exception as e:
             messagebox.showerror("Historical Data Error", f"An error occurred: {str(e)}")
             return None
 
+    def get_historical_data_async(self, contract, duration="1 D", barSize="1 min", priority=PRIORITY_USER):
+        """Non-blocking variant of get_historical_data
+
+        Args:
+            priority (int): PRIORITY_USER, or PRIORITY_BACKGROUND for requests
+                nobody is waiting on, which are served after user requests
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the DataFrame; it
+            raises ValueError if the data is incomplete or invalid
+        """
+        return self._submit(self._historical_data(contract, duration, barSize, priority=priority))
+
+    def get_historical_data_before_async(self, contract, end, duration="1 D", barSize="1 min"):
+        """Fetch the bars that precede a point in time without blocking
+
+        Used to page older history into a chart; the local bar store is not
+        consulted.
+
+        Args:
+            contract (Contract): IB contract object
+            end (datetime): Timezone-aware end of the requested bars
+            duration (str): Duration of historical data before ``end``
+            barSize (str): Bar size
+
+        Returns:
+            concurrent.futures.Future: Future resolving to a DataFrame, which
+            is empty when the gateway has no older bars
+        """
+        key = ("before", contract.conId, end.timestamp(), duration, barSize)
+        return self._submit(self.scheduler.submit(
+            key, lambda: self._fetch_bars(contract, duration, barSize, 'MIDPOINT', allow_empty=True, end=end),
+            paced=self._paced(barSize)))
+
+    def get_historical_data_batch_async(self, contracts, duration="1 D", barSize="1 min", max_in_flight=50,
+                                        priority=PRIORITY_BACKGROUND):
+        """Fetch historical data for many contracts concurrently without blocking
+
+        Args:
+            contracts (list): Qualified IB contract objects
+            duration (str): Duration of historical data
+            barSize (str): Bar size
+            max_in_flight (int): Maximum number of requests outstanding at
+                once; IB rejects more than 50 simultaneous historical requests
+            priority (int): Scheduler priority; by default bulk requests give
+                way to the requests of individual windows
+
+        Returns:
+            concurrent.futures.Future: Future resolving to a list with one
+            DataFrame per contract, or the exception raised for it
+        """
+        return self._submit(self._historical_data_batch(contracts, duration, barSize, max_in_flight, priority))
+
+    async def _historical_data_batch(self, contracts, duration, barSize, max_in_flight, priority):
+        semaphore = asyncio.Semaphore(max_in_flight)
+
+        async def fetch(contract):
+            async with semaphore:
+                return await self._historical_data(contract, duration, barSize, priority=priority)
+
+        return await asyncio.gather(*(fetch(c) for c in contracts), return_exceptions=True)
+
+    def _paced(self, barSize):
+        """Return True if IB's historical pacing limit applies to a bar size"""
+        return BAR_SIZE_SECONDS.get(barSize, 86400) <= PACED_BAR_SECONDS
+
+    async def _historical_data(self, contract, duration, barSize, whatToShow='MIDPOINT', priority=PRIORITY_USER):
+        # Identical requests from several windows share a single gateway request
+        key = ("history", contract.conId, duration, barSize, whatToShow)
+        return await self.scheduler.submit(
+            key, lambda: self._load_history(contract, duration, barSize, whatToShow),
+            priority, paced=self._paced(barSize))
+
+    async def _load_history(self, contract, duration, barSize, whatToShow):
+        if self.bar_store is None:
+            return await self._fetch_bars(contract, duration, barSize, whatToShow)
+
+        key = BarStore.make_key(contract, barSize, whatToShow)
+        stored, meta = self.bar_store.load(key)
+        now = time.time()
+        if BarStore.covers(stored, meta, duration, now):
+            since = int(stored['time'][-1])
+            del stored
+            df = await self._fetch_bars(
+                contract, BarStore.delta_duration(since, now), barSize, whatToShow, allow_empty=True)
+            bars = self.bar_store.append(key, BarStore.to_array(df), meta)
+        else:
+            del stored
+            df = await self._fetch_bars(contract, duration, barSize, whatToShow)
+            meta = bar_meta(df, duration, now)
+            bars = BarStore.to_array(df)
+            self.bar_store.save(key, bars, meta)
+        return BarStore.to_frame(BarStore.select(bars, duration, now), meta)
+
+    async def _fetch_bars(self, contract, duration, barSize, whatToShow, allow_empty=False, end=''):
+        bars = await self.history_ib.reqHistoricalDataAsync(
+            contract,
+            endDateTime=end,
+            durationStr=duration,
+            barSizeSetting=barSize,
+            whatToShow=whatToShow,
+            useRTH=True
+        )
+        df = pd.DataFrame(bars)
+        if allow_empty and df.empty:
+            return df
+        if df.empty or 'close' not in df.columns or 'volume' not in df.columns:
+            raise ValueError("Historical data is incomplete or invalid")
+        return df
+
+    def get_market_data_batch(self, contracts, timeout=5):
+        """Retrieve snapshot quotes for many contracts in a single round trip
+
+        All snapshot requests are sent up front and then serviced together.
+        ib_insync sends only SEND_RATE requests per second, so the wait is
+        ``timeout`` plus the time needed to send the whole batch.
+
+        Args:
+            contracts (list): Qualified IB contract objects
+            timeout (float): Seconds to wait for the quotes once every request
+                has been sent
+
+        Returns:
+            list: One dict per contract with 'bid', 'ask' and 'last' prices
+                  (None where unavailable) and an 'error' message (None when
+                  a price was received)
+        """
+        return self._run(self._market_data_batch(contracts, timeout))
+
+    async def _market_data_batch(self, contracts, timeout):
+        tickers = [
+            self.data_ib.reqMktData(contract, genericTickList='', snapshot=True)
+            for contract in contracts
+        ]
+        deadline = time.monotonic() + timeout + len(contracts) / SEND_RATE
+        while time.monotonic() < deadline and not all(self._has_last(t) for t in tickers):
+            await asyncio.sleep(0.05)
+
+        quotes = []
+        for ticker in tickers:
+            last = valid_price(ticker.last)
+            if last is None:
+                # Fall back to the prior close when the market is shut
+                last = valid_price(ticker.close)
+            quotes.append({
+                "bid": valid_price(ticker.bid),
+                "ask": valid_price(ticker.ask),
+                "last": last,
+                "error": None if last is not None else "No quote received"
+            })
+        return quotes
+
+    def _has_last(self, ticker):
+        return (valid_price(ticker.last) is not None
+                or valid_price(ticker.close) is not None)
+
+    async def _position_contracts(self, positions):
+        """Make position contracts usable for market data requests
+
+        Position contracts already carry a conId but usually no exchange.
+        Stocks are routed through SMART, futures are taken from the contract
+        cache, and anything still missing an exchange is qualified in a single
+        batched request.
+
+        Args:
+            positions (list): Positions returned by ``ib.positions()``
+
+        Returns:
+            list: Contracts in the same order as ``positions``
+        """
+        contracts = []
+        unrouted = []
+        for pos in positions:
+            contract = copy.copy(pos.contract)
+            if not contract.exchange:
+                if contract.secType == "STK":
+                    contract.exchange = "SMART"
+                elif contract.secType == "FUT":
+                    key = ContractCache.make_key(
+                        "Future", contract.symbol, contract.lastTradeDateOrContractMonth[:6])
+                    cached = self.contract_cache.get(key)
+                    if cached is not None and cached.conId == contract.conId:
+                        contract = cached
+                    else:
+                        unrouted.append((key, contract))
+                else:
+                    unrouted.append((None, contract))
+            contracts.append(contract)
+        if unrouted:
+            qualified = await self.data_ib.qualifyContractsAsync(*(c for _, c in unrouted))
+            qualified = {id(c) for c in qualified}
+            for key, contract in unrouted:
+                if key is not None and id(contract) in qualified:
+                    self.contract_cache.put(key, contract)
+        return contracts
+
     def get_positions(self):
-        """Retrieve current account positions
+        """Retrieve current account positions valued at the latest price
+
+        Positions are valued in one batch; a position whose quote cannot be
+        retrieved is reported with no current price and an error message.
 
         Returns:
-            pandas.DataFrame: DataFrame with position details
+            pandas.DataFrame: DataFrame with position details, including the
+            'routed_contract' usable for market data requests
         """
+        return self._run(self._positions())
+
+    def get_positions_async(self, priority=PRIORITY_USER):
+        """Non-blocking variant of get_positions
+
+        Args:
+            priority (int): PRIORITY_USER or PRIORITY_BACKGROUND
+
+        Returns:
+            concurrent.futures.Future: Future resolving to the positions
+            DataFrame, or a message when no positions are held
+        """
+        return self._submit(self._positions(priority))
+
+    def get_position(self, contract):
+        """Return the position held in a contract from the locally synced state
+
+        Args:
+            contract (Contract): Qualified IB contract object
+
+        Returns:
+            Position: IB position object, or None if no position is held
+        """
+        for position in self.ib.positions():
+            if position.contract.conId == contract.conId and position.position:
+                return position
+        return None
+
+    def watch_positions(self, on_position=None, on_portfolio=None):
+        """Receive position and portfolio updates as they happen
+
+        Args:
+            on_position (callable, optional): Called with each changed Position
+            on_portfolio (callable, optional): Called with each changed
+                PortfolioItem, which includes the latest market price
+
+        Returns:
+            callable: Call it to stop receiving updates
+        """
+        handlers = []
+        for event, callback in ((self.ib.positionEvent, on_position),
+                                (self.ib.updatePortfolioEvent, on_portfolio)):
+            if callback is not None:
+                handler = (lambda cb: lambda item: self.to_ui(cb, item))(callback)
+                event += handler
+                handlers.append((event, handler))
+
+        def unwatch():
+            for event, handler in handlers:
+                event -= handler
+
+        return unwatch
+
+    async def _positions(self, priority=PRIORITY_USER):
+        return await self.scheduler.submit(("positions",), self._load_positions, priority)
+
+    async def _load_positions(self):
         positions = self.ib.positions()
         if not positions:
             return "No positions currently held."
-        
-        positions_summary = []
-        for pos in positions:
-            sec_type = pos.contract.secType
-
-            if sec_type == "FUT":
-                contract = self.get_contract(
-                    ticker_type="Future",
-                    symbol=pos.contract.symbol
-                )
-            else:
-                contract = self.get_contract(
-                    ticker_type="Stock",
-                    symbol=pos.contract.symbol
-                )
 
-            if contract is None:
-                continue
-
-            market_data = self.get_market_data(contract)
+        contracts = await self._position_contracts(positions)
+        quotes = await self._market_data_batch(contracts, timeout=5)
 
+        positions_summary = []
+        for pos, contract, quote in zip(positions, contracts, quotes):
             positions_summary.append({
+                "conId": pos.contract.conId,
                 "contract": f"{pos.contract.localSymbol} ({pos.contract.secType})",
                 "quantity": pos.position,
                 "average_cost": pos.avgCost,
-                "current_price": market_data["last"]
+                "current_price": quote["last"],
+                "error": quote["error"],
+                "routed_contract": contract
             })
 
         return pd.DataFrame(positions_summary)
 
 
-
-
-    def calculate_indicators(self, df):
+    def calculate_indicators(self, df, sma_period=14, ema_period=14, rsi_period=14):
         """Calculate technical indicators from historical data
 
+        The frame is not modified. Use ``IndicatorEngine`` directly to keep
+        the indicators updated bar by bar after seeding.
+
         Args:
             df (pandas.DataFrame): DataFrame with 'close' and 'volume' columns
+            sma_period (int): Period of the simple moving average
+            ema_period (int): Span of the exponential moving average
+            rsi_period (int): Period of the relative strength index
 
         Returns:
             dict: Dictionary with latest SMA, EMA, VWAP, and RSI values
         """
-        if df is None or df.empty or 'close' not in df.columns or 'volume' not in df.columns:
-            return {}
-
-        # Simple Moving Average (SMA)
-        df['SMA'] = df['close'].rolling(window=14, min_periods=1).mean()
-
-        # Exponential Moving Average (EMA)
-        df['EMA'] = df['close'].ewm(span=14, adjust=False).mean()
-
-        # VWAP Calculation
-        df['VWAP'] = (df['close'] * df['volume']).cumsum() / df['volume'].cumsum()
-
-        # RSI Calculation
-        delta = df['close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14, min_periods=1).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14, min_periods=1).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-
-        return df.iloc[-1][['SMA', 'EMA', 'VWAP', 'RSI']].to_dict()
\ No newline at end of file
+        return IndicatorEngine(sma_period, ema_period, rsi_period).seed(df)
@@ -0,0 +1,176 @@
+import math
+
+
+class RollingWindow:
+
+    def __init__(self, size):
+        """Initialize a fixed-size ring buffer that keeps a running sum
+
+        Args:
+            size (int): Number of values in the window
+        """
+        self.size = size
+        self.values = [0.0] * size
+        self.count = 0
+        self.total = 0.0
+        self._index = 0
+
+    def push(self, value):
+        """Add a value, dropping the oldest one once the window is full"""
+        if self.count == self.size:
+            self.total -= self.values[self._index]
+        else:
+            self.count += 1
+        self.values[self._index] = value
+        self.total += value
+        self._index = (self._index + 1) % self.size
+        if self._index == 0:
+            # Re-sum once per wrap so floating point drift cannot accumulate
+            self.total = math.fsum(self.values[:self.count])
+
+    def mean_with(self, value):
+        """Return the window mean as if ``value`` had been pushed"""
+        if self.count == self.size:
+            return (self.total - self.values[self._index] + value) / self.size
+        return (self.total + value) / (self.count + 1)
+
+    def mean(self):
+        """Return the mean of the values in the window"""
+        return self.total / self.count if self.count else math.nan
+
+
+class IndicatorEngine:
+
+    def __init__(self, sma_period=14, ema_period=14, rsi_period=14, rsi_smoothing="simple"):
+        """Initialize a streaming SMA/EMA/VWAP/RSI calculator
+
+        Each completed bar is folded into running state in constant time, so
+        the indicators can follow a live feed without recomputing history.
+
+        Args:
+            sma_period (int): Period of the simple moving average
+            ema_period (int): Span of the exponential moving average
+            rsi_period (int): Period of the relative strength index
+            rsi_smoothing (str): 'simple' for a rolling mean of gains and
+                losses (matches ``IBKRClient.calculate_indicators``) or
+                'wilder' for Wilder's smoothing
+
+        Raises:
+            ValueError: If a period is not positive or the smoothing is unknown
+        """
+        if min(sma_period, ema_period, rsi_period) < 1:
+            raise ValueError("Indicator periods must be positive")
+        if rsi_smoothing not in ("simple", "wilder"):
+            raise ValueError("RSI smoothing must be 'simple' or 'wilder'")
+        self.sma_period = sma_period
+        self.ema_period = ema_period
+        self.rsi_period = rsi_period
+        self.rsi_smoothing = rsi_smoothing
+        self.reset()
+
+    def reset(self):
+        """Clear all accumulated state"""
+        self._closes = RollingWindow(self.sma_period)
+        self._gains = RollingWindow(self.rsi_period)
+        self._losses = RollingWindow(self.rsi_period)
+        self._alpha = 2 / (self.ema_period + 1)
+        self._ema = None
+        self._avg_gain = 0.0
+        self._avg_loss = 0.0
+        self._deltas = 0
+        self._prev_close = None
+        self._cum_pv = 0.0
+        self._cum_volume = 0.0
+        self.bars = 0
+        self.values = {}
+
+    def seed(self, df):
+        """Reset the engine and feed it a frame of historical bars
+
+        Args:
+            df (pandas.DataFrame): DataFrame with 'close' and 'volume' columns
+
+        Returns:
+            dict: Dictionary with latest SMA, EMA, VWAP, and RSI values
+        """
+        self.reset()
+        if df is None or df.empty or 'close' not in df.columns or 'volume' not in df.columns:
+            return {}
+        for close, volume in zip(df['close'].tolist(), df['volume'].tolist()):
+            self.update(close, volume)
+        return self.values
+
+    def update(self, close, volume):
+        """Fold a completed bar into the indicators
+
+        Args:
+            close (float): Closing price of the bar
+            volume (float): Volume of the bar
+
+        Returns:
+            dict: Dictionary with latest SMA, EMA, VWAP, and RSI values
+        """
+        self.values = self.preview(close, volume)
+        gain, loss = self._gain_loss(close)
+        self._closes.push(close)
+        self._gains.push(gain)
+        self._losses.push(loss)
+        if self._prev_close is not None:
+            self._avg_gain, self._avg_loss = self._wilder_averages(gain, loss)
+            self._deltas += 1
+        self._ema = self.values['EMA']
+        self._cum_pv += close * volume
+        self._cum_volume += volume
+        self._prev_close = close
+        self.bars += 1
+        return self.values
+
+    def preview(self, close, volume=0.0):
+        """Return the indicators as if a bar were appended, without storing it
+
+        Use this to show live values for the bar that is still forming.
+
+        Args:
+            close (float): Latest price of the forming bar
+            volume (float): Volume traded so far in the forming bar
+
+        Returns:
+            dict: Dictionary with SMA, EMA, VWAP, and RSI values
+        """
+        ema = close if self._ema is None else self._ema + self._alpha * (close - self._ema)
+        cum_volume = self._cum_volume + volume
+        vwap = (self._cum_pv + close * volume) / cum_volume if cum_volume else math.nan
+        return {
+            'SMA': self._closes.mean_with(close),
+            'EMA': ema,
+            'VWAP': vwap,
+            'RSI': self._rsi_with(close)
+        }
+
+    def _gain_loss(self, close):
+        if self._prev_close is None:
+            return 0.0, 0.0
+        delta = close - self._prev_close
+        return max(delta, 0.0), max(-delta, 0.0)
+
+    def _wilder_averages(self, gain, loss):
+        deltas = self._deltas + 1
+        if deltas <= self.rsi_period:
+            # Plain average until the first full period has been seen
+            return (self._avg_gain * (deltas - 1) + gain) / deltas, \
+                   (self._avg_loss * (deltas - 1) + loss) / deltas
+        return (self._avg_gain * (self.rsi_period - 1) + gain) / self.rsi_period, \
+               (self._avg_loss * (self.rsi_period - 1) + loss) / self.rsi_period
+
+    def _rsi_with(self, close):
+        gain, loss = self._gain_loss(close)
+        if self.rsi_smoothing == "simple":
+            avg_gain = self._gains.mean_with(gain)
+            avg_loss = self._losses.mean_with(loss)
+        elif self._prev_close is None:
+            return math.nan
+        else:
+            avg_gain, avg_loss = self._wilder_averages(gain, loss)
+        if avg_loss == 0:
+            return 100.0 if avg_gain > 0 else math.nan
+        return 100 - (100 / (1 + avg_gain / avg_loss))
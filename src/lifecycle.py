@@ -0,0 +1,142 @@
+import traceback
+import weakref
+
+
+# Lifecycles that were created and not closed yet
+_open = weakref.WeakSet()
+
+
+def open_lifecycles():
+    """Return the lifecycles not closed yet, e.g. to detect leaked windows"""
+    return list(_open)
+
+
+class Lifecycle:
+
+    def __init__(self, widget, name=None):
+        """Initialize the set of resources owned by a window
+
+        Timers, event handlers, subscriptions and other cleanups registered
+        here are released together, last registered first, when ``close`` is
+        called or the widget is destroyed, whichever comes first.
+
+        Args:
+            widget (tk.Widget): Window owning the resources
+            name (str, optional): Name reported by ``stats``
+        """
+        self.widget = widget
+        self.name = name or str(widget)
+        self.closed = False
+        self._timers = {}
+        self._cleanups = []
+        self._counts = {}
+        widget.bind("<Destroy>", self._on_destroy, add="+")
+        _open.add(self)
+
+    def after(self, ms, callback, *args):
+        """Schedule a callback that is cancelled if the window closes first
+
+        Returns:
+            str: Timer ID, accepted by ``cancel``
+        """
+        def fire():
+            self._timers.pop(timer_id, None)
+            callback(*args)
+
+        timer_id = self.widget.after(ms, fire)
+        self._timers[timer_id] = callback
+        return timer_id
+
+    def every(self, ms, callback):
+        """Call ``callback()`` every ``ms`` milliseconds until the window closes"""
+        def tick():
+            callback()
+            if not self.closed:
+                self.after(ms, tick)
+
+        return self.after(ms, tick)
+
+    def cancel(self, timer_id):
+        """Cancel a timer scheduled with ``after``"""
+        if self._timers.pop(timer_id, None) is not None:
+            self.widget.after_cancel(timer_id)
+
+    def connect(self, event, handler):
+        """Attach an eventkit handler that is detached when the window closes
+
+        Returns:
+            callable: The handler
+        """
+        event += handler
+        self.add(lambda: event.disconnect(handler), "handler")
+        return handler
+
+    def hold(self, handle):
+        """Release a subscription handle when the window closes
+
+        Returns:
+            object: The handle
+        """
+        self.add(handle.release, "subscription")
+        return handle
+
+    def add(self, cleanup, kind="cleanup"):
+        """Run ``cleanup()`` when the window closes
+
+        Args:
+            cleanup (callable): Releases a resource, e.g. an unwatch function
+            kind (str): Resource kind counted in ``stats``
+        """
+        if self.closed:
+            cleanup()
+            return
+        self._cleanups.append((cleanup, kind))
+        self._counts[kind] = self._counts.get(kind, 0) + 1
+
+    def guard(self, callback):
+        """Wrap a callback so it does nothing once the window has closed
+
+        Use it for results and updates that may arrive after the close, such
+        as ``when_done`` callbacks and ticks already queued for the Tk thread.
+        """
+        def guarded(*args):
+            if not self.closed:
+                return callback(*args)
+
+        return guarded
+
+    def stats(self):
+        """Return the resources currently held
+
+        Returns:
+            dict: Dictionary with 'name', 'closed', 'timers' and a count per
+                  registered resource kind
+        """
+        stats = {"name": self.name, "closed": self.closed, "timers": len(self._timers)}
+        stats.update(self._counts)
+        return stats
+
+    def close(self):
+        """Cancel every timer and run every cleanup; later calls do nothing"""
+        if self.closed:
+            return
+        self.closed = True
+        _open.discard(self)
+        for timer_id in list(self._timers):
+            try:
+                self.widget.after_cancel(timer_id)
+            except Exception:
+                pass
+        self._timers.clear()
+        while self._cleanups:
+            cleanup, kind = self._cleanups.pop()
+            self._counts[kind] -= 1
+            try:
+                cleanup()
+            except Exception:
+                # One failing cleanup must not leak the resources after it
+                traceback.print_exc()
+
+    def _on_destroy(self, event):
+        if event.widget is self.widget:
+            self.close()
@@ -0,0 +1,151 @@
+import time
+
+
+BAR_SIZE_SECONDS = {
+    "1 secs": 1, "5 secs": 5, "10 secs": 10, "15 secs": 15, "30 secs": 30,
+    "1 min": 60, "2 mins": 120, "3 mins": 180, "5 mins": 300, "10 mins": 600,
+    "15 mins": 900, "20 mins": 1200, "30 mins": 1800,
+    "1 hour": 3600, "2 hours": 7200, "3 hours": 10800, "4 hours": 14400, "8 hours": 28800,
+    "1 day": 86400,
+}
+
+
+class LiveBarBuilder:
+
+    def __init__(self, bar_seconds=60, frame_interval=0.25):
+        """Initialize an aggregator that turns ticks into OHLCV bars
+
+        Args:
+            bar_seconds (int): Length of a bar in seconds
+            frame_interval (float): Minimum seconds between two bars handed
+                out by ``pending``
+        """
+        self.bar_seconds = bar_seconds
+        self.frame_interval = frame_interval
+        self.bar = None
+        self.ticks = 0
+        self._finished = None
+        self._dirty = False
+        self._last_flush = 0.0
+
+    def reset(self, bar_seconds=None):
+        """Drop the forming bar, optionally switching to a new bar length"""
+        if bar_seconds is not None:
+            self.bar_seconds = bar_seconds
+        self.bar = None
+        self._finished = None
+        self._dirty = False
+
+    def seed(self, start, open_, high, low, close, volume):
+        """Continue from a bar that was already formed, e.g. the last history bar
+
+        Args:
+            start (float): Bar start as a POSIX timestamp
+            open_ (float): Open price
+            high (float): High price
+            low (float): Low price
+            close (float): Close price
+            volume (float): Volume
+        """
+        self.bar = [self._bar_start(start), open_, high, low, close, max(volume, 0.0)]
+        self._dirty = False
+
+    def add_tick(self, price, size=0.0, timestamp=None):
+        """Fold a trade into the forming bar
+
+        Args:
+            price (float): Trade price
+            size (float): Trade size
+            timestamp (float, optional): Trade time as a POSIX timestamp
+
+        Returns:
+            list: The bar that was completed by this tick as
+                  [start, open, high, low, close, volume], or None
+        """
+        start = self._bar_start(time.time() if timestamp is None else timestamp)
+        bar = self.bar
+        completed = None
+        self.ticks += 1
+        self._dirty = True
+        if bar is None or start > bar[0]:
+            completed = bar
+            self._finished = completed
+            self.bar = [start, price, price, price, price, size]
+            return completed
+        if price > bar[2]:
+            bar[2] = price
+        if price < bar[3]:
+            bar[3] = price
+        bar[4] = price
+        bar[5] += size
+        return completed
+
+    def pending(self, now=None):
+        """Return the bars to draw if they changed and a frame interval has passed
+
+        When a bar was completed since the last call, its final state comes
+        first so the chart never keeps a stale copy of it.
+
+        Args:
+            now (float, optional): Current time from ``time.monotonic()``
+
+        Returns:
+            list: Bars as [start, open, high, low, close, volume] lists; empty
+                  if there is nothing to draw yet
+        """
+        now = time.monotonic() if now is None else now
+        if not self._dirty or now - self._last_flush < self.frame_interval:
+            return []
+        bars = [list(self._finished)] if self._finished is not None else []
+        bars.append(list(self.bar))
+        self._finished = None
+        self._dirty = False
+        self._last_flush = now
+        return bars
+
+    def _bar_start(self, timestamp):
+        return timestamp - timestamp % self.bar_seconds
+
+
+class TradeFilter:
+
+    def __init__(self):
+        """Initialize a detector of the trades reported by ticker updates
+
+        ib_insync emits a ticker update for every quote change as well, with
+        ``last`` and ``lastSize`` still holding the previous trade. An update
+        reports a new trade when the cumulative ``volume`` grew or, for
+        contracts without volume, when the last price or size changed.
+        """
+        self._volume = None
+        self._trade = None
+
+    def new_trade(self, ticker):
+        """Return the trade reported by a ticker update
+
+        Returns:
+            tuple: (price, size) of the new trade, or None for a quote-only
+                   update. The first update only reports the last price,
+                   with size 0, since its trade precedes the subscription.
+        """
+        last = ticker.last
+        if last is None or last != last or last <= 0:
+            return None
+        size = ticker.lastSize if ticker.lastSize == ticker.lastSize and ticker.lastSize else 0.0
+        volume = ticker.volume
+        trade = (last, size)
+        if volume is not None and volume == volume and volume >= 0:
+            previous, self._volume = self._volume, volume
+            if previous is None:
+                self._trade = trade
+                return last, 0.0
+            if volume <= previous:
+                # Unchanged, or reset for a new session
+                return None
+        elif trade == self._trade:
+            return None
+        elif self._trade is None:
+            self._trade = trade
+            return last, 0.0
+        self._trade = trade
+        return trade
@@ -1,10 +1,19 @@
+import time
+
+# Taken before the heavier imports so time to first paint covers them
+PROCESS_START = time.perf_counter()
+
 import ttkbootstrap as ttk
 from ttkbootstrap.dialogs import Messagebox
 from ttkbootstrap.constants import *
 import tkinter as tk
-import pandas as pd
-from ibkr_client import IBKRClient
-from src import create_popup_window
+import os
+from datetime import datetime
+
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".ibkr_ui")
+
+# Seconds from process start until the main window is drawn
+FIRST_PAINT_TARGET = 0.5
 
 
 def toggle_theme(app):
@@ -18,47 +27,115 @@ def toggle_theme(app):
     app.style.theme_use(new_theme)
 
 
-def populate_positions(tree, ibkr, positions_frame):
-    """Populate the Treeview with current positions 
-
-    Args:
-        tree (ttk.Treeview): The Treeview widget to display positions
-        ibkr (IBKRClient): IBClient instance
-        positions_frame (ttk.Frame): Frame containing treeview
-    """
-    for item in tree.get_children():
-        tree.delete(item)
-
-    positions = ibkr.get_positions()
-    if isinstance(positions, str):
-        label = ttk.Label(positions_frame, text=positions, font=("Helvetica", 12))
-        label.pack(pady=10)
-    else:
-        for _, row in positions.iterrows():
-            tree.insert("", "end", values=(
-                row["contract"],
-                row["quantity"],
-                f"${row['average_cost']:.2f}",
-                f"${row['current_price']:.2f}"
-            ))
-
+def create_app(connect=True):
+    """Build the main window and connect to IBKR once it has been drawn
 
-def main():
-    """Initialize and run application"""
+    Only ttkbootstrap is needed to draw the window. The client, pandas,
+    ib_insync and the chart library are imported after the first paint,
+    while the status bar shows the connection progress; controls that need
+    the gateway are enabled once it is connected.
 
-    ibkr = IBKRClient()
+    Args:
+        connect (bool): Connect after the first paint; False only builds
+            the window
 
+    Returns:
+        ttk.Window: The main window. ``app.first_paint`` holds the seconds
+        from process start to the first paint once it happened, and
+        ``app.ibkr`` the client once it was created, ``app.metrics`` its
+        metrics registry, and ``app.alerts`` the alert monitor once connected.
+    """
     app = ttk.Window(themename="flatly")
     app.title("IBKR Trading Interface")
     app.geometry("800x600")
     app.resizable(False, False)
+    app.first_paint = None
+    app.ibkr = None
+    app.metrics = None
+    app.alerts = None
+    positions_table = None
 
     menubar = tk.Menu(app)
     app.config(menu=menubar)
     theme_menu = tk.Menu(menubar, tearoff=0)
     theme_menu.add_command(label="Toggle Theme", command=lambda: toggle_theme(app))
+
+    # Streams are recorded to a new directory per session for later replay
+    recording = tk.BooleanVar(value=False)
+    app.stop_recording = None
+
+    def toggle_recording():
+        from src.tick_log import TickRecorder
+        if recording.get():
+            directory = os.path.join(DATA_DIR, "recordings", datetime.now().strftime("%Y%m%d-%H%M%S"))
+            app.stop_recording = TickRecorder(directory).attach_all(app.ibkr)
+        elif app.stop_recording is not None:
+            app.stop_recording()
+            app.stop_recording = None
+
+    theme_menu.add_checkbutton(label="Record Ticks", variable=recording, command=toggle_recording,
+                               state="disabled")
+
+    # Prometheus text on a local port plus a rolling CSV file
+    exporting = tk.BooleanVar(value=False)
+    app.exporters = []
+
+    def toggle_export():
+        from src.metrics import PrometheusExporter, CsvExporter
+        if exporting.get():
+            exporters = [PrometheusExporter(app.metrics), CsvExporter(app.metrics, os.path.join(DATA_DIR, "metrics.csv"))]
+            try:
+                for exporter in exporters:
+                    exporter.start()
+            except OSError as e:
+                Messagebox.show_error(f"Failed to export metrics: {e}", "Metrics Error")
+                exporting.set(False)
+                return
+            app.exporters = exporters
+            set_status(f"Serving metrics on http://127.0.0.1:{exporters[0].port}/metrics", "info")
+        else:
+            for exporter in app.exporters:
+                exporter.stop()
+            app.exporters = []
+
+    theme_menu.add_checkbutton(label="Export Metrics", variable=exporting, command=toggle_export,
+                               state="disabled")
     menubar.add_cascade(label="Options", menu=theme_menu)
 
+    def open_watchlist():
+        from src.watchlist import create_watchlist_window
+        create_watchlist_window(app, app.ibkr, os.path.join(DATA_DIR, "watchlist.json"))
+
+    def open_scanner():
+        from src.scanner import create_scanner_window
+        create_scanner_window(app, app.ibkr, os.path.join(DATA_DIR, "watchlist.json"))
+
+    def open_orders():
+        from src.order_blotter import create_order_blotter_window
+        create_order_blotter_window(app, app.ibkr)
+
+    def open_basket():
+        from src.basket import create_basket_window
+        create_basket_window(app, app.ibkr)
+
+    def open_alerts():
+        from src.alerts import create_alerts_window
+        create_alerts_window(app, app.alerts)
+
+    view_menu = tk.Menu(menubar, tearoff=0)
+    view_menu.add_command(label="Watchlist", command=open_watchlist, state="disabled")
+    view_menu.add_command(label="Scanner", command=open_scanner, state="disabled")
+    view_menu.add_command(label="Orders", command=open_orders, state="disabled")
+    view_menu.add_command(label="Basket Orders", command=open_basket, state="disabled")
+    view_menu.add_command(label="Alerts", command=open_alerts, state="disabled")
+
+    def open_metrics():
+        from src.metrics import create_metrics_overlay
+        create_metrics_overlay(app, app.metrics)
+
+    view_menu.add_command(label="Debug Metrics", command=open_metrics, state="disabled")
+    menubar.add_cascade(label="View", menu=view_menu)
+
     search_frame = ttk.Frame(app, padding=20)
     search_frame.pack(fill='x')
 
@@ -78,24 +155,41 @@ def main():
     symbol_entry = ttk.Entry(search_frame, width=25, font=("Helvetica", 12))
     symbol_entry.grid(row=2, column=1, padx=10, sticky='ew')
 
+    def search():
+        """Validate the symbol in the background and open its popup"""
+        from src.popup_window import create_popup_window
+        selected_type, symbol = ticker_type.get(), symbol_entry.get()
+
+        def on_validated(is_valid):
+            if not is_valid[0]:
+                Messagebox.show_error("Invalid Input", is_valid[1])
+            else:
+                create_popup_window(app, app.ibkr, selected_type, symbol, prewarm_chart=True)
+
+        app.ibkr.when_done(app.ibkr.validate_symbol_async(selected_type, symbol), on_validated)
+
     # Search button to open popup
     search_button = ttk.Button(
         search_frame,
         text="Search",
-        command=lambda: (
-            Messagebox.show_error("Invalid Input", is_valid[1])
-            if not (is_valid := ibkr.validate_symbol(ticker_type.get(), symbol_entry.get()))[0]
-            else create_popup_window(app, ibkr, ticker_type.get(), symbol_entry.get())
-        )
+        command=search,
+        state="disabled"
     )
     search_button.grid(row=3, column=0, columnspan=2, pady=15)
 
-    # Positions Frame 
+    # Connection status, shown until the gateway is ready
+    status_frame = ttk.Frame(app, padding=(20, 0))
+    status_frame.pack(side="bottom", fill='x')
+    status_label = ttk.Label(status_frame, font=("Helvetica", 10), bootstyle="secondary")
+    status_label.pack(side="left", pady=5)
+    retry_btn = ttk.Button(status_frame, text="Retry", bootstyle="link")
+
+    # Positions Frame
     positions_frame = ttk.Frame(app, padding=20)
     positions_frame.pack(fill='both', expand=True)
 
     # Treeview for positions
-    columns = ("contract", "quantity", "average_cost", "current_price")
+    columns = ("contract", "quantity", "average_cost", "current_price", "trend")
     tree = ttk.Treeview(positions_frame, columns=columns, show="headings", bootstyle="table")
 
     for col in columns:
@@ -103,21 +197,118 @@ def main():
         tree.column(col, anchor='center', width=150)
     tree.pack(fill='both', expand=True)
 
-    # Populate initial positions
-    populate_positions(tree, ibkr, positions_frame)
+    message_label = ttk.Label(positions_frame, font=("Helvetica", 12))
 
     # Refresh button
     refresh_btn = ttk.Button(
         positions_frame,
         text="Refresh Positions",
-        command=lambda: populate_positions(tree, ibkr, positions_frame)
+        command=lambda: positions_table.refresh(),
+        state="disabled"
     )
     refresh_btn.pack(pady=10)
 
+    def set_status(text, bootstyle):
+        status_label.config(text=text, bootstyle=bootstyle)
+
+    def start_client():
+        """Create the client after the first paint and connect in the background"""
+        from src.ibkr_client import IBKRClient
+        from src.metrics import Metrics, LoopLagMonitor
+        os.makedirs(DATA_DIR, exist_ok=True)
+        app.metrics = Metrics()
+        app.ibkr = IBKRClient(
+            cache_path=os.path.join(DATA_DIR, "contracts.json"),
+            chain_cache_path=os.path.join(DATA_DIR, "futures_chains.json"),
+            threaded=True,
+            bar_store_dir=os.path.join(DATA_DIR, "bars"),
+            connect=False,
+            metrics=app.metrics
+        )
+        app.ibkr.attach_ui(app)
+        app.ibkr.watch_connections(on_connection_change)
+        LoopLagMonitor(app, app.metrics).start()
+        theme_menu.entryconfig("Export Metrics", state="normal")
+        view_menu.entryconfig("Debug Metrics", state="normal")
+        connect_client()
+
+    def connect_client():
+        retry_btn.pack_forget()
+        set_status(f"Connecting to {app.ibkr.host}:{app.ibkr.port}...", "secondary")
+        app.ibkr.when_done(app.ibkr.connect_async(), on_connected, on_connect_failed)
+
+    def on_connected(_):
+        nonlocal positions_table
+        from src.positions_table import PositionsTable
+        set_status(f"Connected to {app.ibkr.host}:{app.ibkr.port}", "success")
+        for widget in (search_button, refresh_btn):
+            widget.config(state="normal")
+        theme_menu.entryconfig("Record Ticks", state="normal")
+        for label in ("Watchlist", "Scanner", "Orders", "Basket Orders", "Alerts"):
+            view_menu.entryconfig(label, state="normal")
+        # Rows follow position and portfolio events after the initial load
+        positions_table = PositionsTable(tree, message_label, app.ibkr)
+        positions_table.start()
+        start_alerts()
+
+    def start_alerts():
+        """Evaluate the saved alert rules while the app runs and pop up a toast per alert"""
+        from src.alerts import AlertMonitor
+        from ttkbootstrap.toast import ToastNotification
+        app.alerts = AlertMonitor(app, app.ibkr, os.path.join(DATA_DIR, "alerts.json"),
+                                  os.path.join(DATA_DIR, "alerts.log"))
+
+        def notify(alerts):
+            for alert in alerts[:3]:
+                ToastNotification("Alert", alert.message(), duration=5000, bootstyle="warning").show_toast()
+            if len(alerts) > 3:
+                ToastNotification("Alerts", f"{len(alerts) - 3} more alerts, see View > Alerts",
+                                  duration=5000, bootstyle="warning").show_toast()
+
+        app.alerts.watch(notify)
+        app.alerts.start()
+
+    def on_connection_change(roles, state):
+        """Report drops and recoveries once the first connect succeeded"""
+        if positions_table is None:
+            return
+        if state == "reconnecting":
+            set_status(f"Connection lost ({', '.join(roles)}), reconnecting...", "warning")
+        elif state == "connected" and app.ibkr.is_connected():
+            set_status(f"Connected to {app.ibkr.host}:{app.ibkr.port}", "success")
+
+    def on_connect_failed(error):
+        set_status(f"Not connected: {str(error) or type(error).__name__}", "danger")
+        retry_btn.pack(side="left", padx=5)
+
+    retry_btn.config(command=connect_client)
+
+    def on_first_paint(event):
+        if app.first_paint is None and event.widget is app:
+            app.first_paint = time.perf_counter() - PROCESS_START
+            if connect:
+                # Let the window finish drawing before the imports block the loop
+                app.after(1, start_client)
+
+    app.bind("<Map>", on_first_paint, add="+")
+    set_status("Starting...", "secondary")
+    return app
+
+
+def main():
+    """Initialize and run application"""
+    app = create_app()
     app.mainloop()
 
-    ibkr.disconnect()
+    from src.chart_window import get_chart_window
+    get_chart_window(app).close()
+    if app.stop_recording is not None:
+        app.stop_recording()
+    for exporter in app.exporters:
+        exporter.stop()
+    if app.ibkr is not None:
+        app.ibkr.disconnect()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,534 @@
+import bisect
+import concurrent.futures
+import csv
+import functools
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Milliseconds between two Tk heartbeats, and the lag counted as a stall
+LAG_INTERVAL_MS = 100
+STALL_SECONDS = 0.25
+
+# Gateway coroutines timed individually to tell them apart from local work
+GATEWAY_CALLS = ("connectAsync", "qualifyContractsAsync", "reqHistoricalDataAsync")
+
+PROMETHEUS_PORT = 9464
+
+# Seconds between two CSV rows, and the size at which the file is rolled over
+CSV_INTERVAL = 10
+CSV_MAX_BYTES = 5 * 1024 * 1024
+
+# Milliseconds between two refreshes of the debug overlay
+OVERLAY_REFRESH_MS = 1000
+
+# Seconds a gauge waits for the IB loop before the export skips it
+GAUGE_TIMEOUT = 0.5
+
+
+def _labels(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """Initialize a histogram with fixed bucket upper bounds
+
+        Args:
+            buckets (tuple): Increasing upper bounds; larger values fall in
+                an implicit +Inf bucket
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q):
+        """Estimate a quantile by interpolating within its bucket
+
+        Args:
+            q (float): Quantile between 0 and 1
+
+        Returns:
+            float: Estimated value, or 0.0 without observations
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = self.buckets[i - 1] if i else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return min(lower + (upper - lower) * (rank - seen) / count, self.max)
+            seen += count
+        return self.max
+
+    def copy(self):
+        other = Histogram(self.buckets)
+        other.counts = list(self.counts)
+        other.count, other.sum, other.max = self.count, self.sum, self.max
+        return other
+
+
+class Metrics:
+
+    def __init__(self):
+        """Initialize a thread-safe registry of histograms, counters and gauges
+
+        Histograms and counters are recorded as events happen; gauges are
+        functions read when the metrics are exported.
+        """
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._counters = {}
+        self._gauges = {}
+
+    def observe(self, name, value, **labels):
+        """Add a value, typically a duration in seconds, to a histogram"""
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def inc(self, name, amount=1, **labels):
+        """Increase a counter"""
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def gauge(self, name, fn):
+        """Register a gauge read on export
+
+        Args:
+            name (str): Metric name
+            fn (callable): Returns a number, or a dict of numbers keyed by
+                the value of a 'kind' label
+        """
+        with self._lock:
+            self._gauges[name] = fn
+
+    def time(self, name, **labels):
+        """Return a context manager recording the duration of its block"""
+        return _Timer(self, name, labels)
+
+    def snapshot(self):
+        """Return a consistent copy of every metric
+
+        Returns:
+            dict: 'time', plus 'histograms', 'counters' and 'gauges' keyed by
+                  (name, labels) where labels is a tuple of (key, value) pairs
+        """
+        with self._lock:
+            histograms = {key: h.copy() for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+            gauges = list(self._gauges.items())
+        values = {}
+        for name, fn in gauges:
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if isinstance(value, dict):
+                for kind, v in value.items():
+                    values[(name, (("kind", str(kind)),))] = v
+            elif value is not None:
+                values[(name, ())] = value
+        return {"time": time.time(), "histograms": histograms, "counters": counters, "gauges": values}
+
+    def prometheus_text(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        typed = set()
+
+        def declare(name, kind):
+            if name not in typed:
+                typed.add(name)
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), h in sorted(snapshot["histograms"].items()):
+            declare(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(h.buckets + ("+Inf",), h.counts):
+                cumulative += count
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {h.sum}")
+            lines.append(f"{name}_count{_format_labels(labels)} {h.count}")
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            declare(name, "counter")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        for (name, labels), value in sorted(snapshot["gauges"].items()):
+            declare(name, "gauge")
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _Timer:
+
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+def rates(previous, current, name):
+    """Return per-second rates of a counter between two snapshots
+
+    Args:
+        previous (dict): Earlier result of ``Metrics.snapshot``
+        current (dict): Later result of ``Metrics.snapshot``
+        name (str): Counter name
+
+    Returns:
+        dict: Rates keyed by the counter's labels
+    """
+    elapsed = current["time"] - previous["time"]
+    if elapsed <= 0:
+        return {}
+    return {
+        labels: (value - previous["counters"].get((n, labels), 0)) / elapsed
+        for (n, labels), value in current["counters"].items() if n == name
+    }
+
+
+def instrument_client(client, metrics):
+    """Record the latency of every public IBKRClient method, ticks and queues
+
+    Methods returning a future are timed until the future completes.
+    Gateway coroutines are also timed on their own, and the subscription
+    and request queue sizes and connection states are registered as gauges.
+
+    Args:
+        client (IBKRClient): Client to instrument
+        metrics (Metrics): Registry receiving the measurements
+    """
+    for name in dir(type(client)):
+        if name.startswith("_") or not callable(getattr(type(client), name)):
+            continue
+        setattr(client, name, _timed_method(metrics, getattr(client, name), name))
+    for connection in client.pool.connections():
+        for name in GATEWAY_CALLS:
+            if hasattr(connection.ib, name):
+                setattr(connection.ib, name, _timed_coroutine(metrics, getattr(connection.ib, name), name))
+
+    def count_tick(ticker):
+        contract = ticker.contract
+        metrics.inc("ibkr_ticks_total", symbol=contract.localSymbol or contract.symbol)
+
+    client.subscriptions.tap(count_tick)
+    metrics.gauge("ibkr_subscriptions", lambda: {
+        k: v for k, v in client.subscriptions.stats().items() if k in ("active", "idle", "listeners")})
+    metrics.gauge("ibkr_connected", lambda: {
+        ",".join(c.roles): int(c.state == "connected") for c in client.pool.connections()})
+    metrics.gauge("ibkr_reconnects", lambda: {
+        ",".join(c.roles): c.reconnects for c in client.pool.connections()})
+    metrics.gauge("ibkr_requests", lambda: {
+        k: v for k, v in _on_loop(client, client.scheduler.stats).items()
+        if k in ("queued_user", "queued_background", "in_flight")})
+
+
+def _on_loop(client, fn):
+    """Call ``fn`` on the IB loop thread, bypassing the timed public methods
+
+    Gauges use it so an export neither adds samples to the latency
+    histograms it reports nor waits more than GAUGE_TIMEOUT for a busy loop.
+    """
+    if client.loop_thread is None:
+        return fn()
+    future = client.loop_thread.call(fn)
+    try:
+        return future.result(timeout=GAUGE_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
+def _timed_method(metrics, method, name):
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            metrics.inc("ibkr_client_errors_total", method=name)
+            metrics.observe("ibkr_client_seconds", time.perf_counter() - start, method=name)
+            raise
+        if isinstance(result, concurrent.futures.Future):
+            def done(future):
+                if future.cancelled() or future.exception() is not None:
+                    metrics.inc("ibkr_client_errors_total", method=name)
+                metrics.observe("ibkr_client_seconds", time.perf_counter() - start, method=name)
+            result.add_done_callback(done)
+        else:
+            metrics.observe("ibkr_client_seconds", time.perf_counter() - start, method=name)
+        return result
+    return timed
+
+
+def _timed_coroutine(metrics, fn, name):
+    @functools.wraps(fn)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            metrics.observe("ibkr_gateway_seconds", time.perf_counter() - start, call=name)
+    return timed
+
+
+class LoopLagMonitor:
+
+    def __init__(self, widget, metrics, interval_ms=LAG_INTERVAL_MS, stall_seconds=STALL_SECONDS):
+        """Initialize a heartbeat measuring how late the Tk loop runs callbacks
+
+        Each heartbeat records how much later than scheduled it ran; a lag of
+        ``stall_seconds`` or more is counted as a stall.
+
+        Args:
+            widget (tk.Widget): Widget whose ``after()`` runs the heartbeat
+            metrics (Metrics): Registry receiving the measurements
+            interval_ms (int): Milliseconds between heartbeats
+            stall_seconds (float): Lag counted as a stall
+        """
+        self.widget = widget
+        self.metrics = metrics
+        self.interval_ms = interval_ms
+        self.stall_seconds = stall_seconds
+        self._after_id = None
+        self._due = None
+
+    def start(self):
+        if self._after_id is None:
+            self._schedule()
+
+    def stop(self):
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        self._due = time.perf_counter() + self.interval_ms / 1000
+        self._after_id = self.widget.after(self.interval_ms, self._beat)
+
+    def _beat(self):
+        lag = max(0.0, time.perf_counter() - self._due)
+        self.metrics.observe("tk_loop_lag_seconds", lag)
+        if lag >= self.stall_seconds:
+            self.metrics.inc("tk_stalls_total")
+        self._schedule()
+
+
+class PrometheusExporter:
+
+    def __init__(self, metrics, port=PROMETHEUS_PORT, host="127.0.0.1"):
+        """Initialize an HTTP endpoint serving the metrics at '/metrics'
+
+        Args:
+            metrics (Metrics): Registry to export
+            port (int): Port to listen on; 0 picks a free port
+            host (str): Interface to bind; local only by default
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+
+    def start(self):
+        """Start serving on a daemon thread
+
+        Raises:
+            OSError: If the port cannot be bound
+        """
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class CsvExporter:
+
+    def __init__(self, metrics, path, interval=CSV_INTERVAL, max_bytes=CSV_MAX_BYTES):
+        """Initialize a writer appending the metrics to a rolling CSV file
+
+        Every interval one row per series is written with columns time,
+        metric, labels, stat and value. Histograms are written as count, p50,
+        p95 and max, counters as total and per-second rate. Once the file
+        exceeds ``max_bytes`` it is renamed with a '.1' suffix, replacing the
+        previous one, and a new file is started.
+
+        Args:
+            metrics (Metrics): Registry to export
+            path (str): CSV file
+            interval (float): Seconds between two writes
+            max_bytes (int): Size at which the file is rolled over
+        """
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self._stop = threading.Event()
+        self._thread = None
+        self._previous = None
+
+    def start(self):
+        """Start writing on a daemon thread"""
+        self._stop.clear()
+        self._previous = self.metrics.snapshot()
+        self._thread = threading.Thread(target=self._run, name="metrics-csv", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop writing after a final row"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+        self.write()
+
+    def write(self):
+        """Append the current metrics"""
+        snapshot = self.metrics.snapshot()
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(snapshot["time"]))
+        rows = []
+        for (name, labels), h in sorted(snapshot["histograms"].items()):
+            label_text = _format_labels(labels)
+            rows += [(stamp, name, label_text, "count", h.count),
+                     (stamp, name, label_text, "p50", h.quantile(0.5)),
+                     (stamp, name, label_text, "p95", h.quantile(0.95)),
+                     (stamp, name, label_text, "max", h.max)]
+        for name in sorted({name for name, _ in snapshot["counters"]}):
+            for labels, rate in sorted(rates(self._previous, snapshot, name).items()):
+                label_text = _format_labels(labels)
+                rows += [(stamp, name, label_text, "total", snapshot["counters"][(name, labels)]),
+                         (stamp, name, label_text, "rate", rate)]
+        for (name, labels), value in sorted(snapshot["gauges"].items()):
+            rows.append((stamp, name, _format_labels(labels), "value", value))
+        self._previous = snapshot
+
+        if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+            os.replace(self.path, self.path + ".1")
+        new_file = not os.path.exists(self.path)
+        with open(self.path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if new_file:
+                writer.writerow(("time", "metric", "labels", "stat", "value"))
+            writer.writerows(rows)
+
+
+def overlay_text(previous, current, top=8):
+    """Summarize two snapshots as the text of the debug overlay"""
+    lines = []
+    lag = current["histograms"].get(("tk_loop_lag_seconds", ()))
+    if lag is not None:
+        stalls = current["counters"].get(("tk_stalls_total", ()), 0)
+        lines.append(f"Tk lag  p95 {lag.quantile(0.95) * 1000:.0f} ms  max {lag.max * 1000:.0f} ms  stalls {stalls}")
+    gauges = current["gauges"]
+    lines.append("Requests  " + "  ".join(
+        f"{labels[0][1]} {value}" for (name, labels), value in sorted(gauges.items()) if name == "ibkr_requests"))
+    lines.append("Streams  " + "  ".join(
+        f"{labels[0][1]} {value}" for (name, labels), value in sorted(gauges.items()) if name == "ibkr_subscriptions"))
+
+    tick_rates = sorted(rates(previous, current, "ibkr_ticks_total").items(), key=lambda item: -item[1])
+    lines.append(f"Ticks/s  {sum(rate for _, rate in tick_rates):.1f}")
+    lines += [f"  {dict(labels).get('symbol', '?'):<12}{rate:8.1f}" for labels, rate in tick_rates[:top]]
+
+    slowest = []
+    for (name, labels), h in current["histograms"].items():
+        if name == "ibkr_client_seconds":
+            slowest.append((dict(labels)["method"], h))
+        elif name == "ibkr_gateway_seconds":
+            slowest.append(("ib." + dict(labels)["call"], h))
+    slowest.sort(key=lambda item: -item[1].quantile(0.95))
+    lines.append("Slowest p95 / max (ms)")
+    lines += [f"  {name:<32}{h.quantile(0.95) * 1000:8.1f}{h.max * 1000:9.1f}" for name, h in slowest[:top]]
+    return "\n".join(lines)
+
+
+def create_metrics_overlay(parent, metrics):
+    """Open a small always-on-top window showing live metrics
+
+    Args:
+        parent (tk.Widget): Parent widget (typically the main application window).
+        metrics (Metrics): Registry to display
+
+    Returns:
+        ttk.Toplevel: The overlay window.
+    """
+    import ttkbootstrap as ttk
+    from src.lifecycle import Lifecycle
+
+    overlay = ttk.Toplevel(parent)
+    overlay.title("Debug Metrics")
+    overlay.attributes("-topmost", True)
+    label = ttk.Label(overlay, font=("Courier", 10), justify="left", padding=10)
+    label.pack(fill="both", expand=True)
+    previous = metrics.snapshot()
+
+    def refresh():
+        nonlocal previous
+        current = metrics.snapshot()
+        label.config(text=overlay_text(previous, current))
+        previous = current
+
+    refresh()
+    Lifecycle(overlay, "metrics overlay").every(OVERLAY_REFRESH_MS, refresh)
+    return overlay
@@ -0,0 +1,137 @@
+import ttkbootstrap as ttk
+
+from src.lifecycle import Lifecycle
+
+
+COLUMNS = ("order", "contract", "action", "quantity", "status", "filled", "avg_price", "ack_ms", "fill_ms")
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:.0f}" if seconds is not None else ""
+
+
+def order_summary(record):
+    """Return a one-line description of an order and its latencies"""
+    trade = record.trade
+    text = f"#{record.order_id} {trade.order.action} {trade.order.totalQuantity:g} {record.status}"
+    if trade.orderStatus.filled:
+        text += f" {trade.orderStatus.filled:g} @ {trade.orderStatus.avgFillPrice:.2f}"
+    if record.ack_latency is not None:
+        text += f" · ack {format_ms(record.ack_latency)} ms"
+    if record.fill_latency is not None:
+        text += f" · fill {format_ms(record.fill_latency)} ms"
+    return text
+
+
+def _median(values):
+    values = sorted(values)
+    if not values:
+        return None
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2
+
+
+class OrderBlotter:
+
+    def __init__(self, tree, summary_label, ibkr_client):
+        """Initialize a Treeview listing the orders placed in this session
+
+        Rows are keyed by order ID and updated in place as status and fill
+        events arrive, with the click-to-ack and ack-to-fill latency of each
+        order.
+
+        Args:
+            tree (ttk.Treeview): Treeview with the COLUMNS columns
+            summary_label (ttk.Label): Label showing the median latencies
+            ibkr_client (IBKRClient): Instance of IBKRClient for API interactions
+        """
+        self.tree = tree
+        self.summary_label = summary_label
+        self.ibkr_client = ibkr_client
+        self._records = {}
+        self._unwatch = None
+
+    def start(self):
+        """Show the orders placed so far and follow their changes"""
+        self._unwatch = self.ibkr_client.watch_orders(self.update)
+        for record in self.ibkr_client.order_records():
+            self.update(record)
+
+    def stop(self):
+        if self._unwatch is not None:
+            self._unwatch()
+            self._unwatch = None
+
+    def update(self, record):
+        """Insert or refresh the row of an order"""
+        trade = record.trade
+        status = trade.orderStatus
+        values = (
+            record.order_id,
+            trade.contract.localSymbol or trade.contract.symbol,
+            trade.order.action,
+            f"{trade.order.totalQuantity:g}",
+            record.status,
+            f"{status.filled:g}",
+            f"${status.avgFillPrice:.2f}" if status.filled else "",
+            format_ms(record.ack_latency),
+            format_ms(record.fill_latency)
+        )
+        iid = str(record.order_id)
+        if iid in self._records:
+            self.tree.item(iid, values=values)
+        else:
+            self.tree.insert("", 0, iid=iid, values=values)
+        self._records[iid] = record
+        self._update_summary()
+
+    def _update_summary(self):
+        acks = [r.ack_latency for r in self._records.values() if r.ack_latency is not None]
+        fills = [r.fill_latency for r in self._records.values() if r.fill_latency is not None]
+        text = f"{len(self._records)} orders"
+        if acks:
+            text += f" · median click-to-ack {format_ms(_median(acks))} ms"
+        if fills:
+            text += f" · median ack-to-fill {format_ms(_median(fills))} ms"
+        self.summary_label.config(text=text)
+
+
+def create_order_blotter_window(parent, ibkr_client):
+    """Create a window with the live order blotter
+
+    Args:
+        parent (tk.Widget): Parent widget (typically the main application window).
+        ibkr_client (IBKRClient): Instance of IBKRClient for API interactions.
+
+    Returns:
+        ttk.Toplevel: The blotter window.
+    """
+    window = ttk.Toplevel(parent)
+    window.title("Orders")
+    window.geometry("900x400")
+
+    tree_frame = ttk.Frame(window, padding=10)
+    tree_frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(tree_frame, columns=COLUMNS, show="headings", bootstyle="table")
+    for col in COLUMNS:
+        tree.heading(col, text=col.replace("_", " ").title().replace("Ms", "(ms)"))
+        tree.column(col, anchor="center", width=95)
+    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(side="left", fill="both", expand=True)
+
+    summary_label = ttk.Label(window, font=("Helvetica", 10), bootstyle="secondary")
+    summary_label.pack(fill="x", padx=10, pady=(0, 10))
+
+    blotter = OrderBlotter(tree, summary_label, ibkr_client)
+    blotter.start()
+    life = Lifecycle(window, "orders")
+    life.add(blotter.stop, "listener")
+
+    def on_close():
+        life.close()
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    return window
@@ -0,0 +1,173 @@
+import time
+
+
+# Statuses of an order the gateway has not acknowledged yet
+PENDING_STATUSES = ("PendingSubmit", "ApiPending")
+
+# Statuses after which an order no longer changes
+DONE_STATUSES = ("Filled", "Cancelled", "ApiCancelled", "Inactive")
+
+
+class OrderRecord:
+
+    def __init__(self, trade, clicked_at):
+        """Initialize the latency record of a placed order
+
+        Timestamps are ``time.perf_counter()`` values taken on the thread
+        owning the connection as the events arrive.
+
+        Args:
+            trade (Trade): IB trade returned by ``placeOrder``
+            clicked_at (float): Time the user committed the order
+        """
+        self.trade = trade
+        self.clicked_at = clicked_at
+        self.sent_at = time.perf_counter()
+        self.acked_at = None
+        self.filled_at = None
+        self.done_at = None
+
+    @property
+    def order_id(self):
+        return self.trade.order.orderId
+
+    @property
+    def status(self):
+        return self.trade.orderStatus.status
+
+    @property
+    def ack_latency(self):
+        """Seconds from click to the gateway's acknowledgement, or None"""
+        return None if self.acked_at is None else self.acked_at - self.clicked_at
+
+    @property
+    def fill_latency(self):
+        """Seconds from acknowledgement to the first fill, or None"""
+        if self.filled_at is None or self.acked_at is None:
+            return None
+        return self.filled_at - self.acked_at
+
+    @property
+    def done(self):
+        return self.status in DONE_STATUSES
+
+
+class OrderTracker:
+
+    def __init__(self, metrics=None):
+        """Initialize a tracker following placed orders through their events
+
+        Args:
+            metrics (Metrics, optional): Registry receiving click-to-ack and
+                ack-to-fill latencies
+        """
+        self.metrics = metrics
+        self._records = {}
+        self._listeners = []
+
+    def track(self, trade, clicked_at):
+        """Follow a trade's status and fills
+
+        Must be called on the thread owning the connection, right after
+        ``placeOrder``.
+
+        Args:
+            trade (Trade): IB trade returned by ``placeOrder``
+            clicked_at (float): ``time.perf_counter()`` when the user
+                committed the order
+
+        Returns:
+            OrderRecord: The record, updated as events arrive
+        """
+        record = OrderRecord(trade, clicked_at)
+        self._records[record.order_id] = record
+        trade.statusEvent += lambda t: self._on_status(record)
+        trade.fillEvent += lambda t, fill: self._on_fill(record)
+        # The gateway may have answered before the handlers were attached
+        if trade.fills:
+            self._on_fill(record)
+        else:
+            self._on_status(record)
+        return record
+
+    def watch(self, listener):
+        """Call ``listener(record)`` whenever a tracked order changes
+
+        Returns:
+            callable: Call it to stop receiving changes
+        """
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def records(self):
+        """Return the tracked orders, oldest first"""
+        return list(self._records.values())
+
+    def stats(self):
+        """Return the number of tracked orders and of listeners
+
+        Returns:
+            dict: Dictionary with 'orders' and 'listeners'
+        """
+        return {"orders": len(self._records), "listeners": len(self._listeners)}
+
+    def _on_status(self, record):
+        now = time.perf_counter()
+        status = record.status
+        if record.acked_at is None and status and status not in PENDING_STATUSES:
+            record.acked_at = now
+            self._observe("order_ack_seconds", record.ack_latency)
+        if record.done_at is None and status in DONE_STATUSES:
+            record.done_at = now
+        self._notify(record)
+
+    def _on_fill(self, record):
+        now = time.perf_counter()
+        if record.acked_at is None:
+            record.acked_at = now
+            self._observe("order_ack_seconds", record.ack_latency)
+        if record.filled_at is None:
+            record.filled_at = now
+            self._observe("order_fill_seconds", record.fill_latency)
+        self._on_status(record)
+
+    def _observe(self, name, value):
+        if self.metrics is not None:
+            self.metrics.observe(name, value)
+
+    def _notify(self, record):
+        for listener in list(self._listeners):
+            listener(record)
+
+
+def throughput(records):
+    """Measure how fast a group of orders committed together was processed
+
+    Args:
+        records (list): OrderRecords sharing a click time, e.g. a basket
+
+    Returns:
+        dict: Dictionary with 'orders', 'sent', 'acked', 'filled' and 'done'
+              counts, and 'sent_per_second', 'acked_per_second' and
+              'filled_per_second' rates measured from the click to the last
+              such event (None until there is one)
+    """
+    def rate(times):
+        if not times:
+            return None
+        elapsed = max(times) - min(r.clicked_at for r in records)
+        return len(times) / elapsed if elapsed > 0 else None
+
+    sent = [r.sent_at for r in records]
+    acked = [r.acked_at for r in records if r.acked_at is not None]
+    filled = [r.filled_at for r in records if r.filled_at is not None]
+    return {
+        "orders": len(records),
+        "sent": len(sent),
+        "acked": len(acked),
+        "filled": len(filled),
+        "done": sum(r.done for r in records),
+        "sent_per_second": rate(sent),
+        "acked_per_second": rate(acked),
+        "filled_per_second": rate(filled)
+    }
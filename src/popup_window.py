@@ -3,12 +3,48 @@ from ttkbootstrap.tooltip import ToolTip
 from ttkbootstrap.constants import *
 import tkinter as tk
 from tkinter import messagebox
-from lightweight_charts import Chart
-from src import request_market_data, confirm_and_place_order
-from datetime import datetime
+from src import request_market_data
+from src.indicators import IndicatorEngine
+from src.live_bars import LiveBarBuilder, TradeFilter
+from src.bar_store import to_epoch, duration_seconds
+from src.render_scheduler import RenderScheduler
+from src.ibkr_client import valid_price
+from src.subscriptions import LineBudgetError
+from src.chart_data import bar_size_for, candle_frame, line_frame, chart_times
+from src.chart_window import get_chart_window
+from src.lifecycle import Lifecycle
+from src.order_blotter import order_summary
+from src.request_scheduler import PRIORITY_USER, PRIORITY_BACKGROUND
+from src.live_bars import BAR_SIZE_SECONDS
+from datetime import datetime, timezone
+import time
 import pandas as pd
 
-def create_popup_window(parent, ibkr_client, ticker_type, symbol):
+# Minimum seconds between two live bar updates sent to the chart
+CHART_FRAME_INTERVAL = 0.25
+
+# Maximum repaints per second of the streaming quote and indicator labels
+RENDER_FPS = 20
+
+# Older history is requested once fewer bars than this are left of the view
+LAZY_LOAD_MARGIN = 50
+
+# Seconds for which fetched history is reused instead of requested again
+HISTORY_REUSE_SECONDS = 60
+
+# Futures charts spanning more than three months are drawn from the continuous series
+CONTINUOUS_MIN_SECONDS = duration_seconds("3 M")
+
+
+def price_formatter(name):
+    """Return a formatter rendering a value as 'Name: 1.23', or N/A if missing."""
+    def format_value(value):
+        if value is None or value != value:
+            return f"{name}: N/A"
+        return f"{name}: {value:.2f}"
+    return format_value
+
+def create_popup_window(parent, ibkr_client, ticker_type, symbol, prewarm_chart=False):
     """Create a popup window for market data, indicators, and order placement.
 
     Args:
@@ -16,6 +52,8 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
         ibkr_client (IBKRClient): Instance of IBKRClient for API interactions.
         ticker_type (str): Type of ticker ('Stock' or 'Future').
         symbol (str): Ticker symbol (e.g., 'AAPL', 'ES').
+        prewarm_chart (bool): Start the shared chart window in the background
+            so the first 'View Chart' only has to send data.
 
     Returns:
         ttk.Toplevel: The popup window.
@@ -25,6 +63,14 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     popup.geometry("900x700")
     popup.resizable(False, False)
     
+    # Timers, listeners, streams and the chart are released when the popup goes
+    life = Lifecycle(popup, f"popup {symbol}")
+    popup.lifecycle = life
+    
+    def when_done(future, callback, errback):
+        """Deliver a result unless the popup closed while it was pending."""
+        ibkr_client.when_done(future, life.guard(callback), life.guard(errback))
+    
     main_frame = ttk.Frame(popup, padding=20)
     main_frame.grid(row=0, column=0, sticky="nsew")
     main_frame.columnconfigure(0, weight=1)
@@ -53,64 +99,154 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     time_frame_combobox = ttk.Combobox(
         time_frame_frame,
         textvariable=time_frame_var,
-        values=["1 D", "5 D", "1 M", "3 M"],
+        values=["1 D", "5 D", "1 M", "3 M", "6 M", "1 Y"],
         state="readonly",
         width=10
     )
     time_frame_combobox.pack(side="left", padx=5)
     
-    chart = None
-    chart_window = None
-    
-    def calculate_sma(df, period=14):
-        """Calculate Simple Moving Average for the given period."""
-        return pd.DataFrame({
-            'time': df['time'],
-            f'SMA {period}': df['close'].rolling(window=period).mean()
-        }).dropna()
+    # Streaming values are stored numerically and repainted at a capped rate
+    render = RenderScheduler(popup, fps=RENDER_FPS)
+    life.add(render.stop, "timer")
+    popup.render_scheduler = render
+    
+    # One chart window is shared by all popups and only hidden between uses
+    charts = get_chart_window(parent)
+    life.add(lambda: charts.release(popup), "chart")
+    if prewarm_chart:
+        charts.prewarm()
+    chart_tz = None
+    chart_bars = LiveBarBuilder(bar_seconds=60, frame_interval=CHART_FRAME_INTERVAL)
+    
+    # Full-resolution history behind the chart, paged backwards on scroll
+    chart_history = None
+    chart_live = {}
+    chart_request = None
+    loading_older = False
+    history_exhausted = False
+    
+    # Recently fetched history by (duration, bar size), with its fetch time
+    history_cache = {}
+    
+    def cache_history(duration, bar_size, historical_data):
+        """Remember fetched history so the chart can reuse it."""
+        history_cache[(duration, bar_size)] = (time.monotonic(), historical_data)
     
     def show_chart():
-        """Open a chart window with historical data and SMA."""
-        nonlocal chart, chart_window
-        historical_data = ibkr_client.get_historical_data(contract, duration=time_frame_var.get())
+        """Show the chart, fetching history in the background unless it is recent."""
+        duration = time_frame_var.get()
+        bar_size = bar_size_for(duration)
+        cached = history_cache.get((duration, bar_size))
+        if cached is not None and time.monotonic() - cached[0] < HISTORY_REUSE_SECONDS:
+            open_chart(cached[1], duration, bar_size)
+            return
+        
+        def on_history(historical_data):
+            if historical_data is not None and not historical_data.empty:
+                cache_history(duration, bar_size, historical_data)
+            open_chart(historical_data, duration, bar_size)
+        
+        if ticker_type == "Future" and duration_seconds(duration) > CONTINUOUS_MIN_SECONDS:
+            # Long futures charts span several expiries, spliced and back-adjusted
+            request = ibkr_client.get_continuous_history_async(symbol, duration=duration, barSize=bar_size)
+        else:
+            request = ibkr_client.get_historical_data_async(contract, duration=duration, barSize=bar_size)
+        when_done(
+            request,
+            on_history,
+            lambda e: messagebox.showerror("Historical Data Error", f"An error occurred: {str(e)}")
+        )
+
+    def live_date(start):
+        """Return a live bar's start in the format of the history dates."""
+        return datetime.fromtimestamp(start, chart_tz) if chart_tz else datetime.fromtimestamp(start)
+
+    def draw_history():
+        """Send the history and live bars to the chart within the point budget."""
+        bars = chart_history
+        last = to_epoch(bars["date"].iloc[-1])
+        live = [(live_date(start),) + tuple(bar) for start, bar in sorted(chart_live.items()) if start > last]
+        if live:
+            bars = pd.concat([bars, pd.DataFrame(
+                live, columns=['date', 'open', 'high', 'low', 'close', 'volume'])], ignore_index=True)
+        sma = bars['close'].rolling(window=14).mean().to_numpy()
+        charts.set(
+            popup,
+            candle_frame(bars),
+            line_frame(chart_times(bars['date']), sma, 'SMA 14'),
+            f"{symbol} {chart_request[0]}"
+        )
+
+    def open_chart(historical_data, duration, bar_size):
+        """Swap historical data and SMA into the shared chart window."""
+        nonlocal chart_tz, chart_history, chart_request, loading_older, history_exhausted
+        if not popup.winfo_exists():
+            return
         if historical_data is None or historical_data.empty:
             messagebox.showerror("Error", "No historical data available")
             return
         
-        chart_data = historical_data[['date', 'open', 'high', 'low', 'close', 'volume']].copy()
-        chart_data = chart_data.rename(columns={'date': 'time'})
-        chart_data['time'] = chart_data['time'].astype(str)
+        chart_history = historical_data[['date', 'open', 'high', 'low', 'close', 'volume']]
+        chart_request = (duration, bar_size)
+        loading_older = False
+        # Older bars of the current contract would not match a continuous series
+        history_exhausted = "contract" in historical_data.columns
         
-        # Destroy existing chart if present
-        if chart:
-            chart.exit()
-            chart_window = None
+        # Continue the last historical bar from the live feed, unless the
+        # live bars already run past it because the history was cached
+        last_bar = historical_data.iloc[-1]
+        last_start = to_epoch(last_bar["date"])
+        chart_tz = getattr(last_bar["date"], "tzinfo", None)
+        bar_seconds = BAR_SIZE_SECONDS[bar_size]
+        if chart_bars.bar_seconds != bar_seconds or chart_bars.bar is None or chart_bars.bar[0] <= last_start:
+            chart_live.clear()
+            chart_bars.reset(bar_seconds)
+            chart_bars.seed(
+                last_start, last_bar["open"], last_bar["high"],
+                last_bar["low"], last_bar["close"], last_bar["volume"]
+            )
+        else:
+            chart_live[chart_bars.bar[0]] = tuple(chart_bars.bar[1:])
         
-        # Create new chart
         try:
-            chart = Chart(title=f"{symbol} ({time_frame_var.get()})", width=800, height=600)
-            chart.layout(background_color='#000008', text_color='#000000', font_size=12, font_family='Helvetica')
-            chart.candle_style(up_color='#00ff55', down_color='#ed4807')
-            chart.volume_config(up_color='#00ff55', down_color='#ed4807')
-            chart.watermark(f'{symbol} {time_frame_var.get()}', color='rgba(0, 0, 0, 0.3)')
-            chart.crosshair(mode='normal', vert_color='#000000', horz_color='#000000')
-            chart.legend(visible=True)
-            
-            # Set historical data
-            chart.set(chart_data)
-            
-            # Add SMA indicator
-            sma_data = calculate_sma(chart_data, period=14)
-            sma_line = chart.create_line('SMA 14')
-            sma_line.set(sma_data)
-            
-            # Show chart in separate window
-            chart.show(block=False)
-            chart_window = chart
+            charts.show(popup, on_range_change)
+            draw_history()
         except Exception as e:
             messagebox.showerror("Chart Error", f"Failed to create chart: {str(e)}\nEnsure WebView2 is installed.")
-            chart = None
-            chart_window = None
+            charts.release(popup)
+
+    def on_range_change(bars_before, bars_after):
+        """Page in older history when the view nears the first loaded bar."""
+        nonlocal loading_older
+        if loading_older or history_exhausted or bars_before > LAZY_LOAD_MARGIN:
+            return
+        loading_older = True
+        request = chart_request
+        duration, bar_size = request
+        end = datetime.fromtimestamp(to_epoch(chart_history["date"].iloc[0]), timezone.utc)
+        when_done(
+            ibkr_client.get_historical_data_before_async(contract, end, duration=duration, barSize=bar_size),
+            lambda older: prepend_history(request, older),
+            lambda e: prepend_history(request, None)
+        )
+
+    def prepend_history(request, older):
+        """Add older bars in front of the chart history and redraw."""
+        nonlocal chart_history, loading_older, history_exhausted
+        # Results for a time frame that has since been swapped out are dropped
+        if request is not chart_request or not popup.winfo_exists():
+            return
+        loading_older = False
+        if older is None or older.empty:
+            history_exhausted = True
+            return
+        older = older[['date', 'open', 'high', 'low', 'close', 'volume']]
+        older = older[older['date'] < chart_history['date'].iloc[0]]
+        if older.empty:
+            history_exhausted = True
+            return
+        chart_history = pd.concat([older, chart_history], ignore_index=True)
+        draw_history()
     
     # Button to view chart
     view_chart_btn = ttk.Button(
@@ -122,6 +258,27 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     view_chart_btn.pack(pady=5)
     ToolTip(view_chart_btn, text="Open chart in a separate window")
     
+    def change_time_frame(event=None):
+        """Swap the new time frame into the chart if this popup is showing it."""
+        if charts.owner is popup:
+            show_chart()
+    
+    time_frame_combobox.bind("<<ComboboxSelected>>", change_time_frame)
+    
+    def flush_chart():
+        """Push live bars to the chart at most once per frame interval."""
+        if chart_request is not None:
+            for start, open_, high, low, close, volume in chart_bars.pending():
+                chart_live[start] = (open_, high, low, close, volume)
+                charts.update(popup, pd.Series({
+                    'time': live_date(start).isoformat(),
+                    'open': open_,
+                    'high': high,
+                    'low': low,
+                    'close': close,
+                    'volume': volume
+                }))
+    
     # Order Placement
     order_frame = ttk.Labelframe(right_frame, text="Order Placement", bootstyle="danger")
     order_frame.grid(row=1, column=0, sticky="ew", pady=10)
@@ -140,30 +297,44 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     total_label = ttk.Label(order_frame, text="Total: N/A", font=("Helvetica", 12))
     total_label.grid(row=1, column=0, columnspan=4, padx=5, pady=5)
     
+    render.bind("total", total_label, lambda total: f"Total: ${total:.2f}" if total is not None else "Total: N/A")
+    
     def update_total(event=None):
         """Update the total price based on quantity and last price."""
         try:
             quantity = int(qty_entry.get())
             if quantity <= 0:
                 raise ValueError("Quantity must be positive")
-            last_text = last_label.cget("text")
-            parts = last_text.split()
-            if len(parts) < 2 or parts[1] == "N/A":
-                total_label.config(text="Total: N/A")
-                order_btn.config(state="disabled")
-                return
-            price = float(parts[1])
-            total = quantity * price
-            total_label.config(text=f"Total: ${total:.2f}")
-            order_btn.config(state="normal")
         except ValueError:
-            total_label.config(text="Total: N/A")
-            order_btn.config(state="disabled")
-    
+            quantity = None
+        last = render.get("last")
+        render.set("total", quantity * last if quantity and last is not None else None)
+    
+    def on_frame(changed):
+        """Keep the total and order button in step with the rendered quote."""
+        if "last" in changed:
+            update_total()
+        if "total" in changed:
+            order_btn.config(state="normal" if render.get("total") is not None else "disabled")
+    
+    render.on_render(on_frame)
     qty_entry.bind("<KeyRelease>", update_total)
     
+    # Orders go out on the qualified contract and are followed by their events
+    confirm_var = tk.BooleanVar(value=True)
+    order_status = ttk.Label(order_frame, font=("Helvetica", 10), bootstyle="secondary")
+    order_status.grid(row=3, column=0, columnspan=4, padx=5, pady=(0, 5))
+    order_ids = set()
+    
+    def show_order(record):
+        if record.order_id in order_ids:
+            order_status.config(text=order_summary(record),
+                                bootstyle="success" if record.status == "Filled" else "secondary")
+    
+    life.add(ibkr_client.watch_orders(life.guard(show_order)), "listener")
+    
     def place_order():
-        """Place an order after showing a confirmation dialog."""
+        """Confirm unless disabled, then submit without waiting for the gateway."""
         try:
             quantity = int(qty_entry.get())
             if quantity <= 0:
@@ -172,25 +343,32 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
             messagebox.showerror("Invalid Input", "Please enter a valid positive integer for quantity.")
             return
         
-        total_text = total_label.cget("text")
-        if total_text == "Total: N/A":
+        last = render.get("last")
+        if last is None:
             messagebox.showerror("Error", "Cannot place order: Market data unavailable.")
             return
         
-        total_cost = float(total_text.split("$")[1]) if total_text != "Total: N/A" else None
+        action = action_var.get()
+        if confirm_var.get() and not messagebox.askyesno(
+                "Confirm Order", f"Place {action} order for {quantity} {symbol}?\nTotal: ${quantity * last:.2f}",
+                parent=popup):
+            return
         
-        try:
-            trade = confirm_and_place_order(ibkr_client, ticker_type, symbol, action_var.get(), quantity, total_cost)
-            if trade:
-                status = trade.orderStatus.status if trade.orderStatus else "Unknown"
-                messagebox.showinfo("Order Placed", f"Order submitted: {status}")
-            else:
-                messagebox.showerror("Error", "Failed to place order.")
-        except Exception as e:
-            messagebox.showerror("Error", f"Order placement failed: {str(e)}")
+        def on_placed(record):
+            order_ids.add(record.order_id)
+            show_order(record)
+        
+        def on_failed(error):
+            order_status.config(text=f"Order failed: {error}", bootstyle="danger")
+        
+        order_status.config(text=f"Sending {action} {quantity}...", bootstyle="secondary")
+        when_done(ibkr_client.place_order_async(contract, action, quantity, time.perf_counter()),
+                              on_placed, on_failed)
     
     order_btn = ttk.Button(order_frame, text="Place Order", command=place_order, bootstyle="success", state="disabled")
-    order_btn.grid(row=2, column=0, columnspan=4, pady=10)
+    order_btn.grid(row=2, column=0, columnspan=3, pady=10)
+    ttk.Checkbutton(order_frame, text="Confirm", variable=confirm_var, bootstyle="round-toggle").grid(
+        row=2, column=3, padx=5, pady=10)
     
     # ** Left Frame (Market Data & Indicators) **
     left_frame = ttk.Frame(main_frame, padding=10)
@@ -208,34 +386,31 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     ask_label.grid(row=1, column=0, sticky="w", padx=5, pady=5)
     last_label.grid(row=2, column=0, sticky="w", padx=5, pady=5)
     
+    for key, label in (("bid", bid_label), ("ask", ask_label), ("last", last_label)):
+        render.bind(key, label, price_formatter(key.title()))
+    
     # Add tooltips
     ToolTip(bid_label, text="Current highest bid price")
     ToolTip(ask_label, text="Current lowest ask price")
     ToolTip(last_label, text="Most recent trade price")
     
-    # Real-time market data streaming
-    ticker = ibkr_client.ib.reqMktData(contract, genericTickList='', snapshot=False)
+    # Quote-only updates repeat the previous trade, which must not be counted again
+    trades = TradeFilter()
     
     def update_market_data(ticker):
         """Update market data labels and chart with streaming ticker data."""
-        bid = ticker.bid if ticker.bid is not None else "N/A"
-        ask = ticker.ask if ticker.ask is not None else "N/A"
-        last = ticker.last if ticker.last is not None else "N/A"
-        bid_label.config(text=f"Bid: {bid:.2f}" if isinstance(bid, float) else f"Bid: {bid}")
-        ask_label.config(text=f"Ask: {ask:.2f}" if isinstance(ask, float) else f"Ask: {ask}")
-        last_label.config(text=f"Last: {last:.2f}" if isinstance(last, float) else f"Last: {last}")
-        update_total()
+        if not popup.winfo_exists():
+            return
+        last = valid_price(ticker.last)
+        render.mark_tick()
+        render.update({"bid": valid_price(ticker.bid), "ask": valid_price(ticker.ask), "last": last})
         
-        # Update chart with tick data (1D time frame only)
-        if chart and time_frame_var.get() == "1 D" and isinstance(last, float):
-            tick_data = pd.Series({
-                'time': datetime.now().isoformat(),
-                'price': last
-            })
-            chart.update_from_tick(tick_data)
-    
-    ticker.updateEvent += update_market_data
-    update_market_data(ticker)  # Initial update
+        # Aggregate trades into live bars for the indicators and chart
+        trade = trades.new_trade(ticker)
+        if trade is not None:
+            update_live_indicators(*trade)
+            if chart_request is not None:
+                chart_bars.add_tick(*trade)
     
     # Technical Indicators
     indicators_frame = ttk.Labelframe(left_frame, text="Technical Indicators", bootstyle="warning")
@@ -251,22 +426,88 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     rsi_label.grid(row=3, column=0, sticky="w", padx=5, pady=5)
     
     # Add tooltips
-    ToolTip(sma_label, text="Simple Moving Average (14-period)")
-    ToolTip(ema_label, text="Exponential Moving Average (14-period)")
+    sma_tooltip = ToolTip(sma_label, text="Simple Moving Average (14-period)")
+    ema_tooltip = ToolTip(ema_label, text="Exponential Moving Average (14-period)")
     ToolTip(vwap_label, text="Volume Weighted Average Price")
-    ToolTip(rsi_label, text="Relative Strength Index (14-period)")
+    rsi_tooltip = ToolTip(rsi_label, text="Relative Strength Index (14-period)")
+    
+    # Indicators are seeded once from history and then follow the live feed
+    indicator_engine = IndicatorEngine()
+    indicator_history = None
+    indicator_bars = LiveBarBuilder(bar_seconds=60)
+    
+    for name, label in (("SMA", sma_label), ("EMA", ema_label), ("VWAP", vwap_label), ("RSI", rsi_label)):
+        render.bind(name, label, price_formatter(name))
     
-    def update_indicators():
+    def show_indicators(indicators):
+        """Display indicator values, using N/A for undefined ones."""
+        render.update(indicators)
+    
+    def update_indicators(priority=PRIORITY_USER):
         """Update technical indicators based on historical data."""
-        historical_data = ibkr_client.get_historical_data(contract)
-        if historical_data is not None:
-            indicators = ibkr_client.calculate_indicators(historical_data)
-            sma_label.config(text=f"SMA: {indicators.get('SMA', 'N/A'):.2f}")
-            ema_label.config(text=f"EMA: {indicators.get('EMA', 'N/A'):.2f}")
-            vwap_label.config(text=f"VWAP: {indicators.get('VWAP', 'N/A'):.2f}")
-            rsi_label.config(text=f"RSI: {indicators.get('RSI', 'N/A'):.2f}")
-        else:
-            messagebox.showerror("Error", "Failed to retrieve historical data")
+        when_done(
+            ibkr_client.get_historical_data_async(contract, priority=priority),
+            seed_indicators,
+            lambda e: messagebox.showerror("Error", "Failed to retrieve historical data")
+        )
+
+    def seed_indicators(historical_data):
+        """Seed the indicator engine from the fetched historical data.
+
+        The last bar may still be forming, so it becomes the live bar instead
+        of being folded into the engine.
+        """
+        nonlocal indicator_history
+        if not popup.winfo_exists():
+            return
+        indicator_history = historical_data
+        cache_history("1 D", "1 min", historical_data)
+        indicator_engine.seed(historical_data.iloc[:-1])
+        last_bar = historical_data.iloc[-1]
+        indicator_bars.seed(
+            to_epoch(last_bar["date"]), last_bar["open"], last_bar["high"],
+            last_bar["low"], last_bar["close"], last_bar["volume"]
+        )
+        show_indicators(indicator_engine.preview(indicator_bars.bar[4], indicator_bars.bar[5]))
+
+    def update_live_indicators(price, size):
+        """Update indicators from a trade without refetching history."""
+        if indicator_history is None:
+            return
+        completed = indicator_bars.add_tick(price, size)
+        if completed is not None:
+            indicator_engine.update(completed[4], completed[5])
+        show_indicators(indicator_engine.preview(indicator_bars.bar[4], indicator_bars.bar[5]))
+
+    def change_period():
+        """Re-seed the indicators with a new period from the cached history."""
+        nonlocal indicator_engine
+        try:
+            period = int(period_var.get())
+            indicator_engine = IndicatorEngine(sma_period=period, ema_period=period, rsi_period=period)
+        except (ValueError, tk.TclError):
+            return
+        sma_tooltip.text = f"Simple Moving Average ({period}-period)"
+        ema_tooltip.text = f"Exponential Moving Average ({period}-period)"
+        rsi_tooltip.text = f"Relative Strength Index ({period}-period)"
+        if indicator_history is not None:
+            seed_indicators(indicator_history)
+    
+    period_var = tk.StringVar(value="14")
+    period_frame = ttk.Frame(indicators_frame)
+    period_frame.grid(row=2, column=1, rowspan=2, padx=10, pady=5)
+    ttk.Label(period_frame, text="Period:", font=("Helvetica", 10)).pack(side="left")
+    period_spinbox = ttk.Spinbox(
+        period_frame,
+        from_=2,
+        to=200,
+        textvariable=period_var,
+        command=change_period,
+        width=5
+    )
+    period_spinbox.pack(side="left", padx=5)
+    period_spinbox.bind("<Return>", lambda event: change_period())
+    ToolTip(period_spinbox, text="Period for SMA, EMA and RSI")
     
     refresh_indicators_btn = ttk.Button(
         indicators_frame,
@@ -275,7 +516,16 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
         bootstyle="primary"
     )
     refresh_indicators_btn.grid(row=0, column=1, rowspan=2, padx=10, pady=5)
-    update_indicators()  # Initial update
+    update_indicators(PRIORITY_BACKGROUND)  # Initial update, behind chart requests
+    
+    # Real-time market data streaming, shared with other windows on the contract
+    try:
+        market_data = life.hold(ibkr_client.stream_market_data(contract, life.guard(update_market_data)))
+    except LineBudgetError as e:
+        messagebox.showerror("Market Data Error", str(e))
+        popup.destroy()
+        return popup
+    update_market_data(market_data.ticker)  # Initial update
     
     # Position Summary
     position_frame = ttk.Labelframe(left_frame, text="Position Summary", bootstyle="secondary")
@@ -284,42 +534,36 @@ def create_popup_window(parent, ibkr_client, ticker_type, symbol):
     position_label = ttk.Label(position_frame, text="No position held", font=("Helvetica", 12))
     position_label.grid(row=0, column=0, sticky="w", padx=5, pady=5)
     
-    def update_position():
-        """Update position summary for the ticker."""
-        positions = ibkr_client.get_positions()
-        if isinstance(positions, str):
-            position_label.config(text="No positions held")
+    def show_position(position=None):
+        """Display the position for the ticker, if any."""
+        if not popup.winfo_exists():
             return
-        for _, row in positions.iterrows():
-            if row["contract"].startswith(f"{symbol} "):
-                position_label.config(text=f"Quantity: {row['quantity']}, Avg Cost: ${row['average_cost']:.2f}")
-                return
-        position_label.config(text="No position held")
+        if position is None:
+            position = ibkr_client.get_position(contract)
+        elif position.contract.conId != contract.conId:
+            return
+        if position is None or not position.position:
+            position_label.config(text="No position held")
+        else:
+            position_label.config(text=f"Quantity: {position.position}, Avg Cost: ${position.avgCost:.2f}")
     
     ttk.Button(
         position_frame,
         text="Refresh Position",
-        command=update_position,
+        command=show_position,
         bootstyle="primary"
     ).grid(row=0, column=1, padx=10, pady=5)
-    update_position()  # Initial update
+    show_position()  # Initial update
+    life.add(ibkr_client.watch_positions(on_position=life.guard(show_position)), "listener")
     
     # Clean up on close
     def on_close():
-        ibkr_client.ib.cancelMktData(contract)
-        if chart:
-            chart.exit()
+        life.close()
         popup.destroy()
     
     popup.protocol("WM_DELETE_WINDOW", on_close)
     
-    # Auto-refresh indicators and position
-    def auto_refresh():
-        update_indicators()
-        update_position()
-        popup.after(30000, auto_refresh)
-    
-    auto_refresh()
+    life.every(int(CHART_FRAME_INTERVAL * 1000), flush_chart)
     
     # Close button
     close_btn = ttk.Button(main_frame, text="Close", command=on_close, bootstyle="danger")
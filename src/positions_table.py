@@ -0,0 +1,154 @@
+from src.ibkr_client import valid_price
+from src.subscriptions import LineBudgetError
+
+
+# Market data lines positions may hold for their trend sparklines
+POSITION_STREAMS = 25
+
+# Milliseconds between repaints of the trend column
+TREND_FRAME_MS = 1000
+
+
+def _label(contract):
+    return f"{contract.localSymbol} ({contract.secType})"
+
+
+class PositionsTable:
+
+    def __init__(self, tree, message_label, ibkr_client):
+        """Initialize a positions Treeview driven by position events
+
+        Rows are keyed by conId and updated in place from ib_insync position
+        and portfolio events; a full valuation only runs on ``refresh``, and
+        positions it could not price show the quote error as their price. Up to
+        POSITION_STREAMS positions stream market data, and their trend is
+        drawn from the stream's tick buffer.
+
+        Args:
+            tree (ttk.Treeview): Treeview with contract, quantity,
+                average_cost, current_price and trend columns
+            message_label (ttk.Label): Label shown when no positions are held
+            ibkr_client (IBKRClient): Instance of IBKRClient for API interactions
+        """
+        self.tree = tree
+        self.message_label = message_label
+        self.ibkr_client = ibkr_client
+        self._rows = {}
+        self._prices = {}
+        self._errors = {}
+        self._trends = {}
+        self._handles = {}
+        self._unwatch = None
+        self._after_id = None
+
+    def start(self):
+        """Listen for position changes and load the initial positions"""
+        self._unwatch = self.ibkr_client.watch_positions(self._on_position, self._on_portfolio)
+        self.refresh()
+        self._after_id = self.tree.after(TREND_FRAME_MS, self._render_trends)
+
+    def stop(self):
+        """Stop listening for position changes and release the streams"""
+        if self._unwatch is not None:
+            self._unwatch()
+            self._unwatch = None
+        if self._after_id is not None:
+            self.tree.after_cancel(self._after_id)
+            self._after_id = None
+        for con_id in list(self._handles):
+            self._unstream(con_id)
+
+    def refresh(self):
+        """Value every position in one batch and reconcile the rows"""
+        self.ibkr_client.when_done(self.ibkr_client.get_positions_async(), self._on_snapshot)
+
+    def _on_snapshot(self, positions):
+        seen = set()
+        if not isinstance(positions, str):
+            for row in positions.itertuples(index=False):
+                seen.add(row.conId)
+                self._errors[row.conId] = row.error
+                self._set(row.conId, row.contract, row.quantity, row.average_cost,
+                          valid_price(row.current_price))
+                self._stream(row.conId, row.routed_contract)
+        for con_id in list(self._rows):
+            if con_id not in seen:
+                self._remove(con_id)
+        self._update_message(positions if isinstance(positions, str) else None)
+
+    def _on_position(self, position):
+        con_id = position.contract.conId
+        if not position.position:
+            self._remove(con_id)
+        else:
+            self._set(con_id, _label(position.contract), position.position, position.avgCost,
+                      self._prices.get(con_id))
+        self._update_message()
+
+    def _on_portfolio(self, item):
+        con_id = item.contract.conId
+        if not item.position:
+            self._remove(con_id)
+        else:
+            price = valid_price(item.marketPrice) or self._prices.get(con_id)
+            self._set(con_id, _label(item.contract), item.position, item.averageCost, price)
+        self._update_message()
+
+    def _stream(self, con_id, contract):
+        if con_id in self._handles or len(self._handles) >= POSITION_STREAMS:
+            return
+        try:
+            # No listener: the trend is read from the tick buffer on a timer
+            self._handles[con_id] = self.ibkr_client.subscriptions.acquire(contract)
+        except LineBudgetError:
+            self._set_trend(con_id, "No line")
+
+    def _set_trend(self, con_id, trend):
+        if con_id in self._rows and self._trends.get(con_id) != trend:
+            self._trends[con_id] = trend
+            self.tree.set(str(con_id), "trend", trend)
+
+    def _unstream(self, con_id):
+        handle = self._handles.pop(con_id, None)
+        if handle is not None:
+            handle.release()
+
+    def _render_trends(self):
+        for con_id, handle in self._handles.items():
+            self._set_trend(con_id, handle.ticks.sparkline())
+        self._after_id = self.tree.after(TREND_FRAME_MS, self._render_trends)
+
+    def _set(self, con_id, label, quantity, average_cost, price):
+        self._prices[con_id] = price
+        values = (
+            label,
+            quantity,
+            f"${average_cost:.2f}",
+            f"${price:.2f}" if price is not None else self._errors.get(con_id) or "N/A",
+            self._trends.get(con_id, "")
+        )
+        iid = str(con_id)
+        current = self._rows.get(con_id)
+        if current is None:
+            self.tree.insert("", "end", iid=iid, values=values)
+        elif current != values:
+            for column, (old, new) in zip(self.tree["columns"], zip(current, values)):
+                if old != new:
+                    self.tree.set(iid, column, new)
+        self._rows[con_id] = values
+
+    def _remove(self, con_id):
+        if con_id in self._rows:
+            self.tree.delete(str(con_id))
+            del self._rows[con_id]
+            self._prices.pop(con_id, None)
+            self._errors.pop(con_id, None)
+            self._trends.pop(con_id, None)
+            self._unstream(con_id)
+
+    def _update_message(self, message=None):
+        if self._rows:
+            self.message_label.pack_forget()
+        else:
+            self.message_label.config(text=message or "No positions currently held.")
+            self.message_label.pack(pady=10)
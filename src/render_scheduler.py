@@ -0,0 +1,114 @@
+import time
+
+
+class RenderScheduler:
+
+    def __init__(self, widget, fps=20):
+        """Initialize a scheduler that repaints bound widgets at a capped rate
+
+        Values are stored as numbers and only formatted when a frame is drawn.
+        Updates that arrive between frames are coalesced, and widgets whose
+        text would not change are skipped.
+
+        Args:
+            widget (tk.Widget): Widget whose ``after()`` drives the frames
+            fps (int): Maximum frames rendered per second
+        """
+        self.widget = widget
+        self.interval = max(1, int(1000 / fps))
+        self.ticks_received = 0
+        self.frames_rendered = 0
+        self.widgets_updated = 0
+        self._bindings = {}
+        self._values = {}
+        self._texts = {}
+        self._dirty = set()
+        self._listeners = []
+        self._after_id = None
+        self._last_frame = 0.0
+
+    def bind(self, key, target, formatter):
+        """Render a value into a widget's text
+
+        Args:
+            key (str): Name of the value
+            target (tk.Widget): Widget configured with ``text=``
+            formatter (callable): Turns the value into the widget text
+        """
+        self._bindings[key] = (target, formatter)
+        self._dirty.add(key)
+        self._schedule()
+
+    def on_render(self, callback):
+        """Call ``callback(changed_keys)`` after each frame that changed values"""
+        self._listeners.append(callback)
+
+    def get(self, key, default=None):
+        """Return the latest value for a key"""
+        return self._values.get(key, default)
+
+    def mark_tick(self):
+        """Count an incoming market data update"""
+        self.ticks_received += 1
+
+    def set(self, key, value):
+        """Store a value and schedule a frame if it changed"""
+        if key in self._values and self._values[key] == value:
+            return
+        self._values[key] = value
+        self._dirty.add(key)
+        self._schedule()
+
+    def update(self, values):
+        """Store several values at once
+
+        Args:
+            values (dict): Mapping of keys to values
+        """
+        for key, value in values.items():
+            self.set(key, value)
+
+    def stats(self):
+        """Return counters for ticks received versus frames rendered
+
+        Returns:
+            dict: Dictionary with 'ticks_received', 'frames_rendered',
+                  'widgets_updated' and 'ticks_per_frame'
+        """
+        return {
+            "ticks_received": self.ticks_received,
+            "frames_rendered": self.frames_rendered,
+            "widgets_updated": self.widgets_updated,
+            "ticks_per_frame": self.ticks_received / self.frames_rendered if self.frames_rendered else 0.0
+        }
+
+    def stop(self):
+        """Cancel any pending frame"""
+        if self._after_id is not None:
+            self.widget.after_cancel(self._after_id)
+            self._after_id = None
+
+    def _schedule(self):
+        if self._after_id is not None:
+            return
+        elapsed = (time.monotonic() - self._last_frame) * 1000
+        delay = max(0, int(self.interval - elapsed))
+        self._after_id = self.widget.after(delay, self._render)
+
+    def _render(self):
+        self._after_id = None
+        self._last_frame = time.monotonic()
+        changed, self._dirty = self._dirty, set()
+        self.frames_rendered += 1
+        for key in changed:
+            binding = self._bindings.get(key)
+            if binding is None:
+                continue
+            target, formatter = binding
+            text = formatter(self._values.get(key))
+            if self._texts.get(key) != text:
+                target.config(text=text)
+                self._texts[key] = text
+                self.widgets_updated += 1
+        for callback in self._listeners:
+            callback(changed)
@@ -0,0 +1,234 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+
+
+# Lower values are served first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+# IB accepts about 50 API messages per second from a client
+MESSAGE_RATE = 50
+
+# Historical requests for bars of 30 seconds or less: 60 per 10 minutes
+PACED_REQUESTS = 60
+PACING_WINDOW = 600
+PACED_BAR_SECONDS = 30
+
+# IB rejects more than 50 simultaneous historical requests
+MAX_IN_FLIGHT = 50
+
+# Number of recent queue waits kept for the statistics
+WAIT_SAMPLES = 1000
+
+
+class TokenBucket:
+
+    def __init__(self, rate, capacity):
+        """Initialize a token bucket that starts full
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float): Maximum number of tokens, i.e. the burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._updated = time.monotonic()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self, now=None):
+        """Return the seconds until a token is available, 0 if one is now"""
+        self._refill(time.monotonic() if now is None else now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now=None):
+        """Remove a token; call only when ``delay()`` returned 0"""
+        self._refill(time.monotonic() if now is None else now)
+        self.tokens -= 1
+
+
+class _Request:
+
+    __slots__ = ("key", "factory", "priority", "paced", "future", "queued_at", "started", "throttled")
+
+    def __init__(self, key, factory, priority, paced, future):
+        self.key = key
+        self.factory = factory
+        self.priority = priority
+        self.paced = paced
+        self.future = future
+        self.queued_at = time.monotonic()
+        self.started = False
+        self.throttled = False
+
+
+class RequestScheduler:
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, message_rate=MESSAGE_RATE,
+                 paced_requests=PACED_REQUESTS, pacing_window=PACING_WINDOW):
+        """Initialize a priority queue for gateway requests
+
+        Requests are started in priority order, then in the order they were
+        submitted, while fewer than ``max_in_flight`` are outstanding and the
+        token buckets allow it. Every request takes a message token; paced
+        requests also take a token from the historical pacing bucket, and
+        while that bucket is empty the highest-priority request that needs
+        no pacing token is started ahead of them. A
+        request with the same key as one still queued or running is not sent
+        again but shares its result.
+
+        All methods must be called on the thread running the event loop.
+
+        Args:
+            max_in_flight (int): Maximum number of requests running at once
+            message_rate (float): Requests started per second, sustained and
+                as a burst
+            paced_requests (int): Paced requests allowed per pacing window
+            pacing_window (float): Length of the pacing window in seconds
+        """
+        self.max_in_flight = max_in_flight
+        self.messages = TokenBucket(message_rate, message_rate)
+        self.pacing = TokenBucket(paced_requests / pacing_window, paced_requests)
+        self.submitted = 0
+        self.coalesced = 0
+        self.completed = 0
+        self.failed = 0
+        self.throttled = 0
+        self._heap = []
+        self._requests = {}
+        self._order = itertools.count()
+        self._in_flight = 0
+        self._timer = None
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+
+    async def submit(self, key, factory, priority=PRIORITY_USER, paced=False):
+        """Queue a request and wait for its result
+
+        Args:
+            key (hashable, optional): Identity of the request; identical
+                requests in flight are coalesced. None never coalesces.
+            factory (callable): Returns the coroutine performing the request
+            priority (int): PRIORITY_USER or PRIORITY_BACKGROUND
+            paced (bool): Subject the request to the historical pacing limit
+
+        Returns:
+            object: Result of the coroutine
+
+        Raises:
+            Exception: Whatever the coroutine raised
+        """
+        request = self._requests.get(key) if key is not None else None
+        if request is None:
+            request = _Request(key, factory, priority, paced, asyncio.get_running_loop().create_future())
+            if key is not None:
+                self._requests[key] = request
+            heapq.heappush(self._heap, (priority, next(self._order), request))
+            self.submitted += 1
+        else:
+            self.coalesced += 1
+            if priority < request.priority and not request.started:
+                # Promote the queued request; its old heap entry is skipped
+                request.priority = priority
+                heapq.heappush(self._heap, (priority, next(self._order), request))
+        self._pump()
+        # A caller giving up must not cancel the request for the others
+        return await asyncio.shield(request.future)
+
+    def stats(self):
+        """Return queue depth, throughput counters and queue wait times
+
+        Returns:
+            dict: Dictionary with 'queued', 'queued_user', 'queued_background',
+                  'in_flight', 'submitted', 'coalesced', 'completed', 'failed',
+                  'throttled' (requests that waited for a token), and
+                  'wait_mean', 'wait_p95' and 'wait_max' in seconds over the
+                  most recent requests
+        """
+        queued = {id(r): r for _, _, r in self._heap if not r.started}.values()
+        waits = sorted(self._waits)
+        return {
+            "queued": len(queued),
+            "queued_user": sum(r.priority == PRIORITY_USER for r in queued),
+            "queued_background": sum(r.priority != PRIORITY_USER for r in queued),
+            "in_flight": self._in_flight,
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "completed": self.completed,
+            "failed": self.failed,
+            "throttled": self.throttled,
+            "wait_mean": sum(waits) / len(waits) if waits else 0.0,
+            "wait_p95": waits[min(len(waits) - 1, int(round(0.95 * (len(waits) - 1))))] if waits else 0.0,
+            "wait_max": waits[-1] if waits else 0.0
+        }
+
+    def _pump(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        wait = None
+        deferred = []
+        while self._heap and self._in_flight < self.max_in_flight:
+            priority, _, request = self._heap[0]
+            if request.started or priority != request.priority:
+                heapq.heappop(self._heap)
+                continue
+            delay = self.messages.delay(now)
+            if delay == 0 and request.paced:
+                delay = self.pacing.delay(now)
+                if delay > 0:
+                    # Set it aside so requests behind it that need no pacing token can go
+                    self._throttle(request)
+                    deferred.append(heapq.heappop(self._heap))
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+            if delay > 0:
+                self._throttle(request)
+                wait = delay if wait is None else min(wait, delay)
+                break
+            heapq.heappop(self._heap)
+            self.messages.take(now)
+            if request.paced:
+                self.pacing.take(now)
+            self._start(request, now)
+        for entry in deferred:
+            heapq.heappush(self._heap, entry)
+        if wait is not None:
+            self._timer = asyncio.get_running_loop().call_later(wait, self._pump)
+
+    def _throttle(self, request):
+        if not request.throttled:
+            request.throttled = True
+            self.throttled += 1
+
+    def _start(self, request, now):
+        request.started = True
+        self._in_flight += 1
+        self._waits.append(now - request.queued_at)
+        task = asyncio.ensure_future(request.factory())
+        task.add_done_callback(lambda t: self._finish(request, t))
+
+    def _finish(self, request, task):
+        self._in_flight -= 1
+        if request.key is not None and self._requests.get(request.key) is request:
+            del self._requests[request.key]
+        if task.cancelled():
+            self.failed += 1
+            request.future.cancel()
+        elif task.exception() is not None:
+            self.failed += 1
+            if not request.future.done():
+                request.future.set_exception(task.exception())
+        else:
+            self.completed += 1
+            if not request.future.done():
+                request.future.set_result(task.result())
+        self._pump()
@@ -0,0 +1,321 @@
+import json
+import os
+import re
+import time
+import tkinter as tk
+from tkinter import messagebox
+
+import numpy as np
+import pandas as pd
+import ttkbootstrap as ttk
+from ttkbootstrap.tooltip import ToolTip
+
+
+COLUMNS = ("symbol", "last", "change", "SMA", "EMA", "VWAP", "RSI")
+
+# IB limit on simultaneous historical data requests
+MAX_IN_FLIGHT = 50
+
+
+def _time_keys(dates):
+    """Return bar dates as int64 nanoseconds since the epoch"""
+    if not pd.api.types.is_datetime64_any_dtype(dates):
+        dates = pd.to_datetime(dates)
+    # For timezone aware dates .values holds UTC times
+    return dates.values.astype("datetime64[ns]").view("i8")
+
+
+def align_bars(frames):
+    """Align many contracts' bars on a common time axis
+
+    Bars missing for a contract are filled with its previous close (or its
+    first close before it starts trading) and zero volume.
+
+    Args:
+        frames (dict): DataFrames with 'date', 'close' and 'volume' columns
+            keyed by symbol
+
+    Returns:
+        tuple: (symbols, times, closes, volumes) where times are int64
+               nanoseconds and closes and volumes are float arrays of shape
+               (symbols, bars)
+    """
+    symbols = list(frames)
+    keys = [_time_keys(frames[s]['date']) for s in symbols]
+    if keys and all(len(k) == len(keys[0]) and np.array_equal(k, keys[0]) for k in keys):
+        # Common case: every contract has the same bars
+        closes = np.vstack([frames[s]['close'].to_numpy(dtype=float) for s in symbols])
+        volumes = np.vstack([frames[s]['volume'].to_numpy(dtype=float) for s in symbols])
+        return symbols, keys[0], closes, volumes
+
+    times = np.unique(np.concatenate(keys)) if keys else np.zeros(0, dtype="i8")
+    closes = np.full((len(symbols), len(times)), np.nan)
+    volumes = np.zeros((len(symbols), len(times)))
+    for i, (symbol, key) in enumerate(zip(symbols, keys)):
+        columns = np.searchsorted(times, key)
+        closes[i, columns] = frames[symbol]['close'].to_numpy(dtype=float)
+        volumes[i, columns] = frames[symbol]['volume'].to_numpy(dtype=float)
+
+    missing = np.isnan(closes)
+    if missing.any():
+        rows = np.arange(len(symbols))[:, None]
+        previous = np.where(missing, 0, np.arange(len(times)))
+        np.maximum.accumulate(previous, axis=1, out=previous)
+        closes = closes[rows, previous]
+        first = closes[np.arange(len(symbols)), (~missing).argmax(axis=1)]
+        closes = np.where(np.isnan(closes), first[:, None], closes)
+    return symbols, times, closes, volumes
+
+
+def scan_indicators(closes, volumes, sma_period=14, ema_period=14, rsi_period=14):
+    """Calculate the latest indicators of many contracts in one pass
+
+    Every row is one contract. The values match ``IndicatorEngine`` seeded
+    with the same bars, using the simple RSI smoothing.
+
+    Args:
+        closes (numpy.ndarray): Closes of shape (contracts, bars)
+        volumes (numpy.ndarray): Volumes of shape (contracts, bars)
+        sma_period (int): Period of the simple moving average
+        ema_period (int): Span of the exponential moving average
+        rsi_period (int): Period of the relative strength index
+
+    Returns:
+        dict: Arrays of length contracts for 'last', 'change', 'SMA',
+              'EMA', 'VWAP' and 'RSI'
+    """
+    closes = np.asarray(closes, dtype=float)
+    volumes = np.asarray(volumes, dtype=float)
+    count, bars = closes.shape
+    if not bars:
+        nan = np.full(count, np.nan)
+        return {name: nan.copy() for name in COLUMNS[1:]}
+
+    sma = closes[:, -sma_period:].mean(axis=1)
+
+    # EMA seeded with the first close, expanded into one weight per bar
+    alpha = 2 / (ema_period + 1)
+    weights = (1 - alpha) ** np.arange(bars - 1, -1, -1)
+    weights[1:] *= alpha
+    ema = closes @ weights
+
+    volume_total = volumes.sum(axis=1)
+    vwap = np.full(count, np.nan)
+    np.divide(np.einsum('ij,ij->i', closes, volumes), volume_total, out=vwap, where=volume_total != 0)
+
+    # The first bar has no prior close and counts as an unchanged bar
+    deltas = np.diff(closes, axis=1, prepend=closes[:, :1])[:, -rsi_period:]
+    avg_gain = np.clip(deltas, 0, None).mean(axis=1)
+    avg_loss = np.clip(-deltas, 0, None).mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100 - 100 / (1 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, np.nan), rsi)
+
+    first = closes[:, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(first != 0, closes[:, -1] / first - 1, np.nan)
+    return {
+        'last': closes[:, -1].copy(),
+        'change': change,
+        'SMA': sma,
+        'EMA': ema,
+        'VWAP': vwap,
+        'RSI': rsi
+    }
+
+
+def parse_symbols(text):
+    """Split text on whitespace and commas into unique upper-case symbols"""
+    return list(dict.fromkeys(s.upper() for s in re.split(r"[\s,;]+", text) if s))
+
+
+def _format(column, value):
+    if value != value:
+        return "N/A"
+    if column == "change":
+        return f"{value:+.2%}"
+    return f"{value:.2f}"
+
+
+class ScannerTable:
+
+    def __init__(self, tree):
+        """Initialize a sortable Treeview of scan results
+
+        Args:
+            tree (ttk.Treeview): Treeview with the scanner columns
+        """
+        self.tree = tree
+        self.symbols = []
+        self.values = {}
+        self._sort_column = None
+        self._descending = False
+        for column in COLUMNS:
+            tree.heading(column, text=column.title() if column.islower() else column,
+                         command=lambda c=column: self.sort(c))
+
+    def show(self, symbols, values):
+        """Replace the rows with a new scan
+
+        Args:
+            symbols (list): Symbols in row order
+            values (dict): Indicator arrays as returned by ``scan_indicators``
+        """
+        self.symbols = list(symbols)
+        self.values = values
+        self.tree.delete(*self.tree.get_children())
+        for i, symbol in enumerate(self.symbols):
+            row = (symbol,) + tuple(_format(c, values[c][i]) for c in COLUMNS[1:])
+            self.tree.insert("", "end", iid=symbol, values=row)
+        if self._sort_column is not None:
+            self._order(self._sort_column)
+
+    def sort(self, column):
+        """Sort by a column, toggling the direction on repeated clicks"""
+        self._descending = column == self._sort_column and not self._descending
+        self._sort_column = column
+        self._order(column)
+
+    def _order(self, column):
+        if column == "symbol":
+            order = np.argsort(np.array(self.symbols), kind='stable')
+            if self._descending:
+                order = order[::-1]
+        else:
+            keys = self.values[column]
+            # Missing values stay at the bottom in both directions
+            order = np.lexsort((-keys if self._descending else keys, np.isnan(keys)))
+        for position, i in enumerate(order):
+            self.tree.move(self.symbols[i], "", position)
+
+
+def create_scanner_window(parent, ibkr_client, watchlist_path=None):
+    """Create a window that screens many symbols for indicator values
+
+    Args:
+        parent (tk.Widget): Parent widget (typically the main application window).
+        ibkr_client (IBKRClient): Instance of IBKRClient for API interactions.
+        watchlist_path (str, optional): Watchlist file whose stocks prefill
+            the symbol list.
+
+    Returns:
+        ttk.Toplevel: The scanner window.
+    """
+    window = ttk.Toplevel(parent)
+    window.title("Indicator Scanner")
+    window.geometry("900x700")
+
+    controls = ttk.Frame(window, padding=10)
+    controls.pack(fill="x")
+
+    ticker_type = tk.StringVar(value="Stock")
+    ttk.Radiobutton(controls, text="Stock", variable=ticker_type, value="Stock").pack(side="left")
+    ttk.Radiobutton(controls, text="Future", variable=ticker_type, value="Future").pack(side="left", padx=5)
+
+    ttk.Label(controls, text="Time Frame:", font=("Helvetica", 10)).pack(side="left", padx=(10, 0))
+    duration_var = tk.StringVar(value="1 D")
+    ttk.Combobox(controls, textvariable=duration_var, values=["1 D", "5 D", "1 M"],
+                 state="readonly", width=6).pack(side="left", padx=5)
+
+    ttk.Label(controls, text="Period:", font=("Helvetica", 10)).pack(side="left", padx=(10, 0))
+    period_var = tk.StringVar(value="14")
+    period_spinbox = ttk.Spinbox(controls, from_=2, to=200, textvariable=period_var, width=5)
+    period_spinbox.pack(side="left", padx=5)
+    ToolTip(period_spinbox, text="Period for SMA, EMA and RSI")
+
+    symbols_text = tk.Text(window, height=4, font=("Helvetica", 11))
+    symbols_text.pack(fill="x", padx=10)
+    ToolTip(symbols_text, text="Symbols separated by spaces, commas or new lines")
+    if watchlist_path and os.path.exists(watchlist_path):
+        try:
+            with open(watchlist_path) as f:
+                entries = json.load(f)
+            symbols_text.insert("1.0", " ".join(s for t, s in entries if t == "Stock"))
+        except (OSError, ValueError):
+            pass
+
+    status_label = ttk.Label(window, text="", font=("Helvetica", 10))
+    status_label.pack(fill="x", padx=10, pady=5)
+
+    tree_frame = ttk.Frame(window, padding=(10, 0))
+    tree_frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(tree_frame, columns=COLUMNS, show="headings", bootstyle="table")
+    for column in COLUMNS:
+        tree.column(column, anchor="center", width=110)
+    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+    tree.configure(yscrollcommand=scrollbar.set)
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(side="left", fill="both", expand=True)
+    table = ScannerTable(tree)
+
+    # History of the last scan, so a new period does not refetch it
+    loaded = {}
+
+    def scan():
+        """Qualify the symbols and fetch their history in the background."""
+        symbols = parse_symbols(symbols_text.get("1.0", "end"))
+        if not symbols:
+            messagebox.showerror("Invalid Input", "Enter at least one symbol.")
+            return
+        scan_btn.config(state="disabled")
+        status_label.config(text=f"Loading {len(symbols)} symbols...")
+        ibkr_client.when_done(
+            ibkr_client.get_contracts_async(ticker_type.get(), symbols),
+            lambda contracts: on_contracts(symbols, contracts),
+            on_error
+        )
+
+    def on_contracts(symbols, contracts):
+        """Fetch the history of every qualified contract at once."""
+        found = [(s, c) for s, c in zip(symbols, contracts) if c is not None]
+        ibkr_client.when_done(
+            ibkr_client.get_historical_data_batch_async(
+                [c for _, c in found], duration=duration_var.get(), max_in_flight=MAX_IN_FLIGHT),
+            lambda frames: on_history([s for s, _ in found], frames, len(symbols)),
+            on_error
+        )
+
+    def on_history(symbols, frames, requested):
+        """Keep the usable histories and compute the scan."""
+        if not window.winfo_exists():
+            return
+        scan_btn.config(state="normal")
+        loaded.clear()
+        loaded.update(
+            (s, df) for s, df in zip(symbols, frames)
+            if isinstance(df, pd.DataFrame) and not df.empty
+        )
+        skipped = requested - len(loaded)
+        show_scan(f" ({skipped} skipped)" if skipped else "")
+
+    def show_scan(note=""):
+        """Compute the indicators of the loaded histories and show them."""
+        try:
+            period = int(period_var.get())
+        except ValueError:
+            return
+        if period < 1:
+            return
+        start = time.perf_counter()
+        symbols, times, closes, volumes = align_bars(loaded)
+        values = scan_indicators(closes, volumes, period, period, period)
+        elapsed = time.perf_counter() - start
+        table.show(symbols, values)
+        status_label.config(
+            text=f"Scanned {len(symbols)} symbols x {closes.shape[1]} bars in {elapsed * 1000:.0f} ms{note}")
+
+    def on_error(error):
+        if window.winfo_exists():
+            scan_btn.config(state="normal")
+            status_label.config(text="")
+            messagebox.showerror("Scanner Error", str(error))
+
+    period_spinbox.config(command=show_scan)
+    period_spinbox.bind("<Return>", lambda event: show_scan())
+
+    scan_btn = ttk.Button(controls, text="Scan", command=scan, bootstyle="primary")
+    scan_btn.pack(side="left", padx=10)
+    ToolTip(scan_btn, text="Fetch history and compute indicators for every symbol")
+
+    ttk.Button(window, text="Close", command=window.destroy, bootstyle="danger").pack(pady=10)
+    return window
@@ -0,0 +1,230 @@
+from collections import OrderedDict
+
+from src.tick_buffer import TickBuffer, TICK_CAPACITY
+
+
+class LineBudgetError(Exception):
+    """Raised when every market data line is held by an active subscription"""
+
+
+class MarketDataStream:
+
+    def __init__(self, contract, ticker, tick_capacity=TICK_CAPACITY):
+        """Initialize a single gateway subscription shared by many listeners
+
+        Every update is recorded in the stream's tick buffer before it is
+        fanned out, so listeners can read recent history from ``ticks``.
+
+        Args:
+            contract (Contract): Qualified IB contract object
+            ticker (Ticker): IB ticker returned by ``reqMktData``
+            tick_capacity (int): Ticks kept in the buffer
+        """
+        self.contract = contract
+        self.ticker = ticker
+        self.ticks = TickBuffer(tick_capacity)
+        self.listeners = ()
+        self.refcount = 0
+        ticker.updateEvent += self.dispatch
+
+    def rebind(self, ticker):
+        """Take updates from a new ticker for the same contract"""
+        self.ticker.updateEvent -= self.dispatch
+        self.ticker = ticker
+        ticker.updateEvent += self.dispatch
+
+    def dispatch(self, ticker):
+        """Record a ticker update and fan it out to every listener"""
+        self.ticks.append_ticker(ticker)
+        for listener in self.listeners:
+            listener(ticker)
+
+
+class SubscriptionHandle:
+
+    def __init__(self, manager, stream, listener):
+        """Initialize a reference to a shared market data stream
+
+        Args:
+            manager (SubscriptionManager): Manager that issued the handle
+            stream (MarketDataStream): The shared stream
+            listener (callable, optional): Listener registered on the stream
+        """
+        self._manager = manager
+        self._stream = stream
+        self.listener = listener
+        self.released = False
+
+    @property
+    def contract(self):
+        return self._stream.contract
+
+    @property
+    def ticker(self):
+        return self._stream.ticker
+
+    @property
+    def ticks(self):
+        """TickBuffer with the stream's recent updates"""
+        return self._stream.ticks
+
+    def release(self):
+        """Detach the listener and drop this reference to the stream"""
+        self._manager.release(self)
+
+
+class SubscriptionManager:
+
+    def __init__(self, ib, line_budget=100, call=None, tick_capacity=TICK_CAPACITY):
+        """Initialize a reference-counted multiplexer for streaming market data
+
+        Each contract is subscribed at most once. Streams whose last handle
+        was released stay open as idle streams and are cancelled, least
+        recently used first, only when a line is needed for another contract.
+
+        Args:
+            ib (IB): ib_insync connection
+            line_budget (int): Maximum number of simultaneous subscriptions
+            call (callable, optional): ``call(fn, *args)`` used to run
+                operations on the thread that owns the connection
+            tick_capacity (int): Ticks buffered per stream, which bounds the
+                tick memory to ``line_budget * tick_capacity`` ticks
+        """
+        self.ib = ib
+        self.line_budget = line_budget
+        self.tick_capacity = tick_capacity
+        self.evictions = 0
+        self.restores = 0
+        self._call = call or (lambda fn, *args: fn(*args))
+        self._streams = {}
+        self._idle = OrderedDict()
+        self._taps = ()
+
+    def acquire(self, contract, listener=None):
+        """Get a handle on the market data stream for a contract
+
+        Args:
+            contract (Contract): Qualified IB contract object
+            listener (callable, optional): Called with the ticker on every update
+
+        Returns:
+            SubscriptionHandle: Handle to release once the data is no longer needed
+
+        Raises:
+            LineBudgetError: If no line is free and no idle stream can be evicted
+        """
+        return self._call(self._acquire, contract, listener)
+
+    def release(self, handle):
+        """Release a handle, cancelling nothing until the line is needed elsewhere
+
+        Args:
+            handle (SubscriptionHandle): Handle returned by ``acquire``
+        """
+        self._call(self._release, handle)
+
+    def tap(self, listener):
+        """Call a listener with the updates of every stream, current and future
+
+        Taps do not hold a reference on any stream.
+
+        Args:
+            listener (callable): Called with the ticker on every update, on
+                the thread that owns the connection
+
+        Returns:
+            callable: Call it to remove the listener
+        """
+        self._call(self._tap, listener)
+        return lambda: self._call(self._untap, listener)
+
+    def restore(self):
+        """Request every stream in use again after the connection was re-established
+
+        ib_insync forgets its tickers when the connection drops. Streams with
+        handles are subscribed again and keep their listeners, so holders do
+        not need to re-acquire; idle streams are dropped.
+        """
+        self._call(self._restore)
+
+    def cancel_idle(self):
+        """Cancel every idle stream"""
+        self._call(self._cancel_idle)
+
+    def stats(self):
+        """Return subscription counts
+
+        Returns:
+            dict: Dictionary with 'streams', 'active', 'idle', 'listeners',
+                  'line_budget', 'evictions' and 'restores'
+        """
+        return {
+            "streams": len(self._streams),
+            "active": len(self._streams) - len(self._idle),
+            "idle": len(self._idle),
+            "listeners": sum(len(s.listeners) for s in list(self._streams.values())),
+            "line_budget": self.line_budget,
+            "evictions": self.evictions,
+            "restores": self.restores
+        }
+
+    def _acquire(self, contract, listener):
+        key = contract.conId
+        stream = self._streams.get(key)
+        if stream is None:
+            if len(self._streams) >= self.line_budget:
+                if not self._idle:
+                    raise LineBudgetError(
+                        f"All {self.line_budget} market data lines are in use")
+                self._cancel(self._idle.popitem(last=False)[1])
+                self.evictions += 1
+            ticker = self.ib.reqMktData(contract, '', False)
+            stream = MarketDataStream(contract, ticker, self.tick_capacity)
+            stream.listeners = self._taps
+            self._streams[key] = stream
+        self._idle.pop(key, None)
+        stream.refcount += 1
+        if listener is not None:
+            stream.listeners = stream.listeners + (listener,)
+        return SubscriptionHandle(self, stream, listener)
+
+    def _release(self, handle):
+        if handle.released:
+            return
+        handle.released = True
+        stream = handle._stream
+        if handle.listener is not None:
+            listeners = list(stream.listeners)
+            listeners.remove(handle.listener)
+            stream.listeners = tuple(listeners)
+        stream.refcount -= 1
+        if stream.refcount == 0:
+            self._idle[stream.contract.conId] = stream
+
+    def _tap(self, listener):
+        self._taps = self._taps + (listener,)
+        for stream in self._streams.values():
+            stream.listeners = stream.listeners + (listener,)
+
+    def _untap(self, listener):
+        self._taps = tuple(t for t in self._taps if t is not listener)
+        for stream in self._streams.values():
+            stream.listeners = tuple(existing for existing in stream.listeners if existing is not listener)
+
+    def _restore(self):
+        while self._idle:
+            stream = self._idle.popitem(last=False)[1]
+            stream.ticker.updateEvent -= stream.dispatch
+            del self._streams[stream.contract.conId]
+        for stream in self._streams.values():
+            stream.rebind(self.ib.reqMktData(stream.contract, '', False))
+        self.restores += 1
+
+    def _cancel(self, stream):
+        stream.ticker.updateEvent -= stream.dispatch
+        self.ib.cancelMktData(stream.contract)
+        del self._streams[stream.contract.conId]
+
+    def _cancel_idle(self):
+        while self._idle:
+            self._cancel(self._idle.popitem(last=False)[1])
@@ -0,0 +1,149 @@
+import math
+import time
+
+import numpy as np
+
+
+# Ticks kept per contract; 40 bytes each, so about 80 KB per contract
+TICK_CAPACITY = 2048
+
+# Characters of a sparkline, lowest to highest
+SPARK_LEVELS = "▁▂▃▄▅▆▇█"
+
+# Characters in a sparkline and seconds of ticks used for the statistics
+SPARK_WIDTH = 16
+STATS_WINDOW = 60
+
+
+def _price(value):
+    return value if value is not None and value > 0 else math.nan
+
+
+class TickBuffer:
+
+    def __init__(self, capacity=TICK_CAPACITY):
+        """Initialize a fixed-capacity ring buffer of ticks
+
+        Columns are preallocated, so appending only writes into them and
+        memory stays bounded whatever the tick rate; the oldest ticks are
+        overwritten once the buffer is full. Missing prices are stored as
+        NaN and missing sizes as 0.
+
+        A single thread appends. Readers on other threads get consistent
+        copies of every tick except possibly the oldest one, which may be
+        overwritten while it is copied.
+
+        Args:
+            capacity (int): Maximum number of ticks kept
+        """
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.float64)
+        self.bid = np.full(capacity, np.nan, dtype=np.float64)
+        self.ask = np.full(capacity, np.nan, dtype=np.float64)
+        self.last = np.full(capacity, np.nan, dtype=np.float64)
+        self.size = np.zeros(capacity, dtype=np.int64)
+        # Ticks appended since creation; the next slot is written % capacity
+        self.written = 0
+
+    def __len__(self):
+        return min(self.written, self.capacity)
+
+    def append(self, when, bid, ask, last, size):
+        """Write a tick into the next slot
+
+        Args:
+            when (float): POSIX time of the tick
+            bid (float): Bid price, or None/NaN/-1 when missing
+            ask (float): Ask price, or None/NaN/-1 when missing
+            last (float): Last trade price, or None/NaN/-1 when missing
+            size (float): Last trade size, or None/NaN when missing
+        """
+        i = self.written % self.capacity
+        self.time[i] = when
+        self.bid[i] = _price(bid)
+        self.ask[i] = _price(ask)
+        self.last[i] = _price(last)
+        self.size[i] = size if size is not None and size == size else 0
+        # Publish the slot only once every column was written
+        self.written += 1
+
+    def append_ticker(self, ticker):
+        """Append the current quote of an ib_insync Ticker"""
+        self.append(time.time(), ticker.bid, ticker.ask, ticker.last, ticker.lastSize)
+
+    def column(self, name, count=None):
+        """Return a column in time order, oldest first
+
+        Args:
+            name (str): 'time', 'bid', 'ask', 'last' or 'size'
+            count (int, optional): Only the most recent ticks
+
+        Returns:
+            numpy.ndarray: A copy of the column
+        """
+        written = self.written
+        n = min(written, self.capacity) if count is None else min(count, written, self.capacity)
+        end = written % self.capacity
+        values = getattr(self, name)
+        if n <= end:
+            return values[end - n:end].copy()
+        return np.concatenate((values[self.capacity - (n - end):], values[:end]))
+
+    def since(self, start):
+        """Return the number of the most recent ticks at or after a POSIX time"""
+        times = self.column("time")
+        return len(times) - int(np.searchsorted(times, start, side="left"))
+
+    def stats(self, window=STATS_WINDOW, now=None):
+        """Summarize the ticks of a recent window
+
+        Args:
+            window (float): Seconds of ticks to summarize
+            now (float, optional): End of the window as a POSIX time
+
+        Returns:
+            dict: Dictionary with 'ticks', 'tick_rate' per second, 'spread'
+                  (mean ask minus bid), 'last', 'high', 'low' and 'change'
+                  of the last price over the window; None where unknown
+        """
+        now = time.time() if now is None else now
+        count = self.since(now - window)
+        bid, ask, last = (self.column(name, count) for name in ("bid", "ask", "last"))
+        spreads = ask - bid
+        spreads = spreads[~np.isnan(spreads)]
+        prices = last[~np.isnan(last)]
+        return {
+            "ticks": count,
+            "tick_rate": count / window,
+            "spread": float(spreads.mean()) if len(spreads) else None,
+            "last": float(prices[-1]) if len(prices) else None,
+            "high": float(prices.max()) if len(prices) else None,
+            "low": float(prices.min()) if len(prices) else None,
+            "change": float(prices[-1] - prices[0]) if len(prices) else None
+        }
+
+    def sparkline(self, width=SPARK_WIDTH, count=None):
+        """Render the recent last prices as a line of block characters
+
+        Args:
+            width (int): Number of characters
+            count (int, optional): Ticks to cover; all buffered ticks by default
+
+        Returns:
+            str: The sparkline, empty when there are no prices
+        """
+        prices = self.column("last", count)
+        if np.isnan(prices).all():
+            # Quotes without trades are drawn from the midpoint
+            prices = (self.column("bid", count) + self.column("ask", count)) / 2
+        prices = prices[~np.isnan(prices)]
+        if not len(prices):
+            return ""
+        if len(prices) > width:
+            # The price at the end of each of ``width`` equal slices
+            prices = prices[np.linspace(len(prices) / width, len(prices), width).astype(int) - 1]
+        low, high = prices.min(), prices.max()
+        if high == low:
+            return SPARK_LEVELS[len(SPARK_LEVELS) // 2 - 1] * len(prices)
+        levels = ((prices - low) / (high - low) * (len(SPARK_LEVELS) - 1)).round().astype(int)
+        return "".join(SPARK_LEVELS[level] for level in levels)
@@ -0,0 +1,351 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+from ib_insync import BarData, Contract, Ticker, util
+
+from src.bar_store import BAR_DTYPE
+from src.fake_gateway import FakeIB
+from src.live_bars import LiveBarBuilder, TradeFilter, BAR_SIZE_SECONDS
+
+
+# One fixed-width record per ticker update
+TICK_DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('bid', 'f8'),
+    ('ask', 'f8'),
+    ('last', 'f8'),
+    ('bidSize', 'f4'),
+    ('askSize', 'f4'),
+    ('lastSize', 'f4'),
+    ('volume', 'f8'),
+])
+
+TICK_FIELDS = TICK_DTYPE.names[1:]
+
+
+def log_path(directory, con_id, suffix):
+    """Return the path of a contract's '.ticks', '.bars' or '.json' file"""
+    return os.path.join(directory, f"{con_id}{suffix}")
+
+
+def read_records(path, dtype):
+    """Read a log of fixed-width records
+
+    A partial record left at the end by an interrupted write is ignored.
+
+    Args:
+        path (str): Log file
+        dtype (numpy.dtype): Record layout
+
+    Returns:
+        numpy.ndarray: Records in the order they were written
+    """
+    try:
+        count = os.path.getsize(path) // dtype.itemsize
+    except OSError:
+        return np.zeros(0, dtype=dtype)
+    return np.fromfile(path, dtype=dtype, count=count)
+
+
+def read_ticks(directory, con_id):
+    """Return the recorded ticker updates of a contract as a TICK_DTYPE array"""
+    return read_records(log_path(directory, con_id, ".ticks"), TICK_DTYPE)
+
+
+def read_bars(directory, con_id):
+    """Return the recorded bars of a contract as a BAR_DTYPE array"""
+    return read_records(log_path(directory, con_id, ".bars"), BAR_DTYPE)
+
+
+def recorded_contracts(directory):
+    """Return the contracts that have a log in a directory
+
+    Returns:
+        dict: (contract, bar_seconds) tuples keyed by conId
+    """
+    contracts = {}
+    for name in os.listdir(directory):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as f:
+                record = json.load(f)
+        except (OSError, ValueError):
+            continue
+        contract = Contract.create(**record["contract"])
+        contracts[contract.conId] = (contract, record["bar_seconds"])
+    return contracts
+
+
+class TickRecorder:
+
+    def __init__(self, directory, bar_seconds=60, buffer_size=256):
+        """Initialize an append-only recorder of ticker updates and bars
+
+        Each contract gets a '.ticks' log of TICK_DTYPE records and a '.bars'
+        log of the BAR_DTYPE bars built from its trades, plus a JSON file
+        describing the contract.
+
+        Args:
+            directory (str): Directory holding the logs
+            bar_seconds (int): Length of the recorded bars in seconds
+            buffer_size (int): Records buffered per contract before a write
+        """
+        self.directory = directory
+        self.bar_seconds = bar_seconds
+        self.buffer_size = buffer_size
+        self.records = 0
+        self._ticks = {}
+        self._bars = {}
+        self._builders = {}
+        self._trades = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def attach(self, ibkr_client, contract):
+        """Record a contract's stream until the returned handle is released
+
+        The recorder listens on the thread owning the connection, so it sees
+        every update even when the UI coalesces them.
+
+        Args:
+            ibkr_client (IBKRClient): Client providing the market data stream
+            contract (Contract): Qualified IB contract object
+
+        Returns:
+            SubscriptionHandle: Handle to release to stop recording
+        """
+        return ibkr_client.subscriptions.acquire(contract, self.record)
+
+    def attach_all(self, ibkr_client):
+        """Record every stream of a client, including streams opened later
+
+        Args:
+            ibkr_client (IBKRClient): Client providing the market data streams
+
+        Returns:
+            callable: Call it to stop recording and write buffered records
+        """
+        untap = ibkr_client.subscriptions.tap(self.record)
+
+        def stop():
+            untap()
+            self.close()
+
+        return stop
+
+    def record(self, ticker):
+        """Append a ticker update, and the bar it completed if any"""
+        con_id = ticker.contract.conId
+        buffer = self._ticks.get(con_id)
+        if buffer is None:
+            buffer = self._open(ticker.contract)
+        stamp = ticker.time.timestamp() if ticker.time else time.time()
+        buffer.append((stamp,) + tuple(getattr(ticker, name) for name in TICK_FIELDS))
+        self.records += 1
+
+        # Quote-only updates repeat the previous trade and add no volume
+        trade = self._trades[con_id].new_trade(ticker)
+        if trade is not None:
+            completed = self._builders[con_id].add_tick(trade[0], trade[1], stamp)
+            if completed is not None:
+                start, open_, high, low, close, volume = completed
+                self._bars[con_id].append(
+                    (int(start), open_, high, low, close, volume, float('nan'), 0))
+        if len(buffer) >= self.buffer_size:
+            self._flush(con_id)
+
+    def flush(self):
+        """Write every buffered record"""
+        for con_id in list(self._ticks):
+            self._flush(con_id)
+
+    def close(self):
+        """Write buffered records, dropping the bars that are still forming"""
+        self.flush()
+        self._ticks.clear()
+        self._bars.clear()
+        self._builders.clear()
+        self._trades.clear()
+
+    def _open(self, contract):
+        with open(log_path(self.directory, contract.conId, ".json"), "w") as f:
+            json.dump({"contract": util.dataclassNonDefaults(contract), "bar_seconds": self.bar_seconds}, f)
+        self._ticks[contract.conId] = []
+        self._bars[contract.conId] = []
+        self._builders[contract.conId] = LiveBarBuilder(bar_seconds=self.bar_seconds)
+        self._trades[contract.conId] = TradeFilter()
+        return self._ticks[contract.conId]
+
+    def _flush(self, con_id):
+        for suffix, buffers, dtype in ((".ticks", self._ticks, TICK_DTYPE),
+                                       (".bars", self._bars, BAR_DTYPE)):
+            records = buffers[con_id]
+            if records:
+                with open(log_path(self.directory, con_id, suffix), "ab") as f:
+                    f.write(np.array(records, dtype=dtype).tobytes())
+                records.clear()
+
+
+class ReplayIB(FakeIB):
+
+    def __init__(self, directory, speed=1.0, **kwargs):
+        """Initialize a fake gateway that replays recorded logs
+
+        Recorded contracts qualify to their recorded conIds, streaming
+        requests for them receive the recorded updates in time order, and
+        historical requests are served from the recorded bars when the bar
+        size matches. Other requests fall back to ``FakeIB``.
+
+        Args:
+            directory (str): Directory written by a ``TickRecorder``
+            speed (float, optional): Replay speed relative to the recording,
+                e.g. 1 or 10; None replays as fast as possible
+            **kwargs: Passed to ``FakeIB``
+        """
+        super().__init__(**kwargs)
+        self.directory = directory
+        self.speed = speed
+        self.recorded = recorded_contracts(directory)
+        self.position = 0
+        self._replay_task = None
+
+        con_ids = list(self.recorded)
+        logs = [read_ticks(directory, con_id) for con_id in con_ids]
+        ticks = np.concatenate(logs) if logs else np.zeros(0, dtype=TICK_DTYPE)
+        owners = np.repeat(np.array(con_ids, dtype='i8'), [len(log) for log in logs])
+        # Merge the per-contract logs into a single stream in time order
+        order = np.argsort(ticks['time'], kind='stable')
+        self.ticks = ticks[order]
+        self.con_ids = owners[order]
+        self._states = {}
+
+    @property
+    def finished(self):
+        return self.position >= len(self.ticks)
+
+    def rewind(self):
+        """Restart the replay from the first recorded update"""
+        self.position = 0
+
+    def _find_recorded(self, contract):
+        for recorded, _ in self.recorded.values():
+            if (recorded.secType == contract.secType
+                    and recorded.symbol.upper() == contract.symbol.upper()
+                    and recorded.lastTradeDateOrContractMonth.startswith(
+                        contract.lastTradeDateOrContractMonth[:6])):
+                return recorded
+        return None
+
+    async def qualifyContractsAsync(self, *contracts):
+        unrecorded = []
+        qualified = []
+        for contract in contracts:
+            recorded = self._find_recorded(contract)
+            if recorded is None:
+                unrecorded.append(contract)
+                continue
+            contract.conId = recorded.conId
+            contract.exchange = contract.exchange or recorded.exchange
+            contract.localSymbol = recorded.localSymbol
+            contract.lastTradeDateOrContractMonth = recorded.lastTradeDateOrContractMonth
+            qualified.append(contract)
+        if unrecorded:
+            qualified += await super().qualifyContractsAsync(*unrecorded)
+        else:
+            await self._round_trip()
+        qualified = {id(c) for c in qualified}
+        return [c for c in contracts if id(c) in qualified]
+
+    def reqMktData(self, contract, genericTickList='', snapshot=False,
+                   regulatorySnapshot=False, mktDataOptions=None):
+        if contract.conId not in self.recorded:
+            return super().reqMktData(contract, genericTickList, snapshot)
+        ticker = Ticker(contract=contract)
+        state = self._states.get(contract.conId)
+        if state is not None:
+            self._apply(ticker, state)
+        if not snapshot:
+            self._tickers[contract.conId] = ticker
+        return ticker
+
+    def _apply(self, ticker, record):
+        ticker.prevBid, ticker.prevAsk, ticker.prevLast = ticker.bid, ticker.ask, ticker.last
+        for name in TICK_FIELDS:
+            setattr(ticker, name, float(record[name]))
+        ticker.time = datetime.fromtimestamp(float(record['time']), timezone.utc)
+
+    def tick(self):
+        """Replay the next recorded update
+
+        Returns:
+            int: Number of tickers updated, 0 once the replay has finished
+        """
+        if self.finished:
+            return 0
+        record = self.ticks[self.position]
+        con_id = int(self.con_ids[self.position])
+        self.position += 1
+        self._states[con_id] = record
+        ticker = self._tickers.get(con_id)
+        if ticker is None:
+            return 0
+        self._apply(ticker, record)
+        ticker.updateEvent.emit(ticker)
+        self.pendingTickersEvent.emit({ticker})
+        return 1
+
+    def start_replay(self):
+        """Replay the recording in the background at the configured speed
+
+        Must be called from the thread running the event loop.
+        """
+        self.stop_replay()
+        self._replay_task = asyncio.ensure_future(self.replay())
+
+    def stop_replay(self):
+        if self._replay_task is not None:
+            self._replay_task.cancel()
+            self._replay_task = None
+
+    def disconnect(self):
+        self.stop_replay()
+        super().disconnect()
+
+    async def replay(self):
+        """Replay the remaining updates, keeping their recorded spacing"""
+        if self.finished:
+            return
+        origin = float(self.ticks['time'][self.position])
+        started = time.monotonic()
+        while not self.finished:
+            if self.speed:
+                due = started + (float(self.ticks['time'][self.position]) - origin) / self.speed
+                delay = due - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif self.position % 256 == 0:
+                await asyncio.sleep(0)
+            self.tick()
+
+    async def reqHistoricalDataAsync(self, contract, endDateTime, durationStr, barSizeSetting,
+                                     whatToShow, useRTH, formatDate=1, keepUpToDate=False,
+                                     chartOptions=None, timeout=60):
+        recorded = self.recorded.get(contract.conId)
+        bars = None
+        if recorded is not None and recorded[1] == BAR_SIZE_SECONDS[barSizeSetting]:
+            bars = read_bars(self.directory, contract.conId)
+        if bars is None or not len(bars):
+            return await super().reqHistoricalDataAsync(
+                contract, endDateTime, durationStr, barSizeSetting, whatToShow, useRTH)
+        await self._round_trip()
+        return [
+            BarData(date=datetime.fromtimestamp(int(bar['time']), timezone.utc),
+                    open=float(bar['open']), high=float(bar['high']), low=float(bar['low']),
+                    close=float(bar['close']), volume=float(bar['volume']),
+                    average=float(bar['average']), barCount=int(bar['barCount']))
+            for bar in bars
+        ]
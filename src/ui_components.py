@@ -20,11 +20,14 @@ def request_market_data(ibkr_client, ticker_type, symbol, bid_label, ask_label,
         data = ibkr_client.get_market_data(contract)
         update_market_data_labels(bid_label, ask_label, last_label, data)
 
-def confirm_and_place_order(ibkr_client, ticker_type, symbol, action, quantity):
-    if not messagebox.askyesno("Confirm Order", f"Place {action} order for {quantity} {symbol}?"):
+def confirm_and_place_order(ibkr_client, ticker_type, symbol, action, quantity, total_cost=None, contract=None):
+    message = f"Place {action} order for {quantity} {symbol}?"
+    if total_cost is not None:
+        message += f"\nTotal: ${total_cost:.2f}"
+    if not messagebox.askyesno("Confirm Order", message):
         return
 
-    contract = ibkr_client.get_contract(ticker_type, symbol)
+    if contract is None:
+        contract = ibkr_client.get_contract(ticker_type, symbol)
     if contract:
-        trade = ibkr_client.place_order(contract, action, quantity)
-        messagebox.showinfo("Order Placed", f"{action} order for {quantity} contracts of {symbol} placed.")
+        return ibkr_client.place_order(contract, action, quantity)
@@ -0,0 +1,309 @@
+import json
+import os
+import tkinter as tk
+from tkinter import messagebox
+
+import ttkbootstrap as ttk
+from ttkbootstrap.tooltip import ToolTip
+
+from src.ibkr_client import valid_price
+from src.subscriptions import LineBudgetError
+from src.lifecycle import Lifecycle
+
+
+# Milliseconds between repaints of the visible rows
+WATCHLIST_FRAME_MS = 200
+
+# Rows above and below the viewport that stay subscribed for smooth scrolling
+SUBSCRIBE_MARGIN = 10
+
+COLUMNS = ("symbol", "type", "bid", "ask", "last", "change", "trend", "spread", "rate")
+
+
+def _format_price(value):
+    return f"{value:.2f}" if value is not None else "N/A"
+
+
+def tick_columns(ticks):
+    """Return the trend, spread and tick rate cells rendered from a TickBuffer"""
+    stats = ticks.stats()
+    return (
+        ticks.sparkline(),
+        _format_price(stats["spread"]),
+        f"{stats['tick_rate']:.1f}/s"
+    )
+
+
+class Watchlist:
+
+    def __init__(self, tree, ibkr_client, path=None):
+        """Initialize a streaming watchlist backed by a Treeview
+
+        Rows are keyed by a stable iid and updated in place. Only rows in or
+        near the viewport hold a market data subscription, and only visible
+        rows are repainted.
+
+        Args:
+            tree (ttk.Treeview): Treeview with the watchlist columns
+            ibkr_client (IBKRClient): Instance of IBKRClient for API interactions
+            path (str, optional): JSON file the symbol list is persisted to
+        """
+        self.tree = tree
+        self.ibkr_client = ibkr_client
+        self.path = path
+        self.rows = []
+        self._contracts = {}
+        self._handles = {}
+        self._quotes = {}
+        self._rendered = {}
+        self._dirty = set()
+        # Rows refused a line; retried once this watchlist releases one
+        self._no_line = set()
+        self._after_id = None
+        self._scrollbar_set = None
+        tree.configure(yscrollcommand=self._on_scroll)
+
+    @staticmethod
+    def make_iid(ticker_type, symbol):
+        return f"{ticker_type}:{symbol.upper()}"
+
+    def attach_scrollbar(self, scrollbar):
+        """Keep a scrollbar in sync with the Treeview viewport"""
+        self._scrollbar_set = scrollbar.set
+
+    def load(self):
+        """Load the persisted symbols into the Treeview"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            return
+        for ticker_type, symbol in entries:
+            self.add(ticker_type, symbol, save=False)
+
+    def save(self):
+        """Persist the symbol list"""
+        if not self.path:
+            return
+        entries = [iid.split(":", 1) for iid in self.rows]
+        with open(self.path, "w") as f:
+            json.dump(entries, f)
+
+    def add(self, ticker_type, symbol, save=True):
+        """Add a symbol; its contract is qualified in the background
+
+        Args:
+            ticker_type (str): Type of ticker ('Stock' or 'Future')
+            symbol (str): Ticker symbol
+            save (bool): Persist the list after adding
+        """
+        iid = self.make_iid(ticker_type, symbol)
+        if iid in self._rendered:
+            return
+        values = (symbol.upper(), ticker_type, "N/A", "N/A", "N/A", "N/A", "", "N/A", "N/A")
+        self.tree.insert("", "end", iid=iid, values=values)
+        self.rows.append(iid)
+        self._rendered[iid] = values
+        if save:
+            self.save()
+        self.ibkr_client.when_done(
+            self.ibkr_client.get_contract_async(ticker_type, symbol),
+            lambda contract: self._on_contract(iid, contract),
+            lambda e: self._on_contract(iid, None)
+        )
+
+    def remove(self, iid):
+        """Remove a row and release its subscription"""
+        if iid not in self._rendered:
+            return
+        self._unsubscribe(iid)
+        self.tree.delete(iid)
+        self.rows.remove(iid)
+        for table in (self._contracts, self._quotes, self._rendered):
+            table.pop(iid, None)
+        self._dirty.discard(iid)
+        self._no_line.discard(iid)
+        self.save()
+        self.sync_subscriptions()
+
+    def start(self):
+        """Start repainting visible rows"""
+        if self._after_id is None:
+            self._after_id = self.tree.after(WATCHLIST_FRAME_MS, self._render)
+
+    def close(self):
+        """Stop repainting, release every subscription and forget the rows
+
+        Qualifications still running find no row when they finish, so they
+        neither touch the destroyed Treeview nor open a new stream.
+        """
+        if self._after_id is not None:
+            self.tree.after_cancel(self._after_id)
+            self._after_id = None
+        for iid in list(self._handles):
+            self._unsubscribe(iid)
+        self.rows.clear()
+        for table in (self._contracts, self._quotes, self._rendered):
+            table.clear()
+        self._dirty.clear()
+        self._no_line.clear()
+
+    def visible_range(self, margin=0):
+        """Return the (first, last) row indexes in the viewport, plus a margin"""
+        if not self.rows:
+            return 0, -1
+        top, bottom = self.tree.yview()
+        count = len(self.rows)
+        first = max(0, int(top * count) - margin)
+        last = min(count - 1, int(bottom * count) + margin)
+        return first, last
+
+    def sync_subscriptions(self):
+        """Subscribe rows near the viewport and release the others"""
+        first, last = self.visible_range(SUBSCRIBE_MARGIN)
+        wanted = set(self.rows[first:last + 1])
+        for iid in list(self._handles):
+            if iid not in wanted:
+                self._unsubscribe(iid)
+        for iid in self.rows[first:last + 1]:
+            if iid not in self._handles and iid not in self._no_line and self._contracts.get(iid) is not None:
+                self._subscribe(iid)
+
+    def _on_scroll(self, first, last):
+        if self._scrollbar_set is not None:
+            self._scrollbar_set(first, last)
+        self.sync_subscriptions()
+        # Rows that ticked while off screen are repainted as they scroll in
+        self._dirty.update(self._quotes)
+
+    def _on_contract(self, iid, contract):
+        if iid not in self._rendered:
+            return
+        if contract is None:
+            self._set_row(iid, self._rendered[iid][:2] + ("Invalid",) * 4 + ("", "N/A", "N/A"))
+            return
+        self._contracts[iid] = contract
+        self.sync_subscriptions()
+
+    def _subscribe(self, iid):
+        try:
+            self._handles[iid] = self.ibkr_client.stream_market_data(
+                self._contracts[iid], lambda ticker: self._on_tick(iid, ticker))
+        except LineBudgetError:
+            self._no_line.add(iid)
+            self._set_row(iid, self._rendered[iid][:2] + ("No line",) * 4 + ("", "N/A", "N/A"))
+            return
+        if self._rendered[iid][2] == "No line":
+            self._set_row(iid, self._rendered[iid][:2] + ("N/A",) * 4 + ("", "N/A", "N/A"))
+
+    def _unsubscribe(self, iid):
+        handle = self._handles.pop(iid, None)
+        if handle is not None:
+            handle.release()
+            self._no_line.clear()
+
+    def _on_tick(self, iid, ticker):
+        if iid not in self._handles:
+            return
+        self._quotes[iid] = (
+            valid_price(ticker.bid), valid_price(ticker.ask),
+            valid_price(ticker.last), valid_price(ticker.close)
+        )
+        self._dirty.add(iid)
+
+    def _render(self):
+        first, last = self.visible_range()
+        visible = self.rows[first:last + 1]
+        dirty = self._dirty
+        for iid in visible:
+            if iid in dirty:
+                dirty.discard(iid)
+                bid, ask, last_price, close = self._quotes[iid]
+                change = "N/A"
+                if last_price is not None and close is not None:
+                    change = f"{last_price - close:+.2f} ({(last_price - close) / close:+.2%})"
+                handle = self._handles.get(iid)
+                ticks = tick_columns(handle.ticks) if handle is not None else self._rendered[iid][6:]
+                self._set_row(iid, self._rendered[iid][:2] + (
+                    _format_price(bid), _format_price(ask), _format_price(last_price), change) + ticks)
+        self._after_id = self.tree.after(WATCHLIST_FRAME_MS, self._render)
+
+    def _set_row(self, iid, values):
+        if self._rendered.get(iid) != values:
+            self.tree.item(iid, values=values)
+            self._rendered[iid] = values
+
+
+def create_watchlist_window(parent, ibkr_client, path=None):
+    """Create a window with a streaming watchlist
+
+    Args:
+        parent (tk.Widget): Parent widget (typically the main application window).
+        ibkr_client (IBKRClient): Instance of IBKRClient for API interactions.
+        path (str, optional): JSON file the symbol list is persisted to.
+
+    Returns:
+        ttk.Toplevel: The watchlist window.
+    """
+    window = ttk.Toplevel(parent)
+    window.title("Watchlist")
+    window.geometry("1000x600")
+
+    entry_frame = ttk.Frame(window, padding=10)
+    entry_frame.pack(fill="x")
+
+    ticker_type = tk.StringVar(value="Stock")
+    ttk.Radiobutton(entry_frame, text="Stock", variable=ticker_type, value="Stock").pack(side="left")
+    ttk.Radiobutton(entry_frame, text="Future", variable=ticker_type, value="Future").pack(side="left", padx=5)
+    symbol_entry = ttk.Entry(entry_frame, width=15, font=("Helvetica", 12))
+    symbol_entry.pack(side="left", padx=10)
+
+    tree_frame = ttk.Frame(window, padding=(10, 0))
+    tree_frame.pack(fill="both", expand=True)
+    tree = ttk.Treeview(tree_frame, columns=COLUMNS, show="headings", bootstyle="table")
+    for col in COLUMNS:
+        tree.heading(col, text=col.title())
+        tree.column(col, anchor="center", width=140 if col == "trend" else 100)
+    scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=tree.yview)
+    scrollbar.pack(side="right", fill="y")
+    tree.pack(side="left", fill="both", expand=True)
+
+    watchlist = Watchlist(tree, ibkr_client, path)
+    watchlist.attach_scrollbar(scrollbar)
+
+    def add_symbol(event=None):
+        """Add the entered symbol to the watchlist."""
+        symbol = symbol_entry.get().strip()
+        if not symbol or not symbol.isalnum():
+            messagebox.showerror("Invalid Input", "Ticker symbol must be alphanumeric.")
+            return
+        watchlist.add(ticker_type.get(), symbol)
+        symbol_entry.delete(0, "end")
+
+    def remove_selected():
+        """Remove the selected rows from the watchlist."""
+        for iid in tree.selection():
+            watchlist.remove(iid)
+
+    symbol_entry.bind("<Return>", add_symbol)
+    add_btn = ttk.Button(entry_frame, text="Add", command=add_symbol, bootstyle="primary")
+    add_btn.pack(side="left")
+    ToolTip(add_btn, text="Add the symbol to the watchlist")
+    ttk.Button(entry_frame, text="Remove Selected", command=remove_selected, bootstyle="danger").pack(side="left", padx=5)
+
+    life = Lifecycle(window, "watchlist")
+    life.add(watchlist.close, "subscription")
+
+    def on_close():
+        life.close()
+        window.destroy()
+
+    window.protocol("WM_DELETE_WINDOW", on_close)
+    ttk.Button(window, text="Close", command=on_close, bootstyle="danger").pack(pady=10)
+
+    watchlist.load()
+    watchlist.start()
+    window.watchlist = watchlist
+    return window